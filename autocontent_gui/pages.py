@@ -1,3 +1,5 @@
+from pathlib import Path
+
 from qt_core import *
 from gui.core.json_settings import Settings
 from gui.core.json_themes import Themes
@@ -21,6 +23,24 @@ _THEME = _load_theme()
 _FONT_FAMILY = Settings().items["font"]["family"]
 
 
+def _voice_entries() -> list[tuple[str, str | None]]:
+    """Return ``(label, voice_id)`` pairs for the voice combo.
+
+    Voices come from the cached ElevenLabs catalog, which refreshes itself in
+    the background when missing or expired.
+    """
+    entries: list[tuple[str, str | None]] = [("Default", None)]
+    try:
+        from pipeline.config import Config
+
+        voices = Config.load(Path("config/config.json")).voice_catalog().voices()
+    except Exception:
+        voices = None
+    for voice in voices or []:
+        entries.append((voice["name"] or voice["voice_id"], voice["voice_id"]))
+    return entries
+
+
 def _header(text: str) -> QLabel:
     lbl = QLabel(text)
     lbl.setStyleSheet(
@@ -59,7 +79,8 @@ class HomePageWidget(QWidget):
 
         ctrl_layout.addWidget(QLabel("Voice:"), 0, 0)
         self.voice_combo = QComboBox()
-        self.voice_combo.addItems(["Default", "Voice 1", "Voice 2"])
+        for label, voice_id in _voice_entries():
+            self.voice_combo.addItem(label, voice_id)
         ctrl_layout.addWidget(self.voice_combo, 0, 1)
 
         ctrl_layout.addWidget(QLabel("Background:"), 1, 0)
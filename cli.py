@@ -36,8 +36,11 @@ class CLI:
         parser.add_argument("--output", help="Output video path")
         parser.add_argument("--preset", help="Name of preset to use")
         parser.add_argument("--preview-voice", help="Preview voice ID then exit")
+        parser.add_argument("--prewarm-previews", action="store_true", help="Render previews of every configured voice then exit")
         parser.add_argument("--batch", help="Folder of scripts for batch mode")
+        parser.add_argument("--resume", metavar="OUTPUT_DIR", help="Resume an interrupted run from its output folder")
         parser.add_argument("--randomize", action="store_true", help="Randomize voice/background in batch mode")
+        parser.add_argument("--jobs", type=int, default=1, help="Number of scripts processed in parallel in batch mode")
         parser.add_argument("--watermark-path", help="Override watermark image path")
         parser.add_argument("--generate", action="store_true", help="Generate story with Mistral AI")
         parser.add_argument("--genre", help="Story genre")
@@ -48,10 +51,40 @@ class CLI:
         parser.add_argument("--force-coqui", action="store_true", help="Use Coqui TTS instead of ElevenLabs")
         parser.add_argument("--whisper-disable", action="store_true", help="Skip Whisper transcription")
         parser.add_argument("--no-watermark", action="store_true", help="Disable watermark")
-        parser.add_argument("--dry-run", action="store_true")
+        parser.add_argument(
+            "--archive",
+            choices=["background", "sync", "off"],
+            help="Zip the output folder in the background, before returning, or not at all",
+        )
+        parser.add_argument("--dry-run", action="store_true", help="Print the execution plan and predicted run time without running")
+        parser.add_argument("--show-graph", action="store_true", help="Print the stage graph in Graphviz DOT format then exit")
         parser.add_argument("--debug", action="store_true")
         parser.add_argument("--verbose", action="store_true", help="Verbose logging")
         parser.add_argument("--log-to-file", action="store_true")
+
+        commands = parser.add_subparsers(dest="command")
+        worker = commands.add_parser(
+            "worker", help="Keep models loaded and process JSON-lines jobs from stdin or a socket"
+        )
+        worker.add_argument("--socket", help="Listen on this Unix socket instead of stdin")
+        worker.add_argument("--no-warmup", action="store_true", help="Load models lazily")
+        models = commands.add_parser("models", help="Manage TTS models")
+        models_commands = models.add_subparsers(dest="models_command", required=True)
+        fetch = models_commands.add_parser("fetch", help="Download the Coqui model ahead of time")
+        fetch.add_argument("--model", help="Coqui model name (default: coqui_model_name from the config)")
+        voices = commands.add_parser("voices", help="List the cached ElevenLabs voice catalog")
+        voices.add_argument("--refresh", action="store_true", help="Fetch the catalog from the API first")
+        align = commands.add_parser(
+            "align-report", help="Compare script alignment with the Whisper transcripts of finished runs"
+        )
+        align.add_argument("runs", nargs="*", help="Run folders (default: every folder in output/)")
+        cache = commands.add_parser("cache", help="Inspect or trim the stage and TTS caches")
+        cache_commands = cache.add_subparsers(dest="cache_command", required=True)
+        cache_commands.add_parser("stats", help="Show entries and disk usage per cache")
+        prune = cache_commands.add_parser("prune", help="Evict least recently used entries")
+        prune.add_argument(
+            "--max-mb", type=int, help="Shrink each cache to this size (default: the configured caps; 0 clears)"
+        )
         return parser
 
     @staticmethod
@@ -84,9 +117,11 @@ def main(argv=None) -> None:
     from pipeline.logger import setup_logger
     from pipeline.helpers import color_print, log_trace, validate_files
 
-    color_print("INFO", "Starting AutoContent CLI pipeline...")
-    load_dotenv()
     args = CLI.parse(argv)
+    if args.command not in {"worker", "models", "cache", "voices", "align-report"}:
+        # stdout carries the job protocol in worker mode
+        color_print("INFO", "Starting AutoContent CLI pipeline...")
+    load_dotenv()
     if args.verbose:
         args.debug = True
 
@@ -94,11 +129,143 @@ def main(argv=None) -> None:
     logger = setup_logger("cli", None, args.debug)
     config.validate(logger)
 
+    if args.command == "worker":
+        import sys
+        from pipeline.worker import PipelineWorker
+
+        worker = PipelineWorker(config, debug=args.debug)
+        if not args.no_warmup:
+            worker.warmup()
+        if args.socket:
+            worker.serve_socket(Path(args.socket))
+        else:
+            worker.serve_stream(sys.stdin, sys.stdout)
+        return
+
+    if args.command == "models":
+        from pipeline.models import fetch_coqui_model
+
+        name = args.model or config.coqui_model_name
+        try:
+            path = fetch_coqui_model(name)
+        except Exception as exc:
+            color_print("ERROR", f"Downloading {name} failed: {exc}")
+            log_trace(exc)
+            return
+        color_print("SUCCESS", f"Coqui model {name} available at {path}")
+        return
+
+    if args.command == "voices":
+        catalog = config.voice_catalog()
+        try:
+            voices = catalog.refresh() if args.refresh else catalog.voices(block=True)
+        except Exception as exc:
+            color_print("ERROR", f"Fetching voices failed: {exc}")
+            return
+        if voices is None:
+            color_print("ERROR", "No voice catalog cached and none could be fetched")
+            return
+        for voice in voices:
+            print(f"{voice['voice_id']}  {voice['name']}")
+        age = catalog.age()
+        if age is not None:
+            color_print("INFO", f"{len(voices)} voices, catalog {age / 3600:.1f}h old")
+        unknown = catalog.unknown((config.voices or {}).values())
+        if unknown:
+            color_print("ERROR", f"Configured voices not in the catalog: {', '.join(unknown)}")
+        return
+
+    if args.command == "align-report":
+        from pipeline.align import report_run
+
+        runs = [Path(r) for r in args.runs] or sorted(p for p in Path("output").glob("*") if p.is_dir())
+        totals = {"matched": 0, "error_ms": 0.0, "within_100ms": 0.0, "within_250ms": 0.0}
+        for run in runs:
+            report = report_run(run)
+            if not report or not report["matched"]:
+                continue
+            print(
+                f"{run.name}: {report['matched']}/{report['words']} words, "
+                f"median {report['median_ms']:.0f} ms, p90 {report['p90_ms']:.0f} ms, "
+                f"{report['within_250ms']:.0%} within 250 ms"
+            )
+            n = report["matched"]
+            totals["matched"] += n
+            totals["error_ms"] += report["mean_ms"] * n
+            totals["within_100ms"] += report["within_100ms"] * n
+            totals["within_250ms"] += report["within_250ms"] * n
+        n = totals["matched"]
+        if not n:
+            color_print("ERROR", "No runs with audio and a word-level Whisper transcript found")
+            return
+        color_print(
+            "INFO",
+            f"{n} words: mean error {totals['error_ms'] / n:.0f} ms, "
+            f"{totals['within_100ms'] / n:.0%} within 100 ms, "
+            f"{totals['within_250ms'] / n:.0%} within 250 ms",
+        )
+        return
+
+    if args.command == "cache":
+        pipeline = VideoPipeline(config)
+        caches = {"stage": pipeline.cache, "tts": pipeline.tts_cache}
+        for label, cache in caches.items():
+            if args.cache_command == "prune":
+                limit = None if args.max_mb is None else args.max_mb * 1024 * 1024
+                removed = cache.evict(limit)
+                color_print("INFO", f"{label} cache: removed {removed} entries")
+            usage = cache.usage()
+            print(
+                f"{label} cache {usage['root']}: {usage['entries']} entries, "
+                f"{usage['bytes'] / 1024 / 1024:.1f}/{usage['max_bytes'] / 1024 / 1024:.0f} MB"
+            )
+            for stage, info in sorted(usage["stages"].items()):
+                print(f"  {stage:<18}{info['entries']:>6} entries {info['bytes'] / 1024 / 1024:>9.1f} MB")
+        return
+
+    if args.show_graph:
+        print(VideoPipeline(config).build_graph().to_dot())
+        return
+
     if args.preview_voice:
         from pipeline.helpers import preview_voice
 
-        preview = preview_voice(config.voice_engine, args.preview_voice, config.coqui_model_name)
-        color_print("INFO", f"Preview saved to {preview}")
+        preview = preview_voice(
+            config.voice_engine,
+            args.preview_voice,
+            config.coqui_model_name,
+            Path(config.preview_cache_dir),
+        )
+        if preview:
+            color_print("INFO", f"Preview saved to {preview}")
+        return
+
+    if args.prewarm_previews:
+        from pipeline.helpers import prewarm_previews
+
+        if not config.voices:
+            color_print("ERROR", "No voices configured")
+            return
+        results = prewarm_previews(config, workers=config.elevenlabs_concurrency)
+        for name, path in results.items():
+            if path:
+                color_print("INFO", f"{name}: {path}")
+            else:
+                color_print("ERROR", f"{name}: preview failed")
+        ready = sum(1 for p in results.values() if p)
+        color_print("SUCCESS", f"{ready}/{len(results)} voice previews ready")
+        return
+
+    if args.resume:
+        pipeline = VideoPipeline(config, debug=args.debug)
+        try:
+            ctx = pipeline.resume(Path(args.resume))
+        except Exception as exc:
+            color_print("ERROR", f"Resume failed: {exc}")
+            log_trace(exc)
+            return
+        color_print("SUCCESS", "Pipeline resumed successfully")
+        color_print("INFO", f"Final video: {ctx.final_video_path}")
         return
 
     if args.generate:
@@ -147,8 +314,19 @@ def main(argv=None) -> None:
         config.resolution = args.resolution
     if args.no_watermark:
         config.watermark_enabled = False
+    if args.archive:
+        config.archive_mode = args.archive
     output_path = Path(args.output) if args.output else None
 
+    if config.voice_engine == "elevenlabs" and not args.force_coqui:
+        # a typo in a voice id would otherwise cost a failed request per script
+        unknown = config.unknown_voice_ids(
+            block=True, randomize=bool(args.batch and args.randomize)
+        )
+        if unknown:
+            color_print("ERROR", f"Unknown ElevenLabs voice ids: {', '.join(unknown)}")
+            return
+
     log_file = None
     if args.log_to_file:
         log_dir = Path("logs")
@@ -163,33 +341,67 @@ def main(argv=None) -> None:
         if not scripts:
             color_print("ERROR", f"No .txt files found in {folder}")
             return
-        results = []
-        for idx, sp in enumerate(scripts, 1):
-            color_print("INFO", f"[{idx}/{len(scripts)}] Processing {sp.name}")
-            text = sp.read_text()
-            bkg = background
+        items = []
+        for sp in scripts:
+            item = {
+                "text": sp.read_text(),
+                "name": sp.stem,
+                "background": background,
+                "force_coqui": args.force_coqui,
+                "whisper_disable": args.whisper_disable,
+                "no_subtitles": args.no_subtitles,
+            }
             if args.randomize:
                 if config.background_styles:
-                    bkg = random.choice(list(config.background_styles.keys()))
+                    item["background"] = random.choice(list(config.background_styles.keys()))
                 if config.voices:
-                    config.default_voice_id = random.choice(list(config.voices.values()))
-            try:
-                ctx = pipeline.run(
-                    text,
-                    sp.stem,
-                    background=bkg,
-                    force_coqui=args.force_coqui,
-                    whisper_disable=args.whisper_disable,
-                    no_subtitles=args.no_subtitles,
-                )
-                results.append(f"{sp.name}: success -> {ctx.final_video_path}")
-            except Exception as e:
-                color_print("ERROR", f"Failed {sp.name}: {e}")
-                log_trace(e)
-                results.append(f"{sp.name}: failed - {e}")
+                    item["voice_id"] = random.choice(list(config.voices.values()))
+            items.append(item)
+
+        if args.dry_run:
+            from pipeline.planner import Planner, estimate_batch, format_duration
+
+            planner = Planner(config)
+            plans = [
+                planner.plan(item.pop("text"), item.pop("name"), **item) for item in items
+            ]
+            for plan in plans:
+                print(plan.format())
+            total = estimate_batch(plans, args.jobs, config.resource_limits)
+            color_print(
+                "INFO",
+                f"Batch of {len(plans)} scripts: predicted {format_duration(total)} with --jobs {args.jobs}",
+            )
+            return
+
+        from pipeline.batch import run_batch
+
+        results = []
+        outcomes = run_batch(config, items, jobs=args.jobs, debug=args.debug, log_file=log_file)
+        for sp, (ok, detail) in zip(scripts, outcomes):
+            if ok:
+                results.append(f"{sp.name}: success -> {detail}")
+            else:
+                color_print("ERROR", f"Failed {sp.name}: {detail}")
+                results.append(f"{sp.name}: failed - {detail}")
         (folder / "batch_summary.txt").write_text("\n".join(results))
         color_print("SUCCESS", "Batch processing complete")
         return
+    if args.dry_run:
+        from pipeline.planner import Planner
+
+        plan = Planner(config).plan(
+            script_text,
+            name,
+            background=background,
+            output=output_path,
+            force_coqui=args.force_coqui,
+            whisper_disable=args.whisper_disable,
+            no_subtitles=args.no_subtitles,
+        )
+        print(plan.format())
+        return
+
     try:
         ctx = pipeline.run(
             script_text,
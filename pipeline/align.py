@@ -0,0 +1,220 @@
+from __future__ import annotations
+
+"""Word timings from the known script text, without speech recognition.
+
+The voiceover is split into speech regions by its energy envelope. Words
+are assigned to regions so that each region's share of the syllables
+matches its share of the speech time, preferring to break at punctuation,
+and spread over their region by syllable count. No model is loaded; a
+minute of audio aligns in milliseconds. Timings reported by the TTS engine
+(characters from ElevenLabs, sentences from the chunk map) are turned into
+the same word records.
+"""
+
+from difflib import SequenceMatcher
+from pathlib import Path
+import json
+import re
+import statistics
+
+from . import audio
+
+try:
+    import numpy as np
+except Exception:  # pragma: no cover - optional dependency
+    np = None
+
+# extra weight, in seconds, for breaking a region after such a word
+_BREAK_BONUS = {".": 0.3, "!": 0.3, "?": 0.3, ",": 0.15, ";": 0.15, ":": 0.15}
+
+
+def syllables(word: str) -> int:
+    """Estimate the number of syllables spoken for *word*."""
+    letters = re.sub(r"[^a-z]", "", word.lower())
+    if not letters:
+        digits = re.sub(r"\D", "", word)
+        return max(1, len(digits))
+    n = len(re.findall(r"[aeiouy]+", letters))
+    if n > 1 and letters.endswith("e") and not letters.endswith(("le", "ee")):
+        n -= 1
+    return max(1, n)
+
+
+def speech_regions(
+    path: Path,
+    threshold_db: float = -45.0,
+    window_ms: int = 10,
+    min_silence_ms: int = 150,
+    min_speech_ms: int = 60,
+) -> list[tuple[float, float]]:
+    """Return ``(start, end)`` seconds of the speech regions in the WAV at *path*.
+
+    Windows are voiced above *threshold_db* or 35 dB below the loudest
+    window, whichever is higher. Pauses shorter than *min_silence_ms* are
+    bridged and regions shorter than *min_speech_ms* dropped.
+    """
+    pcm, rate = audio.open_pcm(path)
+    win = max(1, rate * window_ms // 1000)
+    power = audio.window_power(pcm, win)
+    if not len(power):
+        return []
+    level = 10 * np.log10(power + 1e-12)
+    voiced = level > max(threshold_db, level.max() - 35)
+    runs = audio._runs(voiced)
+    merged: list[list[int]] = []
+    for start, end in runs:
+        if merged and (start - merged[-1][1]) * window_ms < min_silence_ms:
+            merged[-1][1] = end
+        else:
+            merged.append([start, end])
+    step = win / rate
+    return [
+        (round(start * step, 3), round(end * step, 3))
+        for start, end in merged
+        if (end - start) * window_ms >= min_speech_ms
+    ]
+
+
+def _distribute(words, weights, start: float, end: float) -> list[dict]:
+    total = sum(weights)
+    records, t = [], start
+    for word, weight in zip(words, weights):
+        nxt = t + (end - start) * weight / total
+        records.append({"start": round(t, 3), "end": round(nxt, 3), "text": word})
+        t = nxt
+    return records
+
+
+def align_words(text: str, regions: list[tuple[float, float]]) -> list[dict]:
+    """Return ``{"start", "end", "text"}`` records for the words of *text* over *regions*."""
+    words = text.split()
+    if not words or not regions:
+        return []
+    weights = [syllables(w) for w in words]
+    total_w = sum(weights)
+    lengths = [end - start for start, end in regions]
+    speech = sum(lengths)
+    # cumulative speech time (in seconds) at each word boundary
+    bounds = [0.0]
+    for weight in weights:
+        bounds.append(bounds[-1] + speech * weight / total_w)
+
+    # choose the word boundary closest to each gap, one region per group
+    splits = [0]
+    elapsed = 0.0
+    for k, length in enumerate(lengths[:-1]):
+        elapsed += length
+        lo, hi = splits[-1] + 1, len(words) - 1
+        if lo > hi:
+            break
+        best = min(
+            range(lo, hi + 1),
+            key=lambda j: abs(bounds[j] - elapsed) - _BREAK_BONUS.get(words[j - 1][-1], 0.0),
+        )
+        splits.append(best)
+    splits.append(len(words))
+
+    records = []
+    for k in range(len(splits) - 1):
+        group = slice(splits[k], splits[k + 1])
+        # words left over when there are fewer words than gaps span the rest
+        end = regions[k][1] if k < len(splits) - 2 else regions[-1][1]
+        records.extend(_distribute(words[group], weights[group], regions[k][0], end))
+    return records
+
+
+def words_from_characters(alignment: dict | None) -> list[dict] | None:
+    """Group a TTS engine's character ``alignment`` into word records."""
+    if not alignment or not alignment.get("characters"):
+        return None
+    words: list[dict] = []
+    current = None
+    for ch, start, end in zip(alignment["characters"], alignment["start"], alignment["end"]):
+        if ch.isspace():
+            current = None
+            continue
+        if current is None:
+            current = {"start": round(start, 3), "end": round(end, 3), "text": ch}
+            words.append(current)
+        else:
+            current["end"] = round(end, 3)
+            current["text"] += ch
+    return words
+
+
+def align_chunks(chunks: list[dict], regions: list[tuple[float, float]]) -> list[dict]:
+    """Align the ``text`` of each chunk record to the speech within its ``start``/``end``."""
+    records = []
+    for chunk in chunks:
+        start, end = chunk["start"], chunk["end"]
+        inside = [(max(a, start), min(b, end)) for a, b in regions if b > start and a < end]
+        records.extend(align_words(chunk["text"], inside or [(start, end)]))
+    return records
+
+
+def align(text: str, path: Path, threshold_db: float = -45.0) -> list[dict]:
+    """Return word timings for *text* spoken in the WAV at *path*."""
+    if np is None:
+        raise RuntimeError("numpy is not installed")
+    return align_words(text, speech_regions(path, threshold_db))
+
+
+def _norm(word: str) -> str:
+    return re.sub(r"[^\w']", "", word.lower())
+
+
+def reference_words(segments: list[dict]) -> list[dict]:
+    """Flatten Whisper segments into word records (segments without words are skipped)."""
+    words = []
+    for seg in segments:
+        for w in seg.get("words") or []:
+            words.append({"start": w["start"], "end": w["end"], "text": w.get("word", "")})
+    return words
+
+
+def compare(aligned: list[dict], reference: list[dict]) -> dict:
+    """Return start-time errors of *aligned* words against *reference* words.
+
+    Words are matched by their normalized text in order; unmatched words
+    only count towards ``matched``.
+    """
+    a = [_norm(w["text"]) for w in aligned]
+    b = [_norm(w["text"]) for w in reference]
+    errors = []
+    for block in SequenceMatcher(None, a, b, autojunk=False).get_matching_blocks():
+        for i in range(block.size):
+            got, want = aligned[block.a + i], reference[block.b + i]
+            errors.append(abs(got["start"] - want["start"]) * 1000)
+    if not errors:
+        return {"words": len(reference), "matched": 0}
+    errors.sort()
+    return {
+        "words": len(reference),
+        "matched": len(errors),
+        "mean_ms": round(statistics.fmean(errors), 1),
+        "median_ms": round(statistics.median(errors), 1),
+        "p90_ms": round(errors[int(0.9 * (len(errors) - 1))], 1),
+        "within_100ms": round(sum(e <= 100 for e in errors) / len(errors), 3),
+        "within_250ms": round(sum(e <= 250 for e in errors) / len(errors), 3),
+    }
+
+
+def report_run(run_dir: Path) -> dict | None:
+    """Compare alignment with the Whisper transcript of the finished run in *run_dir*.
+
+    Returns ``None`` when the run lacks a script, audio or word-level transcript.
+    """
+    metadata = run_dir / "metadata.json"
+    transcript = run_dir / "transcript.json"
+    audio_path = run_dir / "voice_raw.wav"
+    if not audio_path.exists():
+        audio_path = run_dir / "voice.wav"
+    try:
+        title = json.loads(metadata.read_text())["title"]
+        script = (run_dir / f"{title}.txt").read_text()
+        reference = reference_words(json.loads(transcript.read_text()))
+    except (OSError, ValueError, KeyError, TypeError, AttributeError):
+        return None
+    if not reference or not audio_path.exists():
+        return None
+    return compare(align(script, audio_path), reference)
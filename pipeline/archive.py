@@ -0,0 +1,66 @@
+from __future__ import annotations
+
+"""Zip archiving of run folders without recompressing media."""
+
+from concurrent.futures import Future, ThreadPoolExecutor
+from fnmatch import fnmatch
+from pathlib import Path
+from typing import Any, Callable, Iterable
+import os
+import zipfile
+
+# Already-compressed formats gain nothing from deflate; store them as-is.
+MEDIA_SUFFIXES = {".mp4", ".webm", ".mkv", ".mov", ".wav", ".mp3", ".m4a", ".png", ".jpg", ".zip"}
+
+# Archiving runs on its own non-daemon thread: run() can return while the
+# zip is written and the interpreter still waits for it before exiting.
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="archive")
+
+
+def _excluded(rel: str, patterns: Iterable[str]) -> bool:
+    name = rel.rsplit("/", 1)[-1]
+    return any(fnmatch(rel, pat) or fnmatch(name, pat) for pat in patterns)
+
+
+def build_archive(
+    folder: Path,
+    dest_zip: Path,
+    exclude: Iterable[str] = (),
+    store_media: bool = True,
+) -> Path:
+    """Zip *folder* into *dest_zip* and return the archive path.
+
+    Files matching a glob in *exclude* (by name or relative path) are left
+    out. With *store_media*, files in :data:`MEDIA_SUFFIXES` are stored
+    without compression. The zip is written to a temporary file and moved
+    into place, so a partial archive is never visible.
+    """
+    folder = Path(folder)
+    if not folder.exists():
+        raise FileNotFoundError(f"Folder not found: {folder}")
+    dest_zip = Path(dest_zip).with_suffix(".zip")
+    patterns = list(exclude)
+    tmp = dest_zip.with_name(f".{dest_zip.name}.{os.getpid()}.tmp")
+    try:
+        with zipfile.ZipFile(tmp, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+            for path in sorted(folder.rglob("*")):
+                if not path.is_file():
+                    continue
+                rel = path.relative_to(folder).as_posix()
+                if _excluded(rel, patterns):
+                    continue
+                stored = store_media and path.suffix.lower() in MEDIA_SUFFIXES
+                zf.write(
+                    path,
+                    rel,
+                    compress_type=zipfile.ZIP_STORED if stored else zipfile.ZIP_DEFLATED,
+                )
+        os.replace(tmp, dest_zip)
+    finally:
+        tmp.unlink(missing_ok=True)
+    return dest_zip
+
+
+def in_background(func: Callable[..., Any], *args, **kwargs) -> Future:
+    """Run *func* on the archive thread and return its future."""
+    return _executor.submit(func, *args, **kwargs)
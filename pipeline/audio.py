@@ -0,0 +1,274 @@
+from __future__ import annotations
+
+"""In-process conditioning of the voiceover WAV with NumPy.
+
+One pass over a memory-mapped ``voice.wav`` computes an RMS envelope, trims
+leading and trailing silence, shortens long internal pauses and normalizes
+loudness; the result is written once. :func:`time_stretch` changes the speech
+rate without changing pitch. The removed sample ranges and the rate are
+reported so timings measured on the original audio can be mapped instead of
+recomputed.
+"""
+
+from dataclasses import dataclass, field
+from pathlib import Path
+import json
+import os
+import struct
+import wave
+
+try:
+    import numpy as np
+except Exception:  # pragma: no cover - optional dependency
+    np = None
+
+# frames converted to float per block when writing
+_BLOCK = 1 << 18
+
+
+@dataclass
+class Conditioning:
+    sample_rate: int
+    original_samples: int
+    removed: list[tuple[int, int]] = field(default_factory=list)  # [start, end) in the original
+    gain_db: float = 0.0
+    speech_rate: float = 1.0
+
+    @classmethod
+    def load(cls, path: Path) -> "Conditioning":
+        data = json.loads(path.read_text())
+        return cls(
+            data["sample_rate"],
+            data["original_samples"],
+            [tuple(r) for r in data.get("removed", [])],
+            data.get("gain_db", 0.0),
+            data.get("speech_rate", 1.0),
+        )
+
+    @property
+    def samples(self) -> int:
+        kept = self.original_samples - sum(end - start for start, end in self.removed)
+        return int(round(kept / self.speech_rate))
+
+    def shift(self, seconds: float) -> float:
+        """Map a time in the original audio to the conditioned audio.
+
+        Times inside a removed range map to where that range was cut; the
+        result is then scaled by the speech rate.
+        """
+        sample = seconds * self.sample_rate
+        offset = 0
+        for start, end in self.removed:
+            if sample < start:
+                break
+            offset += min(sample, end) - start
+        return round((sample - offset) / self.speech_rate / self.sample_rate, 3)
+
+    def shift_records(self, records: list[dict]) -> list[dict]:
+        """Return *records* with their ``start``/``end`` times shifted."""
+        return [
+            {**r, **{k: self.shift(r[k]) for k in ("start", "end") if k in r}} for r in records
+        ]
+
+    def to_dict(self) -> dict:
+        return {
+            "sample_rate": self.sample_rate,
+            "original_samples": self.original_samples,
+            "samples": self.samples,
+            "removed": [list(r) for r in self.removed],
+            "gain_db": round(self.gain_db, 2),
+            "speech_rate": self.speech_rate,
+        }
+
+    def save(self, path: Path) -> None:
+        path.write_text(json.dumps(self.to_dict(), indent=2))
+
+
+def available() -> bool:
+    return np is not None
+
+
+def _data_offset(path: Path) -> int:
+    """Return the byte offset of the ``data`` chunk of a RIFF/WAVE file."""
+    with open(path, "rb") as f:
+        header = f.read(12)
+        if header[:4] != b"RIFF" or header[8:12] != b"WAVE":
+            raise ValueError(f"{path} is not a WAV file")
+        while True:
+            chunk = f.read(8)
+            if len(chunk) < 8:
+                raise ValueError(f"{path} has no data chunk")
+            name, size = chunk[:4], struct.unpack("<I", chunk[4:])[0]
+            if name == b"data":
+                return f.tell()
+            f.seek(size + size % 2, os.SEEK_CUR)
+
+
+def _runs(mask) -> list[tuple[int, int]]:
+    """Return ``[start, end)`` index ranges where *mask* is true."""
+    edges = np.diff(np.concatenate(([0], mask.astype(np.int8), [0])))
+    return list(zip(np.flatnonzero(edges == 1).tolist(), np.flatnonzero(edges == -1).tolist()))
+
+
+def open_pcm(path: Path):
+    """Return ``(pcm, sample_rate)`` for a 16-bit PCM WAV, *pcm* memory-mapped as (frames, channels)."""
+    if np is None:
+        raise RuntimeError("numpy is not installed")
+    with wave.open(str(path), "rb") as wf:
+        channels, width, rate, frames = (
+            wf.getnchannels(),
+            wf.getsampwidth(),
+            wf.getframerate(),
+            wf.getnframes(),
+        )
+    if width != 2:
+        raise ValueError(f"{path} is {8 * width}-bit; only 16-bit PCM is supported")
+    if frames == 0:
+        return np.zeros((0, channels), dtype="<i2"), rate
+    pcm = np.memmap(
+        path, dtype="<i2", mode="r", offset=_data_offset(path), shape=(frames, channels)
+    )
+    return pcm, rate
+
+
+def window_power(pcm, win: int):
+    """Return the mean power of each full *win*-frame window of *pcm* (full scale = 1)."""
+    n_win = len(pcm) // win
+    power = np.empty(n_win, dtype=np.float64)
+    step = _BLOCK // win or 1
+    for i in range(0, n_win, step):
+        j = min(n_win, i + step)
+        block = pcm[i * win : j * win].astype(np.float32) / 32768.0
+        power[i:j] = (block**2).mean(axis=1).reshape(j - i, win).mean(axis=1)
+    return power
+
+
+def condition_wav(
+    path: Path,
+    threshold_db: float = -45.0,
+    max_pause_ms: int = 0,
+    target_dbfs: float | None = -16.0,
+    window_ms: int = 10,
+    pad_ms: int = 50,
+) -> Conditioning:
+    """Condition the 16-bit PCM WAV at *path* in place.
+
+    Windows of *window_ms* whose RMS is below *threshold_db* (dBFS) count as
+    silence. Leading and trailing silence is trimmed to *pad_ms*, internal
+    pauses longer than *max_pause_ms* (0: keep all) are shortened to it, and
+    the RMS of the voiced windows is brought to *target_dbfs* without
+    clipping (``None``: no gain).
+    """
+    pcm, rate = open_pcm(path)
+    frames, channels = pcm.shape
+    report = Conditioning(rate, frames)
+    if frames == 0:
+        return report
+
+    win = max(1, rate * window_ms // 1000)
+    n_win = frames // win
+    power = window_power(pcm, win)
+    voiced = 10 * np.log10(power + 1e-12) > threshold_db
+    if not voiced.any():
+        return report
+
+    pad = rate * pad_ms // 1000
+    first = int(np.argmax(voiced))
+    last = n_win - int(np.argmax(voiced[::-1]))
+    keep_start = max(0, first * win - pad)
+    keep_end = frames if last == n_win else min(frames, last * win + pad)
+    removed = [(0, keep_start)] if keep_start else []
+    if max_pause_ms > 0:
+        max_pause = max(1, max_pause_ms * rate // 1000 // win)
+        for start, end in _runs(~voiced[first:last]):
+            if end - start > max_pause:
+                # keep half of the allowed pause on each side of the cut
+                cut_start = (first + start + max_pause // 2) * win
+                cut_end = (first + end - (max_pause - max_pause // 2)) * win
+                removed.append((cut_start, cut_end))
+    if keep_end < frames:
+        removed.append((keep_end, frames))
+    report.removed = [(a, b) for a, b in removed if b > a]
+
+    kept, cursor = [], 0
+    for start, end in report.removed:
+        if start > cursor:
+            kept.append((cursor, start))
+        cursor = end
+    if cursor < frames:
+        kept.append((cursor, frames))
+
+    gain = 1.0
+    if target_dbfs is not None:
+        rms_db = 10 * np.log10(power[voiced].mean() + 1e-12)
+        peak = max(int(np.abs(pcm[a:b].astype(np.int32)).max()) for a, b in kept) / 32768.0
+        headroom_db = -20 * np.log10(max(peak, 1e-6)) - 1.0
+        report.gain_db = min(target_dbfs - rms_db, headroom_db)
+        gain = 10 ** (report.gain_db / 20)
+
+    if not report.removed and gain == 1.0:
+        return report
+    tmp = path.with_name(f".{path.stem}_conditioned.wav")
+    try:
+        with wave.open(str(tmp), "wb") as out:
+            out.setnchannels(channels)
+            out.setsampwidth(2)
+            out.setframerate(rate)
+            for a, b in kept:
+                for i in range(a, b, _BLOCK):
+                    block = pcm[i : min(b, i + _BLOCK)]
+                    if gain != 1.0:
+                        block = np.clip(block.astype(np.float32) * gain, -32768, 32767)
+                    out.writeframesraw(block.astype("<i2").tobytes())
+        del pcm  # release the map before replacing the file under it
+        os.replace(tmp, path)
+    finally:
+        tmp.unlink(missing_ok=True)
+    return report
+
+
+def time_stretch(path: Path, rate: float, frame_ms: int = 40, tolerance_ms: int = 10) -> None:
+    """Speed the 16-bit PCM WAV at *path* up by *rate* in place, keeping pitch.
+
+    Uses WSOLA: Hann-windowed frames taken every ``hop * rate`` input samples
+    are overlap-added every ``hop`` output samples, each frame shifted by up
+    to *tolerance_ms* to best continue the previous one.
+    """
+    pcm, sr = open_pcm(path)
+    frames, channels = pcm.shape
+    if frames == 0 or rate == 1.0:
+        return
+    n = max(2, sr * frame_ms // 1000) // 2 * 2
+    hop = n // 2
+    tol = sr * tolerance_ms // 1000
+    x = np.zeros((frames + 2 * tol + 2 * n, channels), dtype=np.float32)
+    x[tol : tol + frames] = pcm
+    del pcm
+    mono = x.mean(axis=1)
+    window = np.hanning(n + 1)[:-1].astype(np.float32)[:, None]  # periodic: sums to 1 at 50%
+    length = int(round(frames / rate))
+    steps = int((frames - hop) / (hop * rate)) + 1 if frames > hop else 1
+    out = np.zeros((steps * hop + n, channels), dtype=np.float32)
+    delta = 0
+    for k in range(steps):
+        start = tol + int(k * hop * rate) + delta
+        out[k * hop : k * hop + n] += x[start : start + n] * window
+        # pick the next frame that best continues the one just placed
+        template = mono[start + hop : start + hop + n]
+        nominal = tol + int((k + 1) * hop * rate)
+        region = mono[nominal - tol : nominal + tol + n]
+        if len(region) < n + 2 * tol or not template.any():
+            delta = 0
+            continue
+        delta = int(np.argmax(np.correlate(region, template, mode="valid"))) - tol
+    stretched = np.clip(out[:length], -32768, 32767).astype("<i2")
+    tmp = path.with_name(f".{path.stem}_stretched.wav")
+    try:
+        with wave.open(str(tmp), "wb") as wf:
+            wf.setnchannels(channels)
+            wf.setsampwidth(2)
+            wf.setframerate(sr)
+            wf.writeframes(stretched.tobytes())
+        os.replace(tmp, path)
+    finally:
+        tmp.unlink(missing_ok=True)
@@ -0,0 +1,105 @@
+from __future__ import annotations
+
+"""Batch processing of many scripts, optionally across a process pool."""
+
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+import copy
+
+from . import breaker, ratelimit, resources
+from .config import Config
+from .helpers import color_print, log_trace
+from .pipeline import VideoPipeline
+
+
+def run_item(
+    config: Config,
+    item: dict,
+    debug: bool = False,
+    log_file: Path | None = None,
+) -> tuple[bool, str]:
+    """Run one batch *item* and return ``(ok, output or error)``.
+
+    *item* holds ``text`` and ``name`` plus the keyword arguments of
+    :meth:`VideoPipeline.run` and an optional ``voice_id``.
+    """
+    config = copy.deepcopy(config)
+    # hedging doubles the TTS load; batches trade latency for throughput
+    config.voice_hedge_after_s = 0.0
+    item = dict(item)
+    voice_id = item.pop("voice_id", None)
+    if voice_id:
+        config.default_voice_id = voice_id
+    text, name = item.pop("text"), item.pop("name")
+    try:
+        ctx = VideoPipeline(config, debug=debug, log_file=log_file).run(text, name, **item)
+    except Exception as e:
+        log_trace(e)
+        return False, str(e)
+    return True, str(ctx.final_video_path)
+
+
+def _init_worker(
+    limits: dict, bucket: ratelimit.TokenBucket, circuit: breaker.CircuitBreaker
+) -> None:
+    resources.install(limits)
+    ratelimit.install(bucket)
+    breaker.install(circuit)
+
+
+def run_batch(
+    config: Config,
+    items: list[dict],
+    jobs: int = 1,
+    debug: bool = False,
+    log_file: Path | None = None,
+) -> list[tuple[bool, str]]:
+    """Run *items* and return their results in input order.
+
+    With *jobs* > 1 the items run in a process pool. ElevenLabs requests,
+    Coqui/Whisper inference and ffmpeg encodes are each limited by
+    ``config.resource_limits`` across all workers, so stages of different
+    scripts overlap without oversubscribing any one resource, and all workers
+    share one ElevenLabs rate-limit bucket and circuit breaker. A failing
+    item never stops the others.
+    """
+    total = len(items)
+    if jobs <= 1:
+        results = []
+        for idx, item in enumerate(items, 1):
+            color_print("INFO", f"[{idx}/{total}] Processing {item['name']}")
+            results.append(run_item(config, item, debug, log_file))
+        return results
+
+    limits = resources.create_limits(config.resource_limits)
+    bucket = ratelimit.TokenBucket(
+        config.elevenlabs_requests_per_s, config.elevenlabs_chars_per_min
+    )
+    circuit = breaker.CircuitBreaker(
+        "elevenlabs", config.elevenlabs_breaker_failures, config.elevenlabs_breaker_cooldown_s
+    )
+    results: list[tuple[bool, str] | None] = [None] * total
+    with ProcessPoolExecutor(
+        max_workers=jobs, initializer=_init_worker, initargs=(limits, bucket, circuit)
+    ) as pool:
+        futures = [pool.submit(run_item, config, item, debug, log_file) for item in items]
+        for idx, (item, fut) in enumerate(zip(items, futures)):
+            try:
+                results[idx] = fut.result()
+            except Exception as e:  # worker crashed
+                log_trace(e)
+                results[idx] = (False, f"worker crashed: {e}")
+            ok = results[idx][0]
+            color_print(
+                "INFO" if ok else "ERROR",
+                f"[{idx + 1}/{total}] {item['name']} {'done' if ok else 'failed'}",
+            )
+    quota = bucket.stats()
+    color_print(
+        "INFO",
+        f"ElevenLabs: {quota['requests']} requests, {quota['chars']} chars, "
+        f"{quota['throttled']} throttled, {quota['retries']} retries, "
+        f"max queue depth {quota['max_queue_depth']}, waited {quota['wait_s']:.1f}s, "
+        f"circuit opened {circuit.stats()['opens']} times",
+    )
+    return results
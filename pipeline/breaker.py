@@ -0,0 +1,118 @@
+from __future__ import annotations
+
+"""Circuit breaker for the ElevenLabs-to-Coqui fallback.
+
+After ``threshold`` consecutive failures the breaker opens and ElevenLabs is
+skipped for ``cooldown_s`` seconds; then a single probe request is let
+through, whose outcome closes or re-opens it. State lives in shared memory
+and is installed like :mod:`pipeline.ratelimit`, so all batch workers see
+the same breaker.
+"""
+
+import multiprocessing
+import time
+
+from .logger import setup_logger
+
+CLOSED, OPEN, HALF_OPEN = 0, 1, 2
+STATE_NAMES = {CLOSED: "closed", OPEN: "open", HALF_OPEN: "half_open"}
+
+# indices into the shared state array
+_STATE, _FAILURES, _OPENED_AT, _PROBE_AT, _OPENS, _SHORT_CIRCUITS = range(6)
+_FIELDS = 6
+
+
+class CircuitBreaker:
+    def __init__(
+        self, name: str, threshold: int = 3, cooldown_s: float = 120.0, mp_context=None
+    ):
+        mp_context = mp_context or multiprocessing.get_context()
+        self.name = name
+        self.threshold = max(1, threshold)
+        self.cooldown_s = max(0.0, cooldown_s)
+        self.logger = setup_logger("breaker")
+        self._state = mp_context.Array("d", [0.0] * _FIELDS)
+
+    @property
+    def state(self) -> str:
+        return STATE_NAMES[int(self._state[_STATE])]
+
+    def _transition(self, new: int, reason: str) -> None:
+        old = int(self._state[_STATE])
+        self._state[_STATE] = new
+        if new == OPEN:
+            self._state[_OPENED_AT] = time.time()
+            self._state[_OPENS] += 1
+        self.logger.warning(
+            f"{self.name} circuit {STATE_NAMES[old]} -> {STATE_NAMES[new]} ({reason})"
+        )
+
+    def allow(self) -> bool:
+        """Return whether a request may be sent now.
+
+        Once the cooldown has passed, the first caller becomes the probe; a
+        probe that never reports back is replaced after another cooldown.
+        """
+        s = self._state
+        with s.get_lock():
+            state = int(s[_STATE])
+            now = time.time()
+            if state == CLOSED:
+                return True
+            if state == OPEN and now - s[_OPENED_AT] >= self.cooldown_s:
+                self._transition(HALF_OPEN, f"cooldown of {self.cooldown_s:.0f}s elapsed")
+                s[_PROBE_AT] = now
+                return True
+            if state == HALF_OPEN and now - s[_PROBE_AT] >= self.cooldown_s:
+                s[_PROBE_AT] = now
+                return True
+            s[_SHORT_CIRCUITS] += 1
+            return False
+
+    def success(self) -> None:
+        s = self._state
+        with s.get_lock():
+            s[_FAILURES] = 0
+            if int(s[_STATE]) != CLOSED:
+                self._transition(CLOSED, "probe succeeded")
+
+    def failure(self) -> None:
+        s = self._state
+        with s.get_lock():
+            s[_FAILURES] += 1
+            state = int(s[_STATE])
+            if state == HALF_OPEN:
+                self._transition(OPEN, "probe failed")
+            elif state == CLOSED and s[_FAILURES] >= self.threshold:
+                self._transition(OPEN, f"{int(s[_FAILURES])} consecutive failures")
+
+    def stats(self) -> dict:
+        s = self._state
+        with s.get_lock():
+            return {
+                "state": STATE_NAMES[int(s[_STATE])],
+                "consecutive_failures": int(s[_FAILURES]),
+                "opens": int(s[_OPENS]),
+                "short_circuits": int(s[_SHORT_CIRCUITS]),
+            }
+
+
+_breaker: CircuitBreaker | None = None
+
+
+def install(breaker: CircuitBreaker | None) -> None:
+    """Use *breaker* in this process (the batch pool initializer)."""
+    global _breaker
+    _breaker = breaker
+
+
+def configure(threshold: int, cooldown_s: float) -> CircuitBreaker:
+    """Return the installed breaker, creating a process-local one if needed."""
+    global _breaker
+    if _breaker is None:
+        _breaker = CircuitBreaker("elevenlabs", threshold, cooldown_s)
+    return _breaker
+
+
+def breaker() -> CircuitBreaker | None:
+    return _breaker
@@ -0,0 +1,217 @@
+from __future__ import annotations
+
+"""Content-addressed artifact cache for pipeline stages."""
+
+from pathlib import Path
+from typing import Any, Iterable
+import hashlib
+import json
+import os
+import shutil
+
+from .logger import setup_logger
+
+
+def file_digest(path: Path, chunk_size: int = 1 << 20) -> str:
+    """Return the sha256 hex digest of the contents of *path*."""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def cache_key(stage: str, **inputs: Any) -> str:
+    """Return a stable key for *stage* computed from its *inputs*."""
+    payload = json.dumps({"stage": stage, **inputs}, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def copy_atomic(src: Path, dest: Path) -> None:
+    """Copy *src* to *dest* through a temporary file in the same folder."""
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    tmp = dest.with_name(f".{dest.name}.{os.getpid()}.tmp")
+    try:
+        shutil.copy2(src, tmp)
+        os.replace(tmp, dest)
+    finally:
+        tmp.unlink(missing_ok=True)
+
+
+class StageCache:
+    """Persistent LRU cache of stage artifacts keyed by their inputs.
+
+    Every entry is a folder ``<root>/<key[:2]>/<key>`` holding one artifact
+    named after its stage (``voiceover.wav``, ``render.mp4`` ...). The folder
+    mtime is refreshed on every hit and used for eviction, so several
+    processes can share one cache without a central index.
+    """
+
+    def __init__(
+        self,
+        root: Path,
+        max_bytes: int = 2 * 1024**3,
+        enabled: bool = True,
+        log_file: Path | None = None,
+        debug: bool = False,
+    ):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self.enabled = enabled
+        self.logger = setup_logger("cache", log_file, debug)
+        self.stats: dict[str, dict[str, int]] = {}
+
+    def _entry(self, key: str) -> Path:
+        return self.root / key[:2] / key
+
+    def _artifact(self, stage: str, key: str, suffix: str) -> Path:
+        return self._entry(key) / f"{stage}{suffix}"
+
+    def _count(self, stage: str, field: str, n: int = 1) -> None:
+        # no lock: stages are forked into worker processes, and each stage
+        # name is only ever counted from one thread at a time
+        counters = self.stats.setdefault(stage, {"hits": 0, "misses": 0})
+        counters[field] += n
+
+    def reset_stats(self) -> None:
+        self.stats = {}
+
+    def merge_stats(self, stats: dict[str, dict[str, int]]) -> None:
+        """Add counters collected elsewhere, e.g. in a stage worker process."""
+        for stage, counters in stats.items():
+            for field, value in counters.items():
+                self._count(stage, field, value)
+
+    def contains(self, stage: str, key: str, suffix: str) -> bool:
+        return self.lookup(stage, key, suffix) is not None
+
+    def lookup(self, stage: str, key: str, suffix: str) -> Path | None:
+        """Return the cached artifact for *key* without touching stats or LRU order."""
+        if not self.enabled:
+            return None
+        path = self._artifact(stage, key, suffix)
+        return path if path.is_file() and path.stat().st_size > 0 else None
+
+    def use(self, stage: str, key: str, suffix: str) -> Path | None:
+        """Return the cached artifact for *key* to be read in place, counting the lookup."""
+        if not self.enabled:
+            return None
+        path = self.lookup(stage, key, suffix)
+        if path is None:
+            self._count(stage, "misses")
+            return None
+        try:
+            os.utime(self._entry(key))
+        except OSError:
+            pass
+        self._count(stage, "hits")
+        return path
+
+    def fetch(self, stage: str, key: str, dest: Path) -> bool:
+        """Copy the artifact for *key* to *dest*. Returns True on a hit.
+
+        The run folder always gets its own copy: stages rewrite their outputs
+        in place, which would otherwise change the cached artifact too.
+        """
+        if not self.enabled:
+            return False
+        entry = self._entry(key)
+        src = self._artifact(stage, key, dest.suffix)
+        if not src.is_file() or src.stat().st_size == 0:
+            self._count(stage, "misses")
+            return False
+        try:
+            copy_atomic(src, dest)
+            os.utime(entry)
+        except OSError as e:
+            self.logger.warning(f"Cache fetch failed for {stage}: {e}")
+            self._count(stage, "misses")
+            return False
+        self._count(stage, "hits")
+        self.logger.debug(f"Cache hit for {stage} ({key[:12]})")
+        return True
+
+    def store(self, stage: str, key: str, src: Path, evict: bool = True) -> None:
+        """Copy *src* into the cache under *key* and enforce the size cap.
+
+        Pass ``evict=False`` when storing many artifacts in a row and call
+        :meth:`evict` once afterwards.
+        """
+        if not self.enabled or not src.is_file() or src.stat().st_size == 0:
+            return
+        artifact = self._artifact(stage, key, src.suffix)
+        artifact.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            copy_atomic(src, artifact)
+        except OSError as e:
+            self.logger.warning(f"Cache store failed for {stage}: {e}")
+            return
+        self.logger.debug(f"Cached {stage} artifact ({key[:12]})")
+        if evict:
+            self.evict()
+
+    def entries(self) -> list[tuple[Path, float, int]]:
+        """Return ``(folder, last_used, size)`` for every cache entry."""
+        result = []
+        if not self.root.exists():
+            return result
+        for bucket in self.root.iterdir():
+            # only <key[:2]> buckets; other folders (e.g. a nested cache) are not ours
+            if not bucket.is_dir() or len(bucket.name) != 2:
+                continue
+            for entry in bucket.iterdir():
+                if not entry.is_dir():
+                    continue
+                try:
+                    size = sum(p.stat().st_size for p in entry.iterdir() if p.is_file())
+                    result.append((entry, entry.stat().st_mtime, size))
+                except OSError:
+                    continue
+        return result
+
+    def evict(self, max_bytes: int | None = None) -> int:
+        """Drop least recently used entries until under *max_bytes*.
+
+        Returns the number of entries removed.
+        """
+        limit = self.max_bytes if max_bytes is None else max_bytes
+        entries = sorted(self.entries(), key=lambda e: e[1])
+        total = sum(size for _, _, size in entries)
+        removed = 0
+        for entry, _, size in entries:
+            if total <= limit:
+                break
+            shutil.rmtree(entry, ignore_errors=True)
+            total -= size
+            removed += 1
+        if removed:
+            self.logger.info(f"Evicted {removed} cache entries")
+        return removed
+
+    def usage(self) -> dict:
+        """Return on-disk entry counts and bytes per stage plus the totals."""
+        stages: dict[str, dict[str, int]] = {}
+        entries = self.entries()
+        for entry, _, _ in entries:
+            for artifact in entry.iterdir():
+                if artifact.is_file() and not artifact.name.startswith("."):
+                    usage = stages.setdefault(artifact.stem, {"entries": 0, "bytes": 0})
+                    usage["entries"] += 1
+                    usage["bytes"] += artifact.stat().st_size
+        return {
+            "root": self.root.as_posix(),
+            "entries": len(entries),
+            "bytes": sum(size for _, _, size in entries),
+            "max_bytes": self.max_bytes,
+            "oldest": min((t for _, t, _ in entries), default=None),
+            "stages": stages,
+        }
+
+
+def path_inputs(paths: Iterable[Path]) -> dict[str, str]:
+    """Return a cheap identity (size and mtime) for large input files."""
+    ident = {}
+    for p in paths:
+        st = p.stat()
+        ident[p.as_posix()] = f"{st.st_size}:{int(st.st_mtime)}"
+    return ident
@@ -0,0 +1,119 @@
+from __future__ import annotations
+
+"""Splitting scripts into synthesis chunks and stitching the audio back."""
+
+from dataclasses import asdict, dataclass
+from pathlib import Path
+import json
+import re
+import unicodedata
+import wave
+
+# sentence end: terminal punctuation, optionally a closing quote/bracket, space
+_SENTENCE_END = re.compile(r"(?:(?<=[.!?…])|(?<=[.!?…][\"'”’)\]]))\s+")
+_PARAGRAPH = re.compile(r"\n\s*\n")
+
+
+@dataclass
+class Chunk:
+    index: int
+    text: str
+    paragraph_start: bool = False  # first chunk of a paragraph
+
+
+def _split_long(sentence: str, max_chars: int) -> list[str]:
+    """Split an over-long sentence at commas, then at spaces."""
+    parts: list[str] = []
+    current = ""
+    for piece in re.split(r"(?<=[,;:])\s+|\s+", sentence):
+        if current and len(current) + 1 + len(piece) > max_chars:
+            parts.append(current)
+            current = piece
+        else:
+            current = f"{current} {piece}" if current else piece
+    if current:
+        parts.append(current)
+    return parts
+
+
+def normalize_text(text: str) -> str:
+    """Return *text* with unicode forms and whitespace normalized (cache keys)."""
+    return " ".join(unicodedata.normalize("NFKC", text).split())
+
+
+def split_script(text: str, max_chars: int = 400, per_sentence: bool = False) -> list[Chunk]:
+    """Split *text* into chunks of whole sentences up to *max_chars* long.
+
+    Chunks never span a paragraph break; a single sentence longer than
+    *max_chars* is split at commas or spaces. With *per_sentence* every
+    sentence becomes its own chunk.
+    """
+    chunks: list[Chunk] = []
+    for paragraph in _PARAGRAPH.split(text.strip()):
+        paragraph = " ".join(paragraph.split())
+        if not paragraph:
+            continue
+        first = True
+        current = ""
+        sentences = [s.strip() for s in _SENTENCE_END.split(paragraph) if s.strip()]
+        for sentence in sentences:
+            pieces = [sentence] if len(sentence) <= max_chars else _split_long(sentence, max_chars)
+            for piece in pieces:
+                if current and (per_sentence or len(current) + 1 + len(piece) > max_chars):
+                    chunks.append(Chunk(len(chunks), current, first))
+                    first = False
+                    current = piece
+                else:
+                    current = f"{current} {piece}" if current else piece
+        if current:
+            chunks.append(Chunk(len(chunks), current, first))
+    return chunks
+
+
+def stitch_wavs(
+    chunks: list[Chunk],
+    paths: list[Path],
+    output_path: Path,
+    silence_ms: int = 250,
+    paragraph_silence_ms: int = 600,
+) -> list[dict]:
+    """Concatenate the WAV files at *paths* into *output_path*.
+
+    Silence is inserted between chunks, longer before a new paragraph. All
+    inputs must share channels, sample width and rate. Returns one record
+    per chunk with its ``start`` and ``end`` time in seconds.
+    """
+    boundaries = []
+    params = None
+    position = 0  # frames written so far
+    with wave.open(str(output_path), "wb") as out:
+        for chunk, path in zip(chunks, paths):
+            with wave.open(str(path), "rb") as wf:
+                current = (wf.getnchannels(), wf.getsampwidth(), wf.getframerate())
+                if params is None:
+                    params = current
+                    out.setnchannels(current[0])
+                    out.setsampwidth(current[1])
+                    out.setframerate(current[2])
+                elif current != params:
+                    raise ValueError(f"{path} has format {current}, expected {params}")
+                if position:
+                    gap = paragraph_silence_ms if chunk.paragraph_start else silence_ms
+                    frames = int(params[2] * gap / 1000)
+                    out.writeframes(b"\x00" * frames * params[0] * params[1])
+                    position += frames
+                n = wf.getnframes()
+                out.writeframes(wf.readframes(n))
+            boundaries.append(
+                {
+                    **asdict(chunk),
+                    "start": round(position / params[2], 3),
+                    "end": round((position + n) / params[2], 3),
+                }
+            )
+            position += n
+    return boundaries
+
+
+def write_chunk_map(path: Path, boundaries: list[dict]) -> None:
+    path.write_text(json.dumps(boundaries, indent=2))
@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+from dataclasses import dataclass, fields
 from pathlib import Path
 import json
 import shutil
@@ -18,10 +18,29 @@ class Config:
     default_voice_id: str | None = None
     coqui_model_name: str = "tts_models/en/ljspeech/tacotron2-DDC"
     whisper_model: str | None = "base"
+    subtitle_timing: str = "whisper"
+    engine_timings: bool = True
+    chunk_timings: bool = False
+    coqui_memory_mb: int = 4096
+    whisper_memory_mb: int = 0
+    model_min_free_mb: int = 1024
+    voice_chunk_chars: int = 400
+    voice_workers: int = 0
+    elevenlabs_concurrency: int = 3
+    elevenlabs_requests_per_s: float = 2.0
+    elevenlabs_chars_per_min: int = 0
+    elevenlabs_retries: int = 4
+    elevenlabs_breaker_failures: int = 3
+    elevenlabs_breaker_cooldown_s: float = 120.0
+    voice_hedge_after_s: float = 0.0
+    voice_hedge_grace_s: float = 0.5
+    chunk_silence_ms: int = 250
+    paragraph_silence_ms: int = 600
     background_videos_path: str = "assets/backgrounds"
     resolution: str = "1080x1920"
     ffmpeg_path: str = "ffmpeg"
     step_timeout: int = 120
+    stage_isolation: str = "process"
     safe_mode: bool = False
     developer_mode: bool = False
     voices: dict[str, str] | None = None
@@ -30,6 +49,29 @@ class Config:
     presets: dict[str, dict] | None = None
     default_preset: str = "default"
     auto_trim_silence: bool = False
+    silence_threshold_db: float = -45.0
+    max_pause_ms: int = 0
+    loudness_target_dbfs: float | None = -16.0
+    speech_rate: float = 1.0
+    music_enabled: bool = False
+    music_path: str = "assets/music"
+    music_volume_db: float = -20.0
+    music_duck_db: float = -12.0
+    cache_enabled: bool = True
+    cache_dir: str = "cache"
+    cache_max_mb: int = 2048
+    tts_cache_enabled: bool = True
+    tts_cache_dir: str = "cache/tts"
+    tts_cache_max_mb: int = 1024
+    tts_cache_sentences: bool = False
+    preview_cache_dir: str = "cache/previews"
+    voice_catalog_path: str = "cache/voices.json"
+    voice_catalog_ttl_s: int = 86400
+    prescale_backgrounds: bool = False
+    resource_limits: dict[str, int] | None = None
+    archive_mode: str = "background"
+    archive_exclude: list[str] | None = None
+    archive_store_media: bool = True
     crop_safe_zone: bool = False
     summary_overlay: bool = False
     theme: str = "dark"
@@ -43,6 +85,12 @@ class Config:
         data = json.loads(path.read_text())
         return cls(**data)
 
+    @classmethod
+    def from_dict(cls, data: dict) -> "Config":
+        """Build a config from *data*, ignoring keys this version does not know."""
+        known = {f.name for f in fields(cls)}
+        return cls(**{k: v for k, v in data.items() if k in known})
+
     def save(self, path: Path) -> None:
         path.parent.mkdir(parents=True, exist_ok=True)
         with open(path, "w") as f:
@@ -65,6 +113,50 @@ class Config:
             logger.warning("step_timeout must be > 0; using 120")
             self.step_timeout = 120
 
+        if self.stage_isolation not in {"process", "thread"}:
+            logger.warning("stage_isolation must be 'process' or 'thread'; using 'process'")
+            self.stage_isolation = "process"
+
+        if self.archive_mode not in {"background", "sync", "off"}:
+            logger.warning("archive_mode must be 'background', 'sync' or 'off'; using 'background'")
+            self.archive_mode = "background"
+
+        if self.cache_max_mb <= 0:
+            logger.warning("cache_max_mb must be > 0; disabling stage cache")
+            self.cache_enabled = False
+
+        if self.tts_cache_max_mb <= 0:
+            logger.warning("tts_cache_max_mb must be > 0; disabling TTS cache")
+            self.tts_cache_enabled = False
+
+        if self.coqui_memory_mb < 0:
+            logger.warning("coqui_memory_mb must be >= 0; using 0 (no limit)")
+            self.coqui_memory_mb = 0
+
+        if self.whisper_memory_mb < 0:
+            logger.warning("whisper_memory_mb must be >= 0; using 0 (no limit)")
+            self.whisper_memory_mb = 0
+
+        if self.model_min_free_mb < 0:
+            logger.warning("model_min_free_mb must be >= 0; using 0 (never unload)")
+            self.model_min_free_mb = 0
+
+        if self.elevenlabs_requests_per_s <= 0:
+            logger.warning("elevenlabs_requests_per_s must be > 0; using 2")
+            self.elevenlabs_requests_per_s = 2.0
+
+        if not 0.5 <= self.speech_rate <= 2.0:
+            logger.warning("speech_rate must be between 0.5 and 2.0; using 1.0")
+            self.speech_rate = 1.0
+
+        if self.voice_chunk_chars < 0:
+            logger.warning("voice_chunk_chars must be >= 0; disabling chunking")
+            self.voice_chunk_chars = 0
+
+        if self.subtitle_timing not in {"whisper", "align"}:
+            logger.warning("subtitle_timing must be 'whisper' or 'align'; using 'whisper'")
+            self.subtitle_timing = "whisper"
+
         if not self.whisper_model:
             logger.error("Whisper configuration missing 'model'")
 
@@ -73,11 +165,34 @@ class Config:
             vid = self.default_voice_id or os.getenv("ELEVENLABS_VOICE_ID")
             if not api or not vid:
                 logger.error("ElevenLabs configuration missing api_key or voice_id")
+            unknown = self.unknown_voice_ids()
+            if unknown:
+                logger.error(f"Voice ids not in the ElevenLabs catalog: {', '.join(unknown)}")
 
         if self.theme not in {"dark", "light"}:
             logger.warning("Invalid theme; defaulting to 'dark'")
             self.theme = "dark"
 
+    def voice_catalog(self):
+        from .voices import VoiceCatalog
+
+        return VoiceCatalog(Path(self.voice_catalog_path), self.voice_catalog_ttl_s)
+
+    def unknown_voice_ids(
+        self, extra=(), block: bool = False, randomize: bool = False
+    ) -> list[str]:
+        """Return the voice ids a run would use that the cached catalog lacks.
+
+        That is the default voice and *extra*, plus every ``voices`` entry
+        when *randomize* picks among them. Only the local catalog is
+        consulted unless *block* allows fetching a missing one; without a
+        catalog nothing is reported.
+        """
+        ids = [self.default_voice_id or os.getenv("ELEVENLABS_VOICE_ID"), *extra]
+        if randomize:
+            ids += list((self.voices or {}).values())
+        return self.voice_catalog().unknown(ids, block=block)
+
     def apply_preset(self, name: str) -> tuple[str | None, bool]:
         """Apply *name* preset. Returns (background_style, subtitles_enabled)."""
         if not self.presets or name not in self.presets:
@@ -87,6 +202,10 @@ class Config:
         self.resolution = p.get("resolution", self.resolution)
         if "watermark" in p:
             self.watermark_enabled = bool(p["watermark"])
+        if "speech_rate" in p:
+            self.speech_rate = float(p["speech_rate"])
+        if "music" in p:
+            self.music_enabled = bool(p["music"])
         bg = p.get("background_style")
         subtitles = bool(p.get("subtitles", True))
         return bg, subtitles
@@ -0,0 +1,179 @@
+from __future__ import annotations
+
+"""Minimal DAG engine used to declare and schedule pipeline stages."""
+
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Callable, Iterable, Optional
+
+
+@dataclass
+class Node:
+    """A unit of work consuming and producing named artifacts.
+
+    ``func`` returns None when it completed or a status string such as
+    ``"skipped"`` when it had nothing to do. ``cached`` is consulted before
+    running; returning True means the outputs were restored without running
+    ``func``. ``persistent`` nodes write their outputs to disk and can be
+    reused by a resumed run; other nodes only prepare in-memory handles.
+    """
+
+    name: str
+    func: Callable[[], Optional[str]]
+    inputs: tuple[str, ...] = ()
+    outputs: tuple[str, ...] = ()
+    cached: Optional[Callable[[], bool]] = None
+    persistent: bool = True
+
+
+class Graph:
+    def __init__(self, nodes: Iterable[Node] = ()):
+        self.nodes: dict[str, Node] = {}
+        self._producers: dict[str, str] = {}
+        for node in nodes:
+            self.add(node)
+
+    def add(self, node: Node) -> Node:
+        if node.name in self.nodes:
+            raise ValueError(f"Duplicate node {node.name}")
+        for artifact in node.outputs:
+            if artifact in self._producers:
+                raise ValueError(f"Artifact {artifact} already produced by {self._producers[artifact]}")
+            self._producers[artifact] = node.name
+        self.nodes[node.name] = node
+        return node
+
+    def dependencies(self, name: str) -> list[str]:
+        """Return the nodes producing the inputs of *name*.
+
+        Inputs without a producer are treated as external.
+        """
+        deps = []
+        for artifact in self.nodes[name].inputs:
+            producer = self._producers.get(artifact)
+            if producer and producer not in deps:
+                deps.append(producer)
+        return deps
+
+    def dependents(self, name: str) -> list[str]:
+        return [n for n in self.nodes if name in self.dependencies(n)]
+
+    def order(self) -> list[str]:
+        """Return node names in a topological order (declaration order on ties)."""
+        done: list[str] = []
+        visiting: set[str] = set()
+
+        def visit(name: str) -> None:
+            if name in done:
+                return
+            if name in visiting:
+                raise ValueError(f"Cycle detected at {name}")
+            visiting.add(name)
+            for dep in self.dependencies(name):
+                visit(dep)
+            visiting.discard(name)
+            done.append(name)
+
+        for name in self.nodes:
+            visit(name)
+        return done
+
+    def reusable(self, completed: Iterable[str]) -> set[str]:
+        """Return the nodes a resumed run can skip given *completed* nodes.
+
+        A completed node is reusable when none of its persistent upstream
+        nodes has to run again. Non-persistent nodes are dropped when every
+        node depending on them is reusable.
+        """
+        completed = set(completed)
+        order = self.order()
+        reuse: set[str] = set()
+        for name in order:
+            deps = self.dependencies(name)
+            if name in completed and all(
+                d in reuse or not self.nodes[d].persistent for d in deps
+            ):
+                reuse.add(name)
+        for name in reversed(order):
+            if self.nodes[name].persistent or name in reuse:
+                continue
+            dependents = self.dependents(name)
+            if dependents and all(d in reuse for d in dependents):
+                reuse.add(name)
+        return reuse
+
+    def run(
+        self,
+        completed: Iterable[str] = (),
+        max_workers: int = 4,
+        on_status: Optional[Callable[[str, str], None]] = None,
+    ) -> dict[str, str]:
+        """Run the graph, executing independent nodes concurrently.
+
+        Statuses are ``done``, ``cached``, ``reused``, a status returned by
+        the node, or ``failed``. *on_status* is called from this thread on
+        every change. The first failure stops scheduling; running nodes are
+        awaited and the exception is re-raised.
+        """
+        status: dict[str, str] = {name: "pending" for name in self.nodes}
+
+        def update(name: str, value: str) -> None:
+            status[name] = value
+            if on_status:
+                on_status(name, value)
+
+        for name in self.reusable(completed):
+            update(name, "reused")
+
+        def ready(name: str) -> bool:
+            return status[name] == "pending" and all(
+                status[d] not in {"pending", "running", "failed"} for d in self.dependencies(name)
+            )
+
+        error: BaseException | None = None
+        running: dict[Future, str] = {}
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="stage") as pool:
+            while True:
+                for name in self.order():
+                    if error is not None or not ready(name):
+                        continue
+                    node = self.nodes[name]
+                    if node.cached is not None and node.cached():
+                        update(name, "cached")
+                        continue
+                    update(name, "running")
+                    running[pool.submit(node.func)] = name
+                if not running:
+                    break
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for fut in finished:
+                    name = running.pop(fut)
+                    try:
+                        update(name, fut.result() or "done")
+                    except BaseException as e:
+                        update(name, "failed")
+                        error = error or e
+        if error is not None:
+            raise error
+        return status
+
+    def to_dot(self) -> str:
+        """Return the graph in Graphviz DOT format."""
+        lines = ["digraph pipeline {", "  rankdir=LR;"]
+        for name in self.order():
+            shape = "box" if self.nodes[name].persistent else "ellipse"
+            lines.append(f'  "{name}" [shape={shape}];')
+            for dep in self.dependencies(name):
+                lines.append(f'  "{dep}" -> "{name}";')
+        lines.append("}")
+        return "\n".join(lines)
+
+    def to_dict(self) -> dict:
+        return {
+            name: {
+                "inputs": list(node.inputs),
+                "outputs": list(node.outputs),
+                "depends_on": self.dependencies(name),
+            }
+            for name, node in self.nodes.items()
+        }
@@ -0,0 +1,195 @@
+from __future__ import annotations
+
+"""Pooled HTTP client for the ElevenLabs API."""
+
+from pathlib import Path
+import base64
+import json
+import os
+import threading
+import time
+import wave
+
+try:
+    import requests
+    from requests.adapters import HTTPAdapter
+except Exception:  # pragma: no cover - missing dependency in tests
+    requests = None
+
+from .logger import setup_logger
+from .ratelimit import parse_retry_after
+
+API_URL = "https://api.elevenlabs.io/v1"
+# audio is requested as raw 16-bit mono PCM at this rate and wrapped as WAV
+PCM_RATE = 24000
+
+
+class ElevenLabsError(RuntimeError):
+    """Non-200 response from the API."""
+
+    def __init__(self, status: int, message: str, retry_after: float | None = None):
+        super().__init__(message)
+        self.status = status
+        self.retry_after = retry_after
+
+    @property
+    def retryable(self) -> bool:
+        # a 429 for an exhausted monthly quota will not clear by waiting
+        return self.status >= 500 or (self.status == 429 and "quota_exceeded" not in str(self))
+
+
+class SynthesisCancelled(Exception):
+    """The caller abandoned the request while it was streaming."""
+
+
+class ElevenLabsClient:
+    """Keep-alive session shared by all requests of one process.
+
+    Responses are streamed to disk in *chunk_size* pieces, so memory use does
+    not grow with the length of the audio.
+    """
+
+    def __init__(
+        self,
+        api_key: str,
+        pool_size: int = 8,
+        timeout: float = 30,
+        chunk_size: int = 16384,
+    ):
+        if requests is None:
+            raise RuntimeError("requests library not available")
+        self.api_key = api_key
+        self.timeout = timeout
+        self.chunk_size = chunk_size
+        self.logger = setup_logger("elevenlabs")
+        self.session = requests.Session()
+        self.session.headers["xi-api-key"] = api_key
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+
+    def synthesize(
+        self,
+        voice_id: str,
+        text: str,
+        dest: Path,
+        cancel: threading.Event | None = None,
+        with_timestamps: bool = False,
+    ) -> dict:
+        """Stream speech for *text* into the WAV file *dest*.
+
+        Returns the byte count, time to first byte and transfer time. The
+        file only appears once the whole response has been received; setting
+        *cancel* aborts the transfer with :class:`SynthesisCancelled`. With
+        *with_timestamps*, the result also holds the character ``alignment``
+        (``characters``, ``start`` and ``end`` lists, in seconds).
+        """
+        url = f"{API_URL}/text-to-speech/{voice_id}/stream"
+        if with_timestamps:
+            url += "/with-timestamps"
+        alignment = {"characters": [], "start": [], "end": []}
+        tmp = dest.with_name(f".{dest.name}.part")
+        start = time.perf_counter()
+        first_byte = None
+        total = 0
+        with self.session.post(
+            url,
+            params={"output_format": f"pcm_{PCM_RATE}"},
+            json={"text": text},
+            stream=True,
+            timeout=self.timeout,
+        ) as response:
+            if response.status_code != 200:
+                raise ElevenLabsError(
+                    response.status_code,
+                    response.text,
+                    parse_retry_after(response.headers.get("Retry-After")),
+                )
+            try:
+                with wave.open(str(tmp), "wb") as wf:
+                    wf.setnchannels(1)
+                    wf.setsampwidth(2)
+                    wf.setframerate(PCM_RATE)
+                    carry = b""  # odd trailing byte of a 16-bit sample
+                    pieces = (
+                        _timestamped(response, alignment)
+                        if with_timestamps
+                        else response.iter_content(self.chunk_size)
+                    )
+                    for chunk in pieces:
+                        if cancel is not None and cancel.is_set():
+                            raise SynthesisCancelled()
+                        if not chunk:
+                            continue
+                        if first_byte is None:
+                            first_byte = time.perf_counter() - start
+                        total += len(chunk)
+                        data = carry + chunk
+                        cut = len(data) - len(data) % 2
+                        wf.writeframesraw(data[:cut])
+                        carry = data[cut:]
+                os.replace(tmp, dest)
+            except BaseException:
+                tmp.unlink(missing_ok=True)
+                raise
+        elapsed = time.perf_counter() - start
+        first_byte = elapsed if first_byte is None else first_byte
+        transfer = max(elapsed - first_byte, 1e-6)
+        self.logger.info(
+            f"ElevenLabs: {total / 1024:.0f} KB, first byte after {first_byte * 1000:.0f} ms, "
+            f"{total / 1024 / transfer:.0f} KB/s"
+        )
+        result = {"bytes": total, "ttfb_s": round(first_byte, 3), "transfer_s": round(transfer, 3)}
+        if with_timestamps:
+            result["alignment"] = alignment
+        return result
+
+    def voices(self) -> list[dict]:
+        response = self.session.get(f"{API_URL}/voices", timeout=self.timeout)
+        if response.status_code != 200:
+            raise ElevenLabsError(response.status_code, response.text)
+        return response.json().get("voices", [])
+
+    def close(self) -> None:
+        self.session.close()
+
+
+def _timestamped(response, alignment: dict):
+    """Yield the PCM of a with-timestamps stream, collecting its character alignment."""
+    written = 0  # bytes of audio yielded so far
+    for line in response.iter_lines():
+        if not line:
+            continue
+        data = json.loads(line)
+        audio = base64.b64decode(data.get("audio_base64") or "")
+        chars = data.get("alignment") or {}
+        starts = chars.get("character_start_times_seconds") or []
+        if starts:
+            # times are from the start of the audio; tolerate chunk-relative ones
+            offset = 0.0
+            if alignment["end"] and starts[0] < alignment["end"][-1] - 0.05:
+                offset = written / 2 / PCM_RATE
+            alignment["characters"].extend(chars.get("characters") or [])
+            alignment["start"].extend(t + offset for t in starts)
+            alignment["end"].extend(
+                t + offset for t in chars.get("character_end_times_seconds") or []
+            )
+        written += len(audio)
+        yield audio
+
+
+_clients: dict[tuple[int, str], ElevenLabsClient] = {}
+_lock = threading.Lock()
+
+
+def get_client(api_key: str) -> ElevenLabsClient:
+    """Return the shared client for *api_key*.
+
+    Clients are per process: pooled sockets must not be shared with forked
+    stage workers.
+    """
+    key = (os.getpid(), api_key)
+    with _lock:
+        client = _clients.get(key)
+        if client is None:
+            client = _clients[key] = ElevenLabsClient(api_key)
+        return client
@@ -0,0 +1,131 @@
+from __future__ import annotations
+
+"""Stage execution with timeouts that actually stop the work.
+
+``run_isolated`` forks a worker process that becomes the leader of its own
+process group. Any ffmpeg it launches joins that group, so on timeout the
+whole group is killed and the CPU is freed immediately. ``run_process`` runs
+a single external command with its own timeout; the command stays in the
+caller's group so that killing a stage worker reaches it too. Resource slots
+held by a killed worker are reclaimed by :class:`pipeline.resources.SlotPool`.
+"""
+
+from typing import Any, Callable
+import multiprocessing
+import os
+import signal
+import subprocess
+
+from .helpers import run_with_timeout
+
+# seconds a worker may take to exit once its result has arrived
+EXIT_GRACE = 1.0
+
+
+def isolation_available() -> bool:
+    """Return True when stages can run in forked worker processes."""
+    return hasattr(os, "setpgrp") and "fork" in multiprocessing.get_all_start_methods()
+
+
+def _kill_group(proc: multiprocessing.Process, grace: float = 2.0) -> None:
+    # SIGTERM first so the worker unwinds and cleans up; SIGKILL whatever is
+    # left after *grace* seconds (its resource slots are reclaimed anyway).
+    for sig in (signal.SIGTERM, signal.SIGKILL):
+        try:
+            os.killpg(proc.pid, sig)
+        except (ProcessLookupError, PermissionError):
+            proc.kill()
+        proc.join(grace)
+        if not proc.is_alive():
+            return
+    proc.join()
+
+
+def _terminate(signum, frame) -> None:
+    raise SystemExit(f"terminated by signal {signum}")
+
+
+def _worker(conn, func: Callable[[], Any]) -> None:
+    os.setpgrp()
+    signal.signal(signal.SIGTERM, _terminate)
+    try:
+        value = func()
+        message = ("ok", value)
+    except BaseException as e:  # capture all
+        message = ("error", e)
+    try:
+        conn.send(message)
+    except BrokenPipeError:
+        pass
+    except Exception as e:  # unpicklable result or exception
+        conn.send(("error", RuntimeError(f"{type(message[1]).__name__}: {message[1]} ({e})")))
+    finally:
+        conn.close()
+
+
+def run_isolated(func: Callable[..., Any], timeout: float, /, *args, **kwargs) -> Any:
+    """Run *func* in a forked worker process and return its result.
+
+    Raises TimeoutError after *timeout* seconds, once the worker's process
+    group has been killed. Once the result has arrived, a worker still
+    busy after ``EXIT_GRACE`` seconds (e.g. the losing side of a hedged
+    voiceover) is killed with its group instead of waited for. Falls back
+    to :func:`run_with_timeout` on platforms without ``fork``. The worker
+    sees a copy of the caller's memory, so side effects on objects are
+    lost; return what you need.
+    """
+    if not isolation_available():
+        return run_with_timeout(func, timeout, *args, **kwargs)
+    ctx = multiprocessing.get_context("fork")
+    recv, send = ctx.Pipe(duplex=False)
+    proc = ctx.Process(target=_worker, args=(send, lambda: func(*args, **kwargs)))
+    proc.start()
+    send.close()
+    name = getattr(func, "__name__", "stage")
+    try:
+        if not recv.poll(timeout):
+            _kill_group(proc)
+            raise TimeoutError(f"{name} timed out after {timeout}s")
+        try:
+            status, value = recv.recv()
+        except EOFError:
+            proc.join()
+            raise RuntimeError(f"{name} worker exited with code {proc.exitcode}")
+    except BaseException:
+        if proc.is_alive():
+            _kill_group(proc)
+        raise
+    finally:
+        recv.close()
+    proc.join(EXIT_GRACE)
+    if proc.is_alive():
+        _kill_group(proc)
+    if status == "error":
+        raise value
+    return value
+
+
+def run_process(
+    cmd: list[str], timeout: float | None = None, check: bool = True, **kwargs
+) -> subprocess.CompletedProcess:
+    """Run *cmd*, killing it on timeout or when the caller is interrupted.
+
+    Raises TimeoutError after *timeout* seconds. The command stays in the
+    caller's process group (see the module docstring). Accepts the
+    ``subprocess.run`` keyword arguments for output capture.
+    """
+    if kwargs.pop("capture_output", False):
+        kwargs["stdout"] = kwargs["stderr"] = subprocess.PIPE
+    with subprocess.Popen(cmd, **kwargs) as proc:
+        try:
+            stdout, stderr = proc.communicate(timeout=timeout)
+        except BaseException as e:
+            proc.kill()
+            proc.wait()
+            if isinstance(e, subprocess.TimeoutExpired):
+                raise TimeoutError(f"{cmd[0]} timed out after {timeout}s") from e
+            raise
+    result = subprocess.CompletedProcess(cmd, proc.returncode, stdout, stderr)
+    if check:
+        result.check_returncode()
+    return result
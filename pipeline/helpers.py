@@ -1,8 +1,9 @@
 from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Optional, Callable, Any
+from typing import Optional, Callable, Any, Iterable
 from datetime import datetime
 import json
+import os
 import re
 import shutil
 import threading
@@ -40,8 +41,12 @@ def zip_folder(folder: Path, dest_zip: Path) -> Path:
     return dest_zip
 
 
-def run_with_timeout(func: Callable[..., Any], timeout: float, *args, **kwargs) -> Any:
-    """Run *func* with timeout. Raises TimeoutError if timeout exceeded."""
+def run_with_timeout(func: Callable[..., Any], timeout: float, /, *args, **kwargs) -> Any:
+    """Run *func* with timeout. Raises TimeoutError if timeout exceeded.
+
+    The worker thread cannot be stopped and is left running as a daemon;
+    use :func:`pipeline.executor.run_isolated` when the work must be killed.
+    """
     result: dict[str, Any] = {}
     exc: list[BaseException] = []
 
@@ -51,7 +56,7 @@ def run_with_timeout(func: Callable[..., Any], timeout: float, *args, **kwargs)
         except BaseException as e:  # capture all
             exc.append(e)
 
-    thread = threading.Thread(target=target)
+    thread = threading.Thread(target=target, daemon=True)
     thread.start()
     thread.join(timeout)
     if thread.is_alive():
@@ -94,16 +99,33 @@ class PipelineContext:
     voice_id: Optional[str] = None
     voiceover_path: Path = field(init=False)
     subtitles_path: Path = field(init=False)
+    transcript_path: Path = field(init=False)
+    chunks_path: Path = field(init=False)
+    conditioning_path: Path = field(init=False)
+    raw_voice_path: Path = field(init=False)
+    mix_path: Path = field(init=False)
+    timings_path: Path = field(init=False)
     final_video_path: Path = field(init=False)
     script_path: Path = field(init=False)
     log_file: Optional[Path] = None
     debug: bool = False
     timestamp: str = field(default_factory=iso_timestamp)
+    stages: dict = field(default_factory=dict)
+    options: dict = field(default_factory=dict)
+    archive_future: Any = field(default=None, init=False, repr=False)
+    # in-memory results shared between stages (renderer, prepared background)
+    handles: dict = field(default_factory=dict, init=False, repr=False)
 
     def __post_init__(self):
         self.output_dir.mkdir(parents=True, exist_ok=True)
         self.voiceover_path = self.output_dir / "voice.wav"
         self.subtitles_path = self.output_dir / "subtitles.ass"
+        self.transcript_path = self.output_dir / "transcript.json"
+        self.chunks_path = self.output_dir / "chunks.json"
+        self.conditioning_path = self.output_dir / "conditioning.json"
+        self.raw_voice_path = self.output_dir / "voice_raw.wav"
+        self.mix_path = self.output_dir / "mix.wav"
+        self.timings_path = self.output_dir / "timings.json"
         self.final_video_path = self.output_dir / "final_video.mp4"
         self.script_path = self.output_dir / f"{self.script_name}.txt"
         if not self.script_path.exists():
@@ -117,6 +139,8 @@ class PipelineContext:
             "voice_engine": self.voice_engine.capitalize(),
             "timestamp": self.timestamp,
             "status": status,
+            "stages": self.stages,
+            "options": self.options,
         }
         with open(self.output_dir / "metadata.json", "w") as f:
             json.dump(metadata, f, indent=2)
@@ -130,9 +154,10 @@ class PipelineContext:
         )
         (self.output_dir / "summary.txt").write_text(summary)
 
-    def archive(self):
-        zip_path = zip_folder(self.output_dir, self.output_dir)
-        return zip_path
+    def archive(self, exclude: Iterable[str] = (), store_media: bool = True) -> Path:
+        from .archive import build_archive
+
+        return build_archive(self.output_dir, self.output_dir, exclude, store_media)
 
     def write_error_trace(self, exc: BaseException) -> None:
         """Write traceback of *exc* to error_trace.txt"""
@@ -184,14 +209,60 @@ def validate_files(*paths: Path) -> list[Path]:
     return missing
 
 
-def preview_voice(engine: str, voice_id: str, coqui_model: str) -> Path:
-    """Generate and play a short voice preview."""
+PREVIEW_TEXT = "This is a sample of {voice_id}"
+
+
+def preview_path(engine: str, voice_id: str, coqui_model: str, cache_dir: Path) -> Path:
+    """Return where the preview of *voice_id* is cached."""
+    from .cache import cache_key
+
+    key = cache_key(
+        "preview",
+        engine=engine,
+        voice_id=voice_id,
+        model=coqui_model if engine == "coqui" else None,
+        text=PREVIEW_TEXT,
+    )
+    return Path(cache_dir) / f"{key[:32]}.wav"
+
+
+def render_preview(
+    engine: str, voice_id: str, coqui_model: str, cache_dir: Path = Path("cache/previews")
+) -> Path | None:
+    """Return the cached preview of *voice_id*, synthesizing it on a miss.
+
+    Each preview is written to a temporary file and renamed into place, so
+    concurrent previews never overwrite each other.
+    """
     from .voiceover import VoiceOverGenerator
 
-    preview = Path("_preview.wav")
+    path = preview_path(engine, voice_id, coqui_model, cache_dir)
+    if path.exists() and path.stat().st_size > 0:
+        return path
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.stem}.{os.getpid()}.{threading.get_ident()}.wav")
     generator = VoiceOverGenerator(engine, voice_id, coqui_model)
     try:
-        generator.generate(f"This is a sample of {voice_id}", preview)
+        if not generator.generate(PREVIEW_TEXT.format(voice_id=voice_id), tmp):
+            return None
+        if generator.used_engine != engine:
+            # a fallback voice must not answer later lookups for this engine
+            path = preview_path(generator.used_engine, voice_id, coqui_model, cache_dir)
+        tmp.replace(path)
+    finally:
+        tmp.unlink(missing_ok=True)
+    return path
+
+
+def preview_voice(
+    engine: str, voice_id: str, coqui_model: str, cache_dir: Path = Path("cache/previews")
+) -> Path | None:
+    """Generate (or reuse) and play a short voice preview."""
+    try:
+        preview = render_preview(engine, voice_id, coqui_model, cache_dir)
+        if preview is None:
+            color_print("ERROR", f"Voice preview failed for {voice_id}")
+            return None
         try:
             from playsound import playsound  # pragma: no cover - optional dep
 
@@ -201,11 +272,40 @@ def preview_voice(engine: str, voice_id: str, coqui_model: str) -> Path:
     except Exception as e:  # pragma: no cover - runtime failures
         color_print("ERROR", f"Voice preview failed: {e}")
         log_trace(e)
+        return None
     return preview
 
 
-def trim_silence_ffmpeg(audio: Path, ffmpeg: str = "ffmpeg") -> None:
+def prewarm_previews(config: Any, workers: int = 4) -> dict[str, Path | None]:
+    """Render the preview of every voice in ``config.voices`` concurrently.
+
+    Returns the preview path (``None`` on failure) per voice name.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+    from . import ratelimit
+
+    voices = config.voices or {}
+    ratelimit.configure(config.elevenlabs_requests_per_s, config.elevenlabs_chars_per_min)
+    cache_dir = Path(config.preview_cache_dir)
+
+    def render(voice_id: str) -> Path | None:
+        try:
+            return render_preview(
+                config.voice_engine, voice_id, config.coqui_model_name, cache_dir
+            )
+        except Exception as e:
+            log_trace(e)
+            return None
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        return dict(zip(voices, pool.map(render, voices.values())))
+
+
+def trim_silence_ffmpeg(audio: Path, ffmpeg: str = "ffmpeg", timeout: float | None = None) -> None:
     """Trim leading and trailing silence from *audio* using ffmpeg."""
+    from .executor import run_process
+    from .resources import slot
+
     if not shutil.which(ffmpeg):
         color_print("ERROR", f"ffmpeg not found: {ffmpeg}")
         return
@@ -220,7 +320,8 @@ def trim_silence_ffmpeg(audio: Path, ffmpeg: str = "ffmpeg") -> None:
         str(trimmed),
     ]
     try:
-        subprocess.run(cmd, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        with slot("ffmpeg"):
+            run_process(cmd, timeout, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
         if trimmed.exists() and trimmed.stat().st_size > 0:
             audio.unlink(missing_ok=True)
             trimmed.rename(audio)
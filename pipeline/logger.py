@@ -1,4 +1,5 @@
 import logging
+import os
 from pathlib import Path
 
 
@@ -20,9 +21,27 @@ def setup_logger(name: str, log_file: Path | None = None, debug: bool = False) -
 
     if log_file:
         log_file = Path(log_file)
-        if not any(isinstance(h, logging.FileHandler) and Path(h.baseFilename) == log_file for h in logger.handlers):
+        if not any(_writes_to(h, log_file) for h in logger.handlers):
             fh = logging.FileHandler(log_file)
             fh.setFormatter(formatter)
             logger.addHandler(fh)
 
     return logger
+
+
+def close_log_file(log_file: Path | None) -> None:
+    """Detach and close every handler writing to *log_file*, on all loggers."""
+    if not log_file:
+        return
+    for logger in list(logging.Logger.manager.loggerDict.values()):
+        if not isinstance(logger, logging.Logger):
+            continue
+        for handler in list(logger.handlers):
+            if _writes_to(handler, log_file):
+                logger.removeHandler(handler)
+                handler.close()
+
+
+def _writes_to(handler: logging.Handler, log_file: Path) -> bool:
+    # FileHandler stores the absolute path it was opened with
+    return isinstance(handler, logging.FileHandler) and handler.baseFilename == os.path.abspath(log_file)
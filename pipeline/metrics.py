@@ -0,0 +1,162 @@
+from __future__ import annotations
+
+"""Per-stage resource metrics for pipeline runs."""
+
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterable, Iterator, Union
+import os
+import sys
+import threading
+import time
+import wave
+
+try:
+    import resource
+except ImportError:  # pragma: no cover - not available on Windows
+    resource = None
+
+Sized = Union[Path, int]
+
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+def _usage() -> tuple[float, float, float]:
+    """Return (cpu, child_cpu, children_max_rss_mb) for this process."""
+    if resource is None:
+        return time.process_time(), 0.0, 0.0
+    own = resource.getrusage(resource.RUSAGE_SELF)
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    # ru_maxrss is reported in KiB on Linux and in bytes on macOS
+    scale = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return (
+        own.ru_utime + own.ru_stime,
+        children.ru_utime + children.ru_stime,
+        children.ru_maxrss / scale,
+    )
+
+
+def _rss_mb() -> float | None:
+    """Return the current resident set size of this process, if it can be read."""
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+    except (OSError, ValueError, IndexError):
+        return None
+    return pages * _PAGE_SIZE / 1024**2
+
+
+class _RssSampler:
+    """Track the peak RSS of this process while a stage runs."""
+
+    def __init__(self, interval: float = 0.05):
+        self.start = self.peak = _rss_mb()
+        self._interval = interval
+        self._done = threading.Event()
+        self._thread = None
+        if self.start is not None:
+            self._thread = threading.Thread(target=self._run, name="rss-sampler", daemon=True)
+            self._thread.start()
+
+    def _run(self) -> None:
+        while not self._done.wait(self._interval):
+            self._sample()
+
+    def _sample(self) -> None:
+        rss = _rss_mb()
+        if rss is not None and rss > self.peak:
+            self.peak = rss
+
+    def stop(self) -> None:
+        if self._thread is not None:
+            self._done.set()
+            self._thread.join()
+            self._sample()
+
+
+def _size(items: Iterable[Sized]) -> int:
+    total = 0
+    for item in items:
+        if isinstance(item, int):
+            total += item
+        elif item and Path(item).is_file():
+            total += Path(item).stat().st_size
+    return total
+
+
+def audio_duration(path: Path) -> float | None:
+    """Return the duration of the WAV file at *path* in seconds."""
+    try:
+        with wave.open(str(path), "rb") as wf:
+            rate = wf.getframerate()
+            return wf.getnframes() / rate if rate else None
+    except (OSError, EOFError, wave.Error):
+        return None
+
+
+class MetricsRecorder:
+    """Collect wall time, CPU, memory and I/O figures for named stages.
+
+    CPU time is process wide, so work on other threads (such as stages the
+    scheduler runs in parallel) is attributed to every stage running at the
+    time. Child CPU covers ffmpeg and worker processes that exited during the
+    stage. ``peak_rss_mb`` is sampled while the stage runs and
+    ``rss_delta_mb`` is its growth over the RSS at the start; like CPU they
+    are process wide (and ``None`` without ``/proc``). ``children_max_rss_mb``
+    is the largest child reaped by this process so far, not just during the
+    stage.
+    """
+
+    def __init__(self) -> None:
+        self.stages: dict[str, dict] = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def stage(
+        self,
+        name: str,
+        inputs: Iterable[Sized] = (),
+        outputs: Iterable[Sized] = (),
+    ) -> Iterator[dict]:
+        """Measure the enclosed block as stage *name*.
+
+        *inputs* are sized on entry and *outputs* on exit; ints are taken as
+        byte counts. The yielded dict can be updated with extra fields.
+        """
+        input_bytes = _size(inputs)
+        cpu0, child0, _ = _usage()
+        rss = _RssSampler()
+        start = time.perf_counter()
+        extra: dict = {}
+        status = "failed"
+        try:
+            yield extra
+            status = "done"
+        finally:
+            wall = time.perf_counter() - start
+            rss.stop()
+            cpu1, child1, children_rss = _usage()
+            record = {
+                "status": status,
+                "wall_s": round(wall, 3),
+                "cpu_s": round(cpu1 - cpu0, 3),
+                "child_cpu_s": round(child1 - child0, 3),
+                "peak_rss_mb": None if rss.peak is None else round(rss.peak, 1),
+                "rss_delta_mb": None if rss.peak is None else round(rss.peak - rss.start, 1),
+                "children_max_rss_mb": round(children_rss, 1),
+                "input_bytes": input_bytes,
+                "output_bytes": _size(outputs),
+                **extra,
+            }
+            with self._lock:
+                self.stages[name] = record
+
+    def report(self, audio_seconds: float | None = None) -> dict:
+        """Return all stage records with realtime factors against *audio_seconds*."""
+        stages = {}
+        for name, record in self.stages.items():
+            record = dict(record)
+            if audio_seconds:
+                record["realtime_factor"] = round(record["wall_s"] / audio_seconds, 3)
+            stages[name] = record
+        return {"audio_duration_s": audio_seconds, "stages": stages}
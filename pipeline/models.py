@@ -0,0 +1,244 @@
+from __future__ import annotations
+
+"""Process-wide registries keeping loaded models resident between runs."""
+
+from collections import OrderedDict
+from typing import Any, Callable, Optional
+import gc
+import os
+import threading
+import time
+
+from .logger import setup_logger
+
+try:
+    import psutil
+except Exception:  # pragma: no cover - optional dependency
+    psutil = None
+
+
+def _rss_bytes() -> int | None:
+    """Return the current resident set size of this process, if known."""
+    if psutil is not None:
+        return psutil.Process().memory_info().rss
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+
+def _available_bytes() -> int | None:
+    """Return the memory available to new allocations system-wide, if known."""
+    if psutil is not None:
+        return psutil.virtual_memory().available
+    try:
+        with open("/proc/meminfo") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    return None
+
+
+# every registry, so memory pressure can unload the least recently used
+# model of any kind
+_registries: list["ModelRegistry"] = []
+_min_free_bytes = 0
+
+
+def set_min_free(mb: int | None) -> None:
+    """Unload resident models while less than *mb* megabytes are available (0: never)."""
+    global _min_free_bytes
+    _min_free_bytes = mb * 1024 * 1024 if mb else 0
+
+
+def relieve_pressure(keep: tuple["ModelRegistry", str] | None = None) -> int:
+    """Unload least recently used models until ``set_min_free`` is satisfied.
+
+    *keep* names a model that must stay. Registries busy loading in another
+    thread are left alone. Returns the number of models unloaded.
+    """
+    unloaded = 0
+    while _min_free_bytes:
+        available = _available_bytes()
+        if available is None or available >= _min_free_bytes:
+            break
+        candidates = [
+            (registry._info[name]["used_at"], id(registry), registry, name)
+            for registry in _registries
+            for name in list(registry._models)
+            if (registry, name) != keep
+        ]
+        victim = None
+        for _, _, registry, name in sorted(candidates, key=lambda c: c[:2]):
+            # the caller already holds the lock of the registry it loads into
+            owned = keep is not None and registry is keep[0]
+            if owned or registry._lock.acquire(blocking=False):
+                try:
+                    registry._drop(name, f"only {available / 1024 / 1024:.0f} MB available")
+                finally:
+                    if not owned:
+                        registry._lock.release()
+                victim = name
+                break
+        if victim is None:
+            break
+        unloaded += 1
+        gc.collect()
+    return unloaded
+
+
+def torch_model_bytes(model: Any) -> int | None:
+    """Return the parameter and buffer size of a torch module, if *model* is one."""
+    module = model
+    # Coqui's TTS wrapper keeps the network on its synthesizer
+    synthesizer = getattr(model, "synthesizer", None)
+    if synthesizer is not None:
+        module = getattr(synthesizer, "tts_model", module)
+    if not hasattr(module, "parameters"):
+        return None
+    try:
+        tensors = list(module.parameters()) + list(getattr(module, "buffers", lambda: [])())
+        return sum(t.numel() * t.element_size() for t in tensors)
+    except Exception:
+        return None
+
+
+class ModelRegistry:
+    """Cache of loaded models keyed by model name.
+
+    Loading happens at most once per name and process; failed loads are not
+    cached so the next call retries. With a memory budget, the least recently
+    used models are evicted once the resident total exceeds it. A model's
+    size comes from *sizer* or, failing that, the RSS growth while loading.
+    When system memory runs low (see :func:`set_min_free`), models of every
+    registry are unloaded, least recently used first.
+    """
+
+    def __init__(
+        self,
+        kind: str,
+        max_bytes: int | None = None,
+        sizer: Optional[Callable[[Any], int | None]] = None,
+    ):
+        self.kind = kind
+        self.max_bytes = max_bytes
+        self.sizer = sizer
+        self.logger = setup_logger("models")
+        self._models: OrderedDict[str, Any] = OrderedDict()
+        self._info: dict[str, dict] = {}
+        self._counters = {"hits": 0, "misses": 0, "evictions": 0, "load_s": 0.0}
+        self._lock = threading.Lock()
+        self._use_locks: dict[str, threading.Lock] = {}
+        _registries.append(self)
+
+    def set_budget(self, max_mb: int | None) -> None:
+        """Cap resident models at *max_mb* megabytes (``None`` or 0: unlimited)."""
+        with self._lock:
+            self.max_bytes = max_mb * 1024 * 1024 if max_mb else None
+            self._evict(keep=None)
+
+    def get(self, name: str, loader: Callable[[], Any]) -> Any:
+        """Return the model *name*, calling *loader* if it is not resident."""
+        with self._lock:
+            if name in self._models:
+                self._models.move_to_end(name)
+                self._counters["hits"] += 1
+                self._info[name]["hits"] += 1
+                self._info[name]["used_at"] = time.monotonic()
+                return self._models[name]
+            self._counters["misses"] += 1
+            relieve_pressure(keep=(self, ""))
+            rss = _rss_bytes()
+            start = time.perf_counter()
+            model = loader()
+            load_s = time.perf_counter() - start
+            size = self.sizer(model) if self.sizer else None
+            if size is None and rss is not None:
+                after = _rss_bytes()
+                size = max(0, after - rss) if after is not None else None
+            self._counters["load_s"] += load_s
+            self._models[name] = model
+            self._info[name] = {
+                "bytes": size or 0,
+                "load_s": round(load_s, 3),
+                "hits": 0,
+                "used_at": time.monotonic(),
+            }
+            self.logger.info(
+                f"Loaded {self.kind} model {name} in {load_s:.1f}s"
+                f" ({(size or 0) / 1024 / 1024:.0f} MB)"
+            )
+            self._evict(keep=name)
+            relieve_pressure(keep=(self, name))
+            return model
+
+    def use_lock(self, name: str) -> threading.Lock:
+        """Return the lock serializing inference on model *name* in this process.
+
+        One resident model is shared by every thread, and models such as
+        Coqui's are not safe to run from several threads at once.
+        """
+        with self._lock:
+            return self._use_locks.setdefault(name, threading.Lock())
+
+    def _evict(self, keep: str | None) -> None:
+        if not self.max_bytes:
+            return
+        evicted = False
+        while self.resident_bytes() > self.max_bytes:
+            victim = next((n for n in self._models if n != keep), None)
+            if victim is None:
+                break
+            self._drop(victim, "to stay within the memory budget")
+            evicted = True
+        if evicted:
+            gc.collect()
+
+    def _drop(self, name: str, reason: str) -> None:
+        del self._models[name]
+        info = self._info.pop(name)
+        self._counters["evictions"] += 1
+        self.logger.info(
+            f"Evicted {self.kind} model {name} ({info['bytes'] / 1024 / 1024:.0f} MB) {reason}"
+        )
+
+    def resident_bytes(self) -> int:
+        return sum(self._info[n]["bytes"] for n in self._models)
+
+    def stats(self) -> dict:
+        """Return hit/miss counts, hit rate, total load time and resident models."""
+        counters = dict(self._counters)
+        lookups = counters["hits"] + counters["misses"]
+        counters["load_s"] = round(counters["load_s"], 3)
+        counters["hit_rate"] = round(counters["hits"] / lookups, 3) if lookups else None
+        counters["resident_mb"] = round(self.resident_bytes() / 1024 / 1024, 1)
+        counters["models"] = {
+            n: {k: v for k, v in self._info[n].items() if k != "used_at"} for n in self._models
+        }
+        return counters
+
+    def loaded(self) -> list[str]:
+        return list(self._models)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._models.clear()
+            self._info.clear()
+            self._counters = {"hits": 0, "misses": 0, "evictions": 0, "load_s": 0.0}
+
+
+def fetch_coqui_model(name: str) -> str:
+    """Download the Coqui model *name* ahead of time and return its path."""
+    from TTS.utils.manage import ModelManager
+
+    result = ModelManager().download_model(name)
+    # download_model returns (model_path, config_path, model_item)
+    path = result[0] if isinstance(result, tuple) else result
+    return str(path)
+
+
+coqui_models = ModelRegistry("coqui", sizer=torch_model_bytes)
+whisper_models = ModelRegistry("whisper", sizer=torch_model_bytes)
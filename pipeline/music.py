@@ -0,0 +1,154 @@
+from __future__ import annotations
+
+"""Background music mixed under the voiceover.
+
+A track from the music library is decoded to PCM once (cached by content,
+sample rate and channel count), looped to the length of ``voice.wav`` and
+ducked wherever the voice is active. The ducking envelope is computed with
+NumPy from the voice itself, so the renderer receives a single finished
+audio track and needs no sidechain filter of its own.
+"""
+
+from pathlib import Path
+import os
+import random
+import wave
+
+from . import audio
+from .cache import StageCache, cache_key, file_digest
+from .executor import run_process
+from .resources import slot
+
+try:
+    import numpy as np
+except Exception:  # pragma: no cover - optional dependency
+    np = None
+
+MUSIC_EXTS = {".mp3", ".wav", ".m4a", ".aac", ".ogg", ".flac"}
+
+
+def pick_track(library: Path, rng: random.Random | None = None) -> Path | None:
+    """Return a random track from *library*, or *library* itself if it is a file."""
+    if library.is_file():
+        return library
+    if not library.is_dir():
+        return None
+    tracks = sorted(p for p in library.iterdir() if p.suffix.lower() in MUSIC_EXTS)
+    return (rng or random).choice(tracks) if tracks else None
+
+
+def decode_track(
+    track: Path,
+    sample_rate: int,
+    channels: int,
+    work_dir: Path,
+    ffmpeg_path: str = "ffmpeg",
+    cache: StageCache | None = None,
+    timeout: float | None = None,
+) -> Path:
+    """Return *track* as 16-bit PCM at *sample_rate*/*channels*.
+
+    Decoded tracks are served straight from *cache* so a track is decoded
+    by ffmpeg only once per format. ffmpeg is killed after *timeout* seconds.
+    """
+    key = cache_key("music", track=file_digest(track), rate=sample_rate, channels=channels)
+    cached = cache.use("music", key, ".wav") if cache is not None else None
+    if cached is not None:
+        return cached
+    out = work_dir / "_music.wav"
+    cmd = [
+        ffmpeg_path,
+        "-y",
+        "-i",
+        track.as_posix(),
+        "-vn",
+        "-ac",
+        str(channels),
+        "-ar",
+        str(sample_rate),
+        "-c:a",
+        "pcm_s16le",
+        out.as_posix(),
+    ]
+    with slot("ffmpeg"):
+        run_process(cmd, timeout, capture_output=True, text=True)
+    if cache is not None:
+        cache.store("music", key, out)
+    return out
+
+
+def duck_envelope(
+    voice,
+    sample_rate: int,
+    duck_db: float = -12.0,
+    threshold_db: float = -40.0,
+    window_ms: int = 20,
+    attack_ms: int = 150,
+    release_ms: int = 500,
+):
+    """Return ``(window_frames, gain_db)``: the music gain per window of *voice*.
+
+    Windows louder than *threshold_db* are voiced. The gain reaches
+    *duck_db* during speech, ramps down over *attack_ms* before it and back
+    up over *release_ms* after it.
+    """
+    win = max(1, sample_rate * window_ms // 1000)
+    power = audio.window_power(voice, win)
+    voiced = 10 * np.log10(power + 1e-12) > threshold_db
+    idx = np.arange(len(voiced))
+    if not voiced.any():
+        return win, np.zeros(len(voiced))
+    # distance in windows to the previous and to the next voiced window
+    prev = np.maximum.accumulate(np.where(voiced, idx, -(10**9)))
+    nxt = np.minimum.accumulate(np.where(voiced, idx, 10**9)[::-1])[::-1]
+    release = max(1, release_ms // window_ms)
+    attack = max(1, attack_ms // window_ms)
+    depth = np.maximum(
+        np.clip(1 - (idx - prev) / release, 0, 1),
+        np.clip(1 - (nxt - idx) / attack, 0, 1),
+    )
+    return win, duck_db * depth
+
+
+def mix_music(
+    voice_path: Path,
+    music_path: Path,
+    out_path: Path,
+    volume_db: float = -20.0,
+    duck_db: float = -12.0,
+    fade_ms: int = 1500,
+) -> None:
+    """Write *voice_path* with *music_path* mixed under it to *out_path*.
+
+    *music_path* must match the voice's sample rate and channel count (see
+    :func:`decode_track`). The music is looped to the voice's length, played
+    at *volume_db*, ducked by a further *duck_db* under speech and faded out
+    over the last *fade_ms*.
+    """
+    if np is None:
+        raise RuntimeError("numpy is not installed")
+    voice, rate = audio.open_pcm(voice_path)
+    music, music_rate = audio.open_pcm(music_path)
+    if music_rate != rate or music.shape[1] != voice.shape[1]:
+        raise ValueError(f"{music_path} does not match the voiceover format")
+    if len(music) == 0:
+        raise ValueError(f"{music_path} is empty")
+    frames = len(voice)
+    win, gain_db = duck_envelope(voice, rate, duck_db)
+    centers = np.arange(len(gain_db)) * win + win / 2
+    fade = max(1, rate * fade_ms // 1000)
+    tmp = out_path.with_name(f".{out_path.stem}_mixing.wav")
+    try:
+        with wave.open(str(tmp), "wb") as out:
+            out.setnchannels(voice.shape[1])
+            out.setsampwidth(2)
+            out.setframerate(rate)
+            for i in range(0, frames, audio._BLOCK):
+                pos = np.arange(i, min(frames, i + audio._BLOCK))
+                db = volume_db + (np.interp(pos, centers, gain_db) if len(gain_db) else 0.0)
+                gain = 10 ** (db / 20) * np.clip((frames - pos) / fade, 0, 1)
+                mixed = voice[pos].astype(np.float32) + music[pos % len(music)] * gain[:, None]
+                out.writeframesraw(np.clip(mixed, -32768, 32767).astype("<i2").tobytes())
+        os.replace(tmp, out_path)
+    finally:
+        tmp.unlink(missing_ok=True)
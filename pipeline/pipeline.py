@@ -1,8 +1,12 @@
 from __future__ import annotations
 
 from pathlib import Path
+import functools
+import shutil
+import os
 import time
 import json
+import wave
 from .helpers import (
     PipelineContext,
     sanitize_name,
@@ -14,9 +18,32 @@ from .helpers import (
 )
 from .voiceover import VoiceOverGenerator
 from .subtitles import SubtitleGenerator
-from .renderer import VideoRenderer
-from .logger import setup_logger
+from .renderer import PreparedBackground, VideoRenderer, concat_clips, prepare_watermark
+from .logger import close_log_file, setup_logger
 from .config import Config
+from .cache import StageCache, cache_key, file_digest
+from .metrics import MetricsRecorder, audio_duration
+from .executor import isolation_available, run_isolated
+from .archive import in_background
+from .models import coqui_models, set_min_free, whisper_models
+from . import align, audio, breaker, music, ratelimit
+from .dag import Graph, Node
+
+# Pipeline stages in declaration order; ``build_graph`` wires them together
+# by the artifacts they consume and produce.
+STAGES = (
+    "voiceover",
+    "trim_silence",
+    "mix_music",
+    "transcribe",
+    "generate_ass",
+    "watermark_prep",
+    "background_prep",
+    "render",
+    "concat",
+)
+# Recorded statuses that let ``resume`` reuse a stage's artifact.
+FINISHED = {"done", "skipped", "cached", "reused"}
 
 
 class VideoPipeline:
@@ -26,6 +53,33 @@ class VideoPipeline:
         self.debug = debug
         self.log_file = log_file
         self.timeout = config.step_timeout
+        self.cache = StageCache(
+            Path(config.cache_dir),
+            config.cache_max_mb * 1024 * 1024,
+            enabled=config.cache_enabled,
+            log_file=log_file,
+            debug=debug,
+        )
+        # sentence-level synthesized audio, shared by every run and script
+        self.tts_cache = StageCache(
+            Path(config.tts_cache_dir),
+            config.tts_cache_max_mb * 1024 * 1024,
+            enabled=config.tts_cache_enabled,
+            log_file=log_file,
+            debug=debug,
+        )
+        self.tts_stats: dict[str, int] = {}
+        self.metrics = MetricsRecorder()
+        coqui_models.set_budget(config.coqui_memory_mb)
+        whisper_models.set_budget(config.whisper_memory_mb)
+        set_min_free(config.model_min_free_mb)
+        # no-op inside a batch worker, which already shares the batch's bucket
+        self.rate_limit = ratelimit.configure(
+            config.elevenlabs_requests_per_s, config.elevenlabs_chars_per_min
+        )
+        self.breaker = breaker.configure(
+            config.elevenlabs_breaker_failures, config.elevenlabs_breaker_cooldown_s
+        )
 
     def run(
         self,
@@ -42,159 +96,849 @@ class VideoPipeline:
         crop_safe: bool = False,
         summary_overlay: bool = False,
     ) -> PipelineContext:
-        style = self.config.subtitle_style
         engine = self.config.voice_engine
-        voice_id = self.config.default_voice_id
         if force_coqui:
             engine = "coqui"
 
-        # resolve background folder
-        bg_styles = self.config.background_styles or {}
-        bg_folder = Path(self.config.background_videos_path)
-        if background:
-            for key, val in bg_styles.items():
-                if key.lower() == background.lower():
-                    bg_folder = Path(val)
-                    break
+        title, out_dir, final_output = self.output_paths(script_name, output)
+        ctx = PipelineContext(
+            script_text=script_text,
+            script_name=title,
+            output_dir=out_dir,
+            subtitle_style=self.config.subtitle_style,
+            voice_engine=engine,
+            voice_id=self.config.default_voice_id,
+            log_file=out_dir / "pipeline.log",
+            debug=self.debug,
+        )
+        ctx.final_video_path = final_output
+        ctx.options = {
+            "background": background,
+            "output": final_output.as_posix(),
+            "force_coqui": force_coqui,
+            "whisper_disable": whisper_disable,
+            "no_subtitles": no_subtitles,
+            "intro": intro.as_posix() if intro else None,
+            "outro": outro.as_posix() if outro else None,
+            "trim_silence": trim_silence,
+            "crop_safe": crop_safe,
+            "overlay_text": script_name if summary_overlay else None,
+        }
+        return self._execute(ctx)
 
+    @staticmethod
+    def output_paths(script_name: str, output: Path | None = None) -> tuple[str, Path, Path]:
+        """Return ``(title, output_dir, final_video)`` for a new run."""
         title = sanitize_name(script_name if script_name not in {"cli", "stdin"} else "session")
         if output:
             final_output = Path(output)
-            out_dir = final_output.parent
-        else:
-            out_dir = Path("output") / f"{title}_{now_ts_folder()}"
-            final_output = out_dir / "final_video.mp4"
-        session_log = out_dir / "pipeline.log"
+            return title, final_output.parent, final_output
+        out_dir = Path("output") / f"{title}_{now_ts_folder()}"
+        return title, out_dir, out_dir / "final_video.mp4"
+
+    def resume(self, output_dir: Path) -> PipelineContext:
+        """Continue the run stored in *output_dir*, reusing finished stages.
+
+        The options and config snapshot recorded by the original run are
+        reused so the resumed run produces the same video.
+        """
+        output_dir = Path(output_dir)
+        meta_path = output_dir / "metadata.json"
+        config_path = output_dir / "session_config.json"
+        try:
+            metadata = json.loads(meta_path.read_text())
+            snapshot = json.loads(config_path.read_text())
+        except (OSError, ValueError) as e:
+            raise ValueError(f"{output_dir} is not a resumable run: {e}") from e
+        options = metadata.get("options")
+        if not isinstance(options, dict):
+            raise ValueError(f"{meta_path} has no recorded run options")
+
+        self.config = Config.from_dict(snapshot)
+        self.timeout = self.config.step_timeout
+        title = metadata.get("title") or "session"
+        script_path = output_dir / f"{title}.txt"
+        if not script_path.exists():
+            raise FileNotFoundError(f"Script file {script_path} does not exist")
 
         ctx = PipelineContext(
-            script_text=script_text,
+            script_text=script_path.read_text(),
             script_name=title,
-            output_dir=out_dir,
-            subtitle_style=style,
-            voice_engine=engine,
-            voice_id=voice_id,
-            log_file=session_log,
+            output_dir=output_dir,
+            subtitle_style=self.config.subtitle_style,
+            voice_engine=options.get("engine") or self.config.voice_engine,
+            voice_id=metadata.get("voice_id") or self.config.default_voice_id,
+            log_file=output_dir / "pipeline.log",
             debug=self.debug,
         )
-        ctx.final_video_path = final_output
+        ctx.final_video_path = Path(options.get("output") or ctx.final_video_path)
+        ctx.options = options
+        ctx.stages = dict(metadata.get("stages") or {})
+        return self._execute(ctx, self.completed_stages(ctx), resumed=True)
+
+    def completed_stages(self, ctx: PipelineContext) -> set[str]:
+        """Return the stages whose recorded status and artifact are usable."""
+        return {
+            stage
+            for stage in STAGES
+            if ctx.stages.get(stage) in FINISHED and self._artifact_valid(stage, ctx)
+        }
+
+    def _artifact_valid(self, stage: str, ctx: PipelineContext) -> bool:
+        if stage in {"voiceover", "trim_silence", "mix_music"}:
+            path = self._render_audio(ctx) if stage == "mix_music" else ctx.voiceover_path
+            try:
+                with wave.open(str(path), "rb") as wf:
+                    return wf.getnframes() > 0
+            except (OSError, EOFError, wave.Error):
+                return False
+        if stage == "transcribe":
+            if ctx.options.get("no_subtitles"):
+                return True
+            try:
+                return isinstance(json.loads(ctx.transcript_path.read_text()), list)
+            except (OSError, ValueError):
+                return False
+        if stage == "generate_ass":
+            if ctx.options.get("no_subtitles"):
+                return ctx.subtitles_path.exists()
+            return ctx.subtitles_path.exists() and ctx.subtitles_path.stat().st_size > 0
+        if stage == "render":
+            path = self._main_output(ctx)
+            if path.exists() and path.stat().st_size > 0:
+                return True
+            # the intermediate render is removed once concat has used it
+            return path != ctx.final_video_path and (
+                ctx.stages.get("concat") in FINISHED and self._artifact_valid("concat", ctx)
+            )
+        if stage == "concat":
+            if self._main_output(ctx) == ctx.final_video_path:
+                return True
+            path = ctx.final_video_path
+            return path.exists() and path.stat().st_size > 0
+        # preparation stages keep their results in memory only
+        return False
+
+    def build_graph(self, ctx: PipelineContext | None = None) -> Graph:
+        """Declare the pipeline stages as a DAG bound to *ctx*.
+
+        Each ``_stage_<name>`` method becomes a node connected to the others
+        through the artifacts it consumes and produces, so background and
+        watermark preparation run alongside the voiceover and transcription.
+        A new stage is one more node here. Without *ctx* the graph can only
+        be inspected, e.g. with :meth:`Graph.to_dot`.
+        """
+        return Graph(
+            [
+                self._node(ctx, "voiceover", (), ("voice_raw",), cached=self._voiceover_cached),
+                self._node(ctx, "trim_silence", ("voice_raw",), ("voice",)),
+                self._node(ctx, "mix_music", ("voice",), ("audio",)),
+                self._node(
+                    ctx, "transcribe", ("voice",), ("transcript",), cached=self._transcript_cached
+                ),
+                self._node(ctx, "generate_ass", ("transcript",), ("subtitles",)),
+                self._node(ctx, "watermark_prep", (), ("watermark",), persistent=False),
+                self._node(ctx, "background_prep", (), ("background",), persistent=False),
+                self._node(
+                    ctx,
+                    "render",
+                    ("audio", "subtitles", "watermark", "background"),
+                    ("video_main",),
+                ),
+                self._node(ctx, "concat", ("video_main",), ("video",)),
+            ]
+        )
+
+    def _node(
+        self,
+        ctx: PipelineContext | None,
+        name: str,
+        inputs: tuple[str, ...],
+        outputs: tuple[str, ...],
+        cached=None,
+        persistent: bool = True,
+    ) -> Node:
+        """Return a node running ``_stage_<name>`` on *ctx* under metrics."""
+        stage = getattr(self, f"_stage_{name}")
 
+        def run() -> str | None:
+            with self.metrics.stage(name, *self._stage_io(name, ctx)) as extra:
+                result = stage(ctx)
+                if result:
+                    extra["status"] = result
+            return result
+
+        def check() -> bool:
+            # a miss is overwritten by the record of the real run
+            with self.metrics.stage(name, *self._stage_io(name, ctx)) as extra:
+                extra["status"] = "cached"
+                return cached(ctx)
+
+        return Node(
+            name,
+            run,
+            inputs,
+            outputs,
+            cached=check if cached else None,
+            persistent=persistent,
+        )
+
+    def _execute(
+        self,
+        ctx: PipelineContext,
+        completed: set[str] = frozenset(),
+        resumed: bool = False,
+    ) -> PipelineContext:
+        session_log = ctx.log_file
         # Reconfigure logger to use session log as well
         setup_logger("pipeline", session_log, self.debug)
+        try:
+            return self._execute_graph(ctx, completed, resumed)
+        finally:
+            # the stage loggers attached the session log too; long-lived
+            # processes (worker, batch, GUI) would otherwise keep every
+            # run's log file open
+            close_log_file(session_log)
+
+    def _execute_graph(
+        self,
+        ctx: PipelineContext,
+        completed: set[str],
+        resumed: bool,
+    ) -> PipelineContext:
         self.logger.info("Starting pipeline")
+        self.cache.reset_stats()
+        self.tts_stats = {}
+        self.metrics = MetricsRecorder()
+        ctx.options["engine"] = ctx.voice_engine
+        ctx.save_config_snapshot(self.config.__dict__)
         status = "success"
-        start = time.time()
-        try:
-            self.logger.info("[1/3] Voiceover generation")
-            # Voiceover
-            voice = VoiceOverGenerator(
-                engine,
-                voice_id,
-                self.config.coqui_model_name,
-                force_coqui=force_coqui,
-                debug=self.debug,
-                log_file=session_log,
-            )
-            try:
-                run_with_timeout(
-                    lambda: voice.generate(ctx.script_text, ctx.voiceover_path),
-                    self.timeout,
-                )
-                if not ctx.voiceover_path.exists() or ctx.voiceover_path.stat().st_size == 0:
-                    raise RuntimeError("voiceover file invalid")
-            except Exception as e:
-                self.logger.error(f"Voiceover step failed: {e}")
-                if self.config.developer_mode:
-                    create_silence(ctx.voiceover_path)
-                    self.logger.warning("Developer mode: using silent audio")
-                else:
-                    raise
-            if trim_silence:
-                self.logger.info("Trimming silence from voiceover")
-                try:
-                    from .helpers import trim_silence_ffmpeg
+        begin = time.time()
+        graph = self.build_graph(ctx)
+        reuse = graph.reusable(completed)
+        start = next((name for name in graph.order() if name not in reuse), None)
+        if resumed:
+            if start is None:
+                self.logger.info(f"All stages in {ctx.output_dir} are complete")
+            else:
+                self.logger.info(f"Resuming {ctx.output_dir} from stage '{start}'")
+        for stage in STAGES:
+            if stage not in reuse:
+                ctx.stages[stage] = "pending"
+        ctx.save_metadata(status="running")
 
-                    trim_silence_ffmpeg(ctx.voiceover_path, self.config.ffmpeg_path)
-                except Exception as e:
-                    self.logger.warning(f"trim_silence failed: {e}")
+        def on_status(stage: str, value: str) -> None:
+            ctx.stages[stage] = value
+            if value != "running":
+                ctx.save_metadata(status="running")
 
-            if not no_subtitles:
-                self.logger.info("[2/3] Generating subtitles")
-                subs = SubtitleGenerator(
-                    style, model=self.config.whisper_model, log_file=session_log, debug=self.debug
-                )
-                try:
-                    if whisper_disable:
-                        self.logger.info("Whisper disabled; generating basic subtitles")
-                        words = [
-                            {"start": i * 0.5, "end": (i + 1) * 0.5, "text": w}
-                            for i, w in enumerate(script_text.split())
-                        ]
-                    else:
-                        words = run_with_timeout(subs.transcribe, self.timeout, ctx.voiceover_path)
-                    run_with_timeout(subs.generate_ass, self.timeout, words, ctx.subtitles_path)
-                except Exception as e:
-                    self.logger.error(f"Subtitle step failed: {e}")
-                    if self.config.developer_mode:
-                        create_dummy_subtitles(ctx.subtitles_path)
-                        self.logger.warning("Developer mode: using dummy subtitles")
-                    else:
-                        raise
-            else:
-                ctx.subtitles_path = ctx.output_dir / "subtitles.ass"
-                ctx.subtitles_path.write_text("")
-                self.logger.info("Subtitles disabled")
-
-            self.logger.info("[3/3] Rendering video")
-            # Render
-            watermark_path = (
-                Path(self.config.watermark_path)
-                if self.config.watermark_enabled and self.config.watermark_path
-                else None
-            )
-            renderer = VideoRenderer(
-                bg_folder,
-                watermark_path,
-                self.config.watermark_opacity,
-                resolution=self.config.resolution,
-                ffmpeg_path=self.config.ffmpeg_path,
-                log_file=session_log,
-                debug=self.debug,
-            )
-            run_with_timeout(
-                renderer.render,
-                self.timeout,
-                ctx.voiceover_path,
-                None if no_subtitles else ctx.subtitles_path,
-                ctx.final_video_path,
-                intro,
-                outro,
-                crop_safe=crop_safe,
-                overlay_text=script_name if summary_overlay else None,
-            )
+        try:
+            graph.run(completed, on_status=on_status)
         except Exception as e:
             status = "failed"
             self.logger.error(f"Pipeline failed: {e}")
             ctx.write_error_trace(e)
             log_trace(e)
             ctx.save_metadata(status=status)
-            ctx.save_config_snapshot(self.config.__dict__)
             ctx.write_summary()
-            ctx.archive()
+            summary = self._run_summary(ctx, status, begin, start, resumed)
+            self._save_run_summary(ctx, summary)
+            self._archive(ctx, summary)
             raise
+        finally:
+            ctx.handles.clear()
 
-        duration = f"{int(time.time() - start)}s"
         ctx.save_metadata(status=status)
-        run_summary = {
+        ctx.write_summary()
+        summary = self._run_summary(ctx, status, begin, start, resumed)
+        self._save_run_summary(ctx, summary)
+        self._archive(ctx, summary)
+        self.logger.info(f"Pipeline completed. Video at {ctx.final_video_path}")
+        return ctx
+
+    def _run_summary(
+        self,
+        ctx: PipelineContext,
+        status: str,
+        begin: float,
+        start: str | None,
+        resumed: bool,
+    ) -> dict:
+        return {
             "script": ctx.script_path.name,
             "voice": ctx.voice_engine.capitalize() if ctx.voice_engine else "",
             "style": ctx.subtitle_style,
-            "duration": duration,
+            "duration": f"{int(time.time() - begin)}s",
             "success": status == "success",
+            "resumed_from": (start or "complete") if resumed else None,
+            "cache": self.cache.stats,
+            "tts_cache": self.tts_stats,
+            "script_chars": len(ctx.script_text),
+            "elevenlabs": {**self.rate_limit.stats(), "breaker": self.breaker.stats()},
+            "models": {"coqui": coqui_models.stats(), "whisper": whisper_models.stats()},
+            **self.metrics.report(audio_duration(ctx.voiceover_path)),
         }
+
+    def _save_run_summary(self, ctx: PipelineContext, summary: dict) -> None:
         with open(ctx.output_dir / "run_summary.json", "w") as f:
-            json.dump(run_summary, f, indent=2)
-        ctx.save_config_snapshot(self.config.__dict__)
-        ctx.write_summary()
-        ctx.archive()
-        self.logger.info(f"Pipeline completed. Video at {ctx.final_video_path}")
-        return ctx
+            json.dump(summary, f, indent=2)
+
+    def _archive(self, ctx: PipelineContext, summary: dict) -> None:
+        """Zip the run folder according to ``config.archive_mode``.
+
+        ``"background"`` returns immediately and leaves the future on
+        ``ctx.archive_future``; ``"sync"`` archives before returning and
+        ``"off"`` skips archiving.
+        """
+        mode = self.config.archive_mode
+        if mode == "off":
+            return
+        metrics = self.metrics
+        exclude = self.config.archive_exclude or ()
+        store_media = self.config.archive_store_media
+
+        def archive() -> None:
+            zip_path = ctx.output_dir.with_suffix(".zip")
+            try:
+                with metrics.stage("archive", outputs=[zip_path]) as extra:
+                    extra["input_bytes"] = sum(
+                        p.stat().st_size for p in ctx.output_dir.rglob("*") if p.is_file()
+                    )
+                    ctx.archive(exclude, store_media)
+            except Exception as e:
+                self.logger.warning(f"Archiving {ctx.output_dir} failed: {e}")
+                return
+            # the zip holds the summary written before archiving; refresh the
+            # on-disk copy so it includes the archive figures
+            summary["stages"]["archive"] = metrics.report(summary["audio_duration_s"])[
+                "stages"
+            ]["archive"]
+            self._save_run_summary(ctx, summary)
+
+        if mode == "background":
+            ctx.archive_future = in_background(archive)
+        else:
+            archive()
+
+    def _announce(self, stage: str, message: str) -> None:
+        """Log *message* numbered by the position of *stage* in ``STAGES``."""
+        self.logger.info(f"[{STAGES.index(stage) + 1}/{len(STAGES)}] {message}")
+
+    def _stage_io(self, stage: str, ctx: PipelineContext | None) -> tuple[list, list]:
+        """Return the (inputs, outputs) measured for *stage*."""
+        if ctx is None:
+            return [], []
+        if stage == "voiceover":
+            return [len(ctx.script_text.encode("utf-8"))], [ctx.voiceover_path]
+        if stage == "trim_silence":
+            return [self._speech_audio(ctx)], [ctx.voiceover_path]
+        if stage == "mix_music":
+            return [ctx.voiceover_path], [ctx.mix_path]
+        if stage == "transcribe":
+            return [self._speech_audio(ctx)], [ctx.transcript_path]
+        if stage == "generate_ass":
+            return [ctx.transcript_path], [ctx.subtitles_path]
+        if stage == "render":
+            return [self._render_audio(ctx), ctx.subtitles_path], [self._main_output(ctx)]
+        if stage == "concat":
+            return [self._main_output(ctx)], [ctx.final_video_path]
+        return [], []
+
+    # ------------------------------------------------------------------
+    # Stages. Each returns None when done or "skipped" when not applicable.
+    # ------------------------------------------------------------------
+
+    def _stage_voiceover(self, ctx: PipelineContext) -> str | None:
+        self._announce("voiceover", "Voiceover generation")
+        voice = self._voice(ctx)
+        # left by an older voiceover in this folder
+        for stale in (ctx.raw_voice_path, ctx.chunks_path, ctx.timings_path):
+            stale.unlink(missing_ok=True)
+        if ctx.voice_engine == "coqui" or self.config.voice_hedge_after_s > 0:
+            # load here, under the step timeout, so the model stays resident
+            # for later runs in this process; isolated stage workers inherit it
+            run_with_timeout(voice.warmup, self.timeout)
+        try:
+            _, used, self.tts_stats, timings = self._call(
+                lambda: (
+                    voice.generate(ctx.script_text, ctx.voiceover_path),
+                    voice.used_engine,
+                    voice.tts_stats,
+                    voice.word_timings,
+                )
+            )
+            if not ctx.voiceover_path.exists() or ctx.voiceover_path.stat().st_size == 0:
+                raise RuntimeError("voiceover file invalid")
+            if timings:
+                ctx.timings_path.write_text(json.dumps(timings))
+            # store under the engine that actually produced the audio so
+            # a Coqui fallback never answers a later ElevenLabs lookup
+            key = self.voiceover_key(ctx.script_text, voice.voice_id, used or ctx.voice_engine)
+            self.cache.store("voiceover", key, ctx.voiceover_path)
+            if ctx.chunks_path.exists():
+                self.cache.store("voiceover_chunks", key, ctx.chunks_path)
+            if ctx.timings_path.exists():
+                self.cache.store("voiceover_timings", key, ctx.timings_path)
+        except Exception as e:
+            self.logger.error(f"Voiceover step failed: {e}")
+            if self.config.developer_mode:
+                create_silence(ctx.voiceover_path)
+                self.logger.warning("Developer mode: using silent audio")
+            else:
+                raise
+        finally:
+            if self.config.voice_hedge_after_s > 0:
+                # a racer killed along with the stage worker cannot clean up
+                voice.discard_racers(ctx.voiceover_path)
+        return None
+
+    def _stage_trim_silence(self, ctx: PipelineContext) -> str | None:
+        """Condition and retime ``voice.wav``, keeping the TTS output as ``voice_raw.wav``.
+
+        Transcripts and chunk maps stay on the raw timeline and are mapped
+        through ``conditioning.json``, so changing these settings never
+        re-runs TTS or Whisper.
+        """
+        trim = ctx.options.get("trim_silence")
+        rate = self.config.speech_rate
+        if not trim and rate == 1.0:
+            if ctx.raw_voice_path.exists():  # conditioned by an earlier attempt
+                os.replace(ctx.raw_voice_path, ctx.voiceover_path)
+            ctx.conditioning_path.unlink(missing_ok=True)
+            return "skipped"
+        if not audio.available():
+            if rate != 1.0:
+                self.logger.warning("numpy not installed; speech_rate is ignored")
+            if trim:
+                self.logger.warning("numpy not installed; trimming silence with ffmpeg")
+                try:
+                    from .helpers import trim_silence_ffmpeg
+
+                    self._call(
+                        trim_silence_ffmpeg,
+                        ctx.voiceover_path,
+                        self.config.ffmpeg_path,
+                        self.timeout,
+                    )
+                except Exception as e:
+                    self.logger.warning(f"trim_silence failed: {e}")
+            return None
+        self.logger.info("Conditioning voiceover audio")
+        if not ctx.raw_voice_path.exists():
+            os.replace(ctx.voiceover_path, ctx.raw_voice_path)
+        shutil.copyfile(ctx.raw_voice_path, ctx.voiceover_path)
+        try:
+            report = self._call(self._condition, ctx.voiceover_path, trim, rate)
+        except Exception as e:
+            self.logger.warning(f"Audio conditioning failed; using the raw voiceover: {e}")
+            shutil.copyfile(ctx.raw_voice_path, ctx.voiceover_path)
+            ctx.conditioning_path.unlink(missing_ok=True)
+            return None
+        report.save(ctx.conditioning_path)
+        removed = sum(end - start for start, end in report.removed) / report.sample_rate
+        self.logger.info(
+            f"Removed {removed:.2f}s of silence in {len(report.removed)} cuts, "
+            f"gain {report.gain_db:+.1f} dB, speech rate {rate:g}x"
+        )
+        return None
+
+    def _condition(self, path: Path, trim: bool, rate: float) -> audio.Conditioning:
+        if trim:
+            report = audio.condition_wav(
+                path,
+                threshold_db=self.config.silence_threshold_db,
+                max_pause_ms=self.config.max_pause_ms,
+                target_dbfs=self.config.loudness_target_dbfs,
+            )
+        else:
+            with wave.open(str(path), "rb") as wf:
+                report = audio.Conditioning(wf.getframerate(), wf.getnframes())
+        if rate != 1.0:
+            audio.time_stretch(path, rate)
+            report.speech_rate = rate
+        return report
+
+    def _timeline(self, ctx: PipelineContext, records: list[dict]) -> list[dict]:
+        """Map *records* timed on the raw voiceover onto ``voice.wav``."""
+        if not ctx.raw_voice_path.exists() or not ctx.conditioning_path.exists():
+            return records
+        return audio.Conditioning.load(ctx.conditioning_path).shift_records(records)
+
+    def _speech_audio(self, ctx: PipelineContext) -> Path:
+        """Return the audio to transcribe: the raw TTS output when conditioned."""
+        return ctx.raw_voice_path if ctx.raw_voice_path.exists() else ctx.voiceover_path
+
+    def _stage_mix_music(self, ctx: PipelineContext) -> str | None:
+        ctx.mix_path.unlink(missing_ok=True)
+        if not self.config.music_enabled:
+            return "skipped"
+        if not audio.available():
+            self.logger.warning("numpy not installed; rendering without music")
+            return "skipped"
+        track = music.pick_track(Path(self.config.music_path))
+        if track is None:
+            self.logger.warning(f"No music tracks found in {self.config.music_path}")
+            return "skipped"
+        self.logger.info(f"Mixing music bed: {track.name}")
+        try:
+            self._call(self._mix, ctx, track)
+        except Exception as e:
+            ctx.mix_path.unlink(missing_ok=True)
+            self.logger.warning(f"Music mixing failed; rendering the voice alone: {e}")
+        return None
+
+    def _mix(self, ctx: PipelineContext, track: Path) -> None:
+        with wave.open(str(ctx.voiceover_path), "rb") as wf:
+            rate, channels = wf.getframerate(), wf.getnchannels()
+        pcm = music.decode_track(
+            track,
+            rate,
+            channels,
+            ctx.output_dir,
+            self.config.ffmpeg_path,
+            self.cache,
+            timeout=self.timeout,
+        )
+        try:
+            music.mix_music(
+                ctx.voiceover_path,
+                pcm,
+                ctx.mix_path,
+                volume_db=self.config.music_volume_db,
+                duck_db=self.config.music_duck_db,
+            )
+        finally:
+            if pcm.parent == ctx.output_dir:
+                pcm.unlink(missing_ok=True)
+
+    def _render_audio(self, ctx: PipelineContext) -> Path:
+        """Return the audio track to render: the music mix when there is one."""
+        return ctx.mix_path if ctx.mix_path.exists() else ctx.voiceover_path
+
+    def _stage_transcribe(self, ctx: PipelineContext) -> str | None:
+        if ctx.options.get("no_subtitles"):
+            return "skipped"
+        self._announce("transcribe", "Generating subtitles")
+        try:
+            words = self._engine_timings(ctx)
+            if words is None and self._aligning(ctx):
+                words = self._align(ctx)
+            if words is not None:
+                ctx.transcript_path.write_text(json.dumps(words))
+            elif ctx.options.get("whisper_disable"):
+                self.logger.info("Whisper disabled; generating basic subtitles")
+                words = [
+                    {"start": i * 0.5, "end": (i + 1) * 0.5, "text": w}
+                    for i, w in enumerate(ctx.script_text.split())
+                ]
+                ctx.transcript_path.write_text(json.dumps(words))
+            else:
+                self._transcribe(self._subtitle_generator(ctx), ctx)
+        except Exception as e:
+            self.logger.error(f"Subtitle step failed: {e}")
+            if self.config.developer_mode:
+                ctx.transcript_path.write_text("[]")
+                self.logger.warning("Developer mode: using dummy subtitles")
+            else:
+                raise
+        return None
+
+    def _has_engine_timings(self, ctx: PipelineContext) -> bool:
+        if self.config.engine_timings and ctx.timings_path.exists():
+            return True
+        return self.config.chunk_timings and ctx.chunks_path.exists() and audio.available()
+
+    def _engine_timings(self, ctx: PipelineContext) -> list[dict] | None:
+        """Return word timings from the TTS engine, or ``None`` to transcribe.
+
+        ElevenLabs reports them per character (``timings.json``). With
+        ``chunk_timings``, the chunk map of other voiceovers anchors each
+        synthesized sentence and its words are aligned within it.
+        """
+        if not self._has_engine_timings(ctx):
+            return None
+        try:
+            if self.config.engine_timings and ctx.timings_path.exists():
+                words = json.loads(ctx.timings_path.read_text())
+                source = "ElevenLabs"
+            else:
+                chunks = json.loads(ctx.chunks_path.read_text())
+                regions = align.speech_regions(self._speech_audio(ctx))
+                words = align.align_chunks(chunks, regions)
+                source = f"the chunk map ({len(chunks)} chunks)"
+        except Exception as e:
+            self.logger.warning(f"Engine timings unusable; transcribing instead: {e}")
+            return None
+        if not words:
+            return None
+        self.logger.info(f"Using {len(words)} word timings from {source}; skipping Whisper")
+        return words
+
+    def _aligning(self, ctx: PipelineContext) -> bool:
+        return bool(ctx.options.get("whisper_disable")) or self.config.subtitle_timing == "align"
+
+    def _align(self, ctx: PipelineContext) -> list[dict] | None:
+        """Time the script's words against the voiceover, or ``None`` if that fails."""
+        if not audio.available():
+            self.logger.warning("numpy not installed; cannot align subtitles to the audio")
+            return None
+        start = time.perf_counter()
+        try:
+            words = align.align(ctx.script_text, self._speech_audio(ctx))
+        except Exception as e:
+            self.logger.warning(f"Subtitle alignment failed: {e}")
+            return None
+        if not words:
+            self.logger.warning("No speech found to align subtitles to")
+            return None
+        self.logger.info(
+            f"Aligned {len(words)} words to the script in "
+            f"{(time.perf_counter() - start) * 1000:.0f} ms"
+        )
+        return words
+
+    def _stage_generate_ass(self, ctx: PipelineContext) -> str | None:
+        if ctx.options.get("no_subtitles"):
+            ctx.subtitles_path.write_text("")
+            self.logger.info("Subtitles disabled")
+            return None
+        subs = self._subtitle_generator(ctx)
+        try:
+            words = self._timeline(ctx, json.loads(ctx.transcript_path.read_text()))
+            self._call(subs.generate_ass, words, ctx.subtitles_path)
+        except Exception as e:
+            self.logger.error(f"Subtitle step failed: {e}")
+            if self.config.developer_mode:
+                create_dummy_subtitles(ctx.subtitles_path)
+                self.logger.warning("Developer mode: using dummy subtitles")
+            else:
+                raise
+        return None
+
+    def _stage_watermark_prep(self, ctx: PipelineContext) -> str | None:
+        watermark = self.watermark_path()
+        if watermark is None:
+            return "skipped"
+        try:
+            ctx.handles["watermark"] = prepare_watermark(
+                watermark,
+                self.config.watermark_opacity,
+                ctx.output_dir,
+                self.config.ffmpeg_path,
+                self.cache,
+                self.timeout,
+            )
+        except Exception as e:
+            self.logger.warning(f"Watermark preparation failed; using original image: {e}")
+            ctx.handles["watermark"] = watermark
+        return None
+
+    def _stage_background_prep(self, ctx: PipelineContext) -> str | None:
+        ctx.handles["background"] = self._prepare_background(ctx)
+        return None
+
+    def _stage_render(self, ctx: PipelineContext) -> str | None:
+        self._announce("render", "Rendering video")
+        renderer, prepared = ctx.handles["background"]
+        renderer.watermark = ctx.handles.get("watermark")
+        opts = ctx.options
+        try:
+            self._call(
+                renderer.render,
+                self._render_audio(ctx),
+                None if opts.get("no_subtitles") else ctx.subtitles_path,
+                self._main_output(ctx),
+                crop_safe=opts.get("crop_safe", False),
+                overlay_text=opts.get("overlay_text"),
+                cache=self.cache,
+                background=prepared,
+                timeout=self.timeout,
+            )
+        finally:
+            if prepared.prescaled:
+                prepared.path.unlink(missing_ok=True)
+            if renderer.watermark and renderer.watermark.parent == ctx.output_dir:
+                renderer.watermark.unlink(missing_ok=True)
+        return None
+
+    def _stage_concat(self, ctx: PipelineContext) -> str | None:
+        main_output = self._main_output(ctx)
+        if main_output == ctx.final_video_path:
+            return "skipped"
+        opts = ctx.options
+        clips = [Path(opts["intro"])] if opts.get("intro") else []
+        clips.append(main_output)
+        if opts.get("outro"):
+            clips.append(Path(opts["outro"]))
+        for clip in clips:
+            if not clip.exists():
+                raise FileNotFoundError(f"Concat input not found: {clip}")
+        self.logger.info("Joining intro/outro clips")
+        self._call(
+            concat_clips,
+            clips,
+            ctx.final_video_path,
+            self.config.ffmpeg_path,
+            timeout=self.timeout,
+        )
+        main_output.unlink(missing_ok=True)
+        return None
+
+    # ------------------------------------------------------------------
+    # Cache checks consulted by the scheduler before running a stage.
+    # ------------------------------------------------------------------
+
+    def _voiceover_cached(self, ctx: PipelineContext) -> bool:
+        key = self.voiceover_key(ctx.script_text, self._voice(ctx).voice_id, ctx.voice_engine)
+        if not self.cache.fetch("voiceover", key, ctx.voiceover_path):
+            return False
+        for stale in (ctx.raw_voice_path, ctx.chunks_path, ctx.timings_path):
+            stale.unlink(missing_ok=True)
+        self.cache.fetch("voiceover_chunks", key, ctx.chunks_path)
+        self.cache.fetch("voiceover_timings", key, ctx.timings_path)
+        return True
+
+    def _transcript_cached(self, ctx: PipelineContext) -> bool:
+        if ctx.options.get("no_subtitles") or self._aligning(ctx):
+            return False
+        if self._has_engine_timings(ctx):
+            return False
+        key = self.transcript_key(self._speech_audio(ctx))
+        if not self.cache.fetch("transcribe", key, ctx.transcript_path):
+            return False
+        try:
+            json.loads(ctx.transcript_path.read_text())
+        except ValueError as e:
+            self.logger.warning(f"Cached transcript unreadable: {e}")
+            return False
+        return True
+
+    def _prepare_background(
+        self, ctx: PipelineContext
+    ) -> tuple[VideoRenderer, PreparedBackground]:
+        renderer = VideoRenderer(
+            self.background_folder(ctx.options.get("background")),
+            resolution=self.config.resolution,
+            ffmpeg_path=self.config.ffmpeg_path,
+            log_file=ctx.log_file,
+            debug=self.debug,
+        )
+        prepared = renderer.prepare_background(
+            ctx.output_dir,
+            prescale=self.config.prescale_backgrounds,
+            cache=self.cache,
+            timeout=self.timeout,
+        )
+        return renderer, prepared
+
+    # ------------------------------------------------------------------
+
+    def _call(self, func, *args, **kwargs):
+        """Run a stage body under the step timeout.
+
+        With ``stage_isolation = "process"`` the body runs in a worker process
+        whose process group is killed on timeout; cache counters and metrics
+        recorded there are merged back into this pipeline.
+        """
+        if self.config.stage_isolation != "process" or not isolation_available():
+            return run_with_timeout(func, self.timeout, *args, **kwargs)
+
+        @functools.wraps(func)
+        def body():
+            self.cache.reset_stats()
+            self.metrics.stages = {}
+            value = func(*args, **kwargs)
+            return value, self.cache.stats, self.metrics.stages
+
+        value, stats, stages = run_isolated(body, self.timeout)
+        self.cache.merge_stats(stats)
+        self.metrics.stages.update(stages)
+        return value
+
+    def background_folder(self, background: str | None) -> Path:
+        bg_styles = self.config.background_styles or {}
+        bg_folder = Path(self.config.background_videos_path)
+        if background:
+            for key, val in bg_styles.items():
+                if key.lower() == background.lower():
+                    bg_folder = Path(val)
+                    break
+        return bg_folder
+
+    def _subtitle_generator(self, ctx: PipelineContext) -> SubtitleGenerator:
+        return SubtitleGenerator(
+            ctx.subtitle_style,
+            model=self.config.whisper_model,
+            log_file=ctx.log_file,
+            debug=self.debug,
+        )
+
+    def _transcribe(self, subs: SubtitleGenerator, ctx: PipelineContext) -> list[dict]:
+        """Transcribe the voiceover and store the transcript in the cache."""
+        audio_path = self._speech_audio(ctx)
+        # load here, under the step timeout, so the model stays resident for
+        # later runs in this process; isolated stage workers inherit it
+        run_with_timeout(subs.warmup, self.timeout)
+        words = self._call(subs.transcribe, audio_path)
+        ctx.transcript_path.write_text(json.dumps(words, default=float))
+        if words:
+            self.cache.store("transcribe", self.transcript_key(audio_path), ctx.transcript_path)
+        return words
+
+    def transcript_key(self, audio: Path) -> str:
+        return cache_key(
+            "transcribe",
+            audio=file_digest(audio),
+            model=self.config.whisper_model,
+        )
+
+    def _voice(self, ctx: PipelineContext) -> VoiceOverGenerator:
+        return VoiceOverGenerator(
+            ctx.voice_engine,
+            ctx.voice_id,
+            self.config.coqui_model_name,
+            force_coqui=ctx.options.get("force_coqui", False),
+            debug=self.debug,
+            log_file=ctx.log_file,
+            chunk_chars=self.config.voice_chunk_chars,
+            coqui_workers=self.config.voice_workers or min(os.cpu_count() or 1, 8),
+            elevenlabs_concurrency=self.config.elevenlabs_concurrency,
+            chunk_silence_ms=self.config.chunk_silence_ms,
+            paragraph_silence_ms=self.config.paragraph_silence_ms,
+            chunks_path=ctx.chunks_path,
+            tts_cache=self.tts_cache if self.tts_cache.enabled else None,
+            tts_cache_sentences=self.config.tts_cache_sentences,
+            elevenlabs_retries=self.config.elevenlabs_retries,
+            hedge_after_s=self.config.voice_hedge_after_s,
+            hedge_grace_s=self.config.voice_hedge_grace_s,
+            voice_catalog=self.config.voice_catalog(),
+            timings=self.config.engine_timings,
+        )
+
+    def voiceover_key(self, text: str, voice_id: str | None, engine: str) -> str:
+        return cache_key(
+            "voiceover",
+            engine=engine,
+            text=text,
+            voice_id=voice_id,
+            model=self.config.coqui_model_name,
+            chunking=[
+                self.config.voice_chunk_chars,
+                self.config.chunk_silence_ms,
+                self.config.paragraph_silence_ms,
+                # the TTS cache synthesizes one sentence per chunk
+                self.config.tts_cache_enabled,
+            ],
+        )
+
+    def _main_output(self, ctx: PipelineContext) -> Path:
+        """Return the render target; intro/outro runs render an intermediate clip."""
+        if ctx.options.get("intro") or ctx.options.get("outro"):
+            return ctx.final_video_path.with_name("_main.mp4")
+        return ctx.final_video_path
+
+    def watermark_path(self) -> Path | None:
+        if not self.config.watermark_enabled or not self.config.watermark_path:
+            return None
+        path = Path(self.config.watermark_path)
+        return path if path.exists() else None
@@ -0,0 +1,323 @@
+from __future__ import annotations
+
+"""Dry-run execution plans with wall-time predictions from past runs."""
+
+from dataclasses import dataclass, field
+from pathlib import Path
+from statistics import median
+import json
+import shlex
+
+from . import audio
+from .config import Config
+from .metrics import audio_duration
+from .pipeline import STAGES, VideoPipeline
+from .renderer import VideoRenderer
+from .resources import DEFAULT_LIMITS
+from .voiceover import VoiceOverGenerator
+
+# Narration speed assumed when no past run relates script length to audio.
+CHARS_PER_SECOND = 15.0
+
+# What drives each stage's duration: script characters, audio seconds, or
+# nothing (a roughly constant cost).
+DRIVERS = {
+    "voiceover": "chars",
+    "trim_silence": "audio",
+    "mix_music": "audio",
+    "transcribe": "audio",
+    "generate_ass": "audio",
+    "watermark_prep": None,
+    "background_prep": None,
+    "render": "audio",
+    "concat": "audio",
+}
+
+
+class History:
+    """Per-stage timing model built from ``run_summary.json`` files."""
+
+    def __init__(self, summaries: list[dict]):
+        self.summaries = [s for s in summaries if s.get("success") and s.get("stages")]
+
+    @classmethod
+    def load(cls, root: Path = Path("output")) -> "History":
+        summaries = []
+        for path in sorted(Path(root).glob("*/run_summary.json")):
+            try:
+                summaries.append(json.loads(path.read_text()))
+            except (OSError, ValueError):
+                continue
+        return cls(summaries)
+
+    def __len__(self) -> int:
+        return len(self.summaries)
+
+    def seconds_per_char(self) -> float:
+        ratios = [
+            s["audio_duration_s"] / s["script_chars"]
+            for s in self.summaries
+            if s.get("audio_duration_s") and s.get("script_chars")
+        ]
+        return median(ratios) if ratios else 1 / CHARS_PER_SECOND
+
+    def predict(self, stage: str, chars: int, audio_s: float) -> float | None:
+        """Return the predicted wall time of *stage*, or None without data.
+
+        Only runs where the stage actually executed count; cache hits and
+        skips would understate the cost.
+        """
+        driver = DRIVERS.get(stage)
+        samples = []
+        for summary in self.summaries:
+            record = summary["stages"].get(stage)
+            if not record or record.get("status") != "done":
+                continue
+            if driver is None:
+                samples.append(record["wall_s"])
+                continue
+            amount = summary.get("script_chars" if driver == "chars" else "audio_duration_s")
+            if amount:
+                samples.append(record["wall_s"] / amount)
+        if not samples:
+            return None
+        rate = median(samples)
+        if driver is None:
+            return rate
+        return rate * (chars if driver == "chars" else audio_s)
+
+
+@dataclass
+class StagePlan:
+    name: str
+    action: str  # "run", "cached" or "skip"
+    predicted_s: float | None = None
+    resource: str | None = None
+
+
+@dataclass
+class ExecutionPlan:
+    script_name: str
+    script_chars: int
+    audio_s: float
+    audio_estimated: bool
+    output: Path
+    background_folder: Path | None = None
+    background_clip: Path | None = None
+    ffmpeg_command: list[str] = field(default_factory=list)
+    stages: list[StagePlan] = field(default_factory=list)
+    history_runs: int = 0
+    errors: list[str] = field(default_factory=list)
+
+    @property
+    def predicted_s(self) -> float:
+        return sum(s.predicted_s or 0.0 for s in self.stages if s.action == "run")
+
+    @property
+    def unknown(self) -> list[str]:
+        """Stages that will run but have no timing history."""
+        return [s.name for s in self.stages if s.action == "run" and s.predicted_s is None]
+
+    def to_dict(self) -> dict:
+        return {
+            "script": self.script_name,
+            "script_chars": self.script_chars,
+            "audio_s": round(self.audio_s, 1),
+            "audio_estimated": self.audio_estimated,
+            "output": self.output.as_posix(),
+            "background_folder": str(self.background_folder) if self.background_folder else None,
+            "background_clip": str(self.background_clip) if self.background_clip else None,
+            "ffmpeg_command": self.ffmpeg_command,
+            "stages": [
+                {
+                    "name": s.name,
+                    "action": s.action,
+                    "predicted_s": None if s.predicted_s is None else round(s.predicted_s, 1),
+                }
+                for s in self.stages
+            ],
+            "predicted_s": round(self.predicted_s, 1),
+            "history_runs": self.history_runs,
+            "errors": self.errors,
+        }
+
+    def format(self) -> str:
+        audio = f"{self.audio_s:.1f}s" + (" (estimated)" if self.audio_estimated else "")
+        lines = [
+            f"Plan for {self.script_name}: {self.script_chars} chars, audio {audio}",
+            f"  output: {self.output}",
+            f"  background: {self.background_folder} -> {self.background_clip}",
+        ]
+        for stage in self.stages:
+            eta = "" if stage.action != "run" else (
+                "  ~?" if stage.predicted_s is None else f"  ~{stage.predicted_s:.1f}s"
+            )
+            lines.append(f"  {stage.name:<16}{stage.action}{eta}")
+        lines.append(
+            f"  predicted wall time: {format_duration(self.predicted_s)}"
+            f" (from {self.history_runs} past runs)"
+        )
+        if self.unknown:
+            lines.append(f"  no history for: {', '.join(self.unknown)}")
+        if self.ffmpeg_command:
+            lines.append(f"  ffmpeg: {shlex.join(self.ffmpeg_command)}")
+        lines.extend(f"  error: {e}" for e in self.errors)
+        return "\n".join(lines)
+
+
+def format_duration(seconds: float) -> str:
+    minutes, sec = divmod(int(round(seconds)), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}h{minutes:02d}m{sec:02d}s" if hours else f"{minutes}m{sec:02d}s"
+
+
+class Planner:
+    """Build :class:`ExecutionPlan` objects without running anything.
+
+    Cache state is inspected read-only, and the background clip and ffmpeg
+    command are resolved exactly as a run would (a run picks its own random
+    clip from the same folder).
+    """
+
+    def __init__(self, config: Config, history: History | None = None):
+        self.config = config
+        self.pipeline = VideoPipeline(config)
+        self.history = history if history is not None else History.load()
+
+    def plan(
+        self,
+        script_text: str,
+        script_name: str,
+        background: str | None = None,
+        output: Path | None = None,
+        force_coqui: bool = False,
+        whisper_disable: bool = False,
+        no_subtitles: bool = False,
+        intro: Path | None = None,
+        outro: Path | None = None,
+        trim_silence: bool = False,
+        crop_safe: bool = False,
+        summary_overlay: bool = False,
+        voice_id: str | None = None,
+    ) -> ExecutionPlan:
+        """Plan a run of :meth:`VideoPipeline.run` with the same arguments.
+
+        *voice_id* overrides ``config.default_voice_id`` like a batch item.
+        """
+        cfg = self.config
+        cache = self.pipeline.cache
+        engine = "coqui" if force_coqui else cfg.voice_engine
+        title, out_dir, final_output = VideoPipeline.output_paths(script_name, output)
+        chars = len(script_text)
+        # engine timings come from ElevenLabs itself or, opted in, from the chunk map
+        engine_timed = (cfg.engine_timings and engine == "elevenlabs") or (
+            cfg.chunk_timings and cfg.voice_chunk_chars > 0 and audio.available()
+        )
+        skip_whisper = whisper_disable or cfg.subtitle_timing == "align" or engine_timed
+
+        voice_id = VoiceOverGenerator(
+            engine, voice_id or cfg.default_voice_id, cfg.coqui_model_name
+        ).voice_id
+        cached_voice = cache.lookup(
+            "voiceover", self.pipeline.voiceover_key(script_text, voice_id, engine), ".wav"
+        )
+        audio_s = audio_duration(cached_voice) if cached_voice else None
+        plan = ExecutionPlan(
+            script_name=title,
+            script_chars=chars,
+            audio_s=audio_s or chars * self.history.seconds_per_char(),
+            audio_estimated=audio_s is None,
+            output=final_output,
+            history_runs=len(self.history),
+        )
+
+        actions = {stage: "run" for stage in STAGES}
+        if cached_voice:
+            actions["voiceover"] = "cached"
+        if not trim_silence and cfg.speech_rate == 1.0:
+            actions["trim_silence"] = "skip"
+        if no_subtitles:
+            actions["transcribe"] = "skip"
+        elif cached_voice and not skip_whisper:
+            # transcripts are keyed on the raw voiceover, before conditioning
+            key = self.pipeline.transcript_key(cached_voice)
+            if cache.contains("transcribe", key, ".json"):
+                actions["transcribe"] = "cached"
+        watermark = self.pipeline.watermark_path()
+        if watermark is None:
+            actions["watermark_prep"] = "skip"
+        if not cfg.music_enabled:
+            actions["mix_music"] = "skip"
+        if not (intro or outro):
+            actions["concat"] = "skip"
+
+        resources = {
+            "voiceover": "elevenlabs" if engine == "elevenlabs" else "inference",
+            "transcribe": None if skip_whisper else "inference",
+            "trim_silence": None if audio.available() else "ffmpeg",
+            # the mix is NumPy; only the first use of a track is decoded by ffmpeg
+            "mix_music": None,
+            "render": "ffmpeg",
+            "concat": "ffmpeg",
+        }
+        for stage in STAGES:
+            action = actions[stage]
+            predicted = (
+                self.history.predict(stage, chars, plan.audio_s) if action == "run" else None
+            )
+            if stage == "transcribe" and skip_whisper and action == "run":
+                predicted = 0.0
+            plan.stages.append(StagePlan(stage, action, predicted, resources.get(stage)))
+
+        try:
+            folder = self.pipeline.background_folder(background)
+            renderer = VideoRenderer(
+                folder, resolution=cfg.resolution, ffmpeg_path=cfg.ffmpeg_path
+            )
+            plan.background_folder = renderer.bg_folder
+            plan.background_clip = renderer.pick_background()
+        except FileNotFoundError as e:
+            plan.errors.append(str(e))
+            return plan
+
+        if watermark is not None and cfg.watermark_opacity < 1.0:
+            watermark = out_dir / "_watermark.png"
+        renderer.watermark = watermark
+        clip = plan.background_clip
+        if cfg.prescale_backgrounds:
+            clip = out_dir / "_background.mp4"
+        main_output = final_output.with_name("_main.mp4") if intro or outro else final_output
+        plan.ffmpeg_command = renderer.build_command(
+            clip,
+            out_dir / ("mix.wav" if cfg.music_enabled else "voice.wav"),
+            None if no_subtitles else out_dir / "subtitles.ass",
+            main_output,
+            crop_safe=crop_safe,
+            overlay_text=script_name if summary_overlay else None,
+        )
+        return plan
+
+
+def estimate_batch(
+    plans: list[ExecutionPlan], jobs: int = 1, limits: dict[str, int] | None = None
+) -> float:
+    """Return the predicted wall time of running *plans* with *jobs* workers.
+
+    The estimate is the larger of the evenly shared total and the time the
+    busiest resource needs given its ``resource_limits`` slots.
+    """
+    jobs = max(1, jobs)
+    total = sum(p.predicted_s for p in plans)
+    if jobs == 1:
+        return total
+    limits = {**DEFAULT_LIMITS, **(limits or {})}
+    busy: dict[str, float] = {}
+    for plan in plans:
+        for stage in plan.stages:
+            if stage.action == "run" and stage.resource and stage.predicted_s:
+                busy[stage.resource] = busy.get(stage.resource, 0.0) + stage.predicted_s
+    bound = max(
+        (t / min(jobs, max(1, int(limits.get(r, jobs)))) for r, t in busy.items()),
+        default=0.0,
+    )
+    return max(total / jobs, bound)
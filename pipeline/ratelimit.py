@@ -0,0 +1,148 @@
+from __future__ import annotations
+
+"""Token-bucket scheduling of ElevenLabs calls shared by batch workers.
+
+The bucket state lives in shared memory, so every process that inherits it
+(batch pool workers, forked stage workers, chunk threads) draws from the
+same request and character budget. Like :mod:`pipeline.resources`, a batch
+creates one bucket and installs it in each worker; a single run installs a
+process-local one on first use.
+"""
+
+from email.utils import parsedate_to_datetime
+import multiprocessing
+import random
+import time
+
+# indices into the shared state array
+_REQ, _CHARS, _REFILL, _BLOCKED, _QUEUE, _MAX_QUEUE = range(6)
+_REQUESTS, _USED_CHARS, _WAITED, _THROTTLED, _RETRIES = range(6, 11)
+_FIELDS = 11
+
+
+class TokenBucket:
+    """Requests-per-second and characters-per-minute budget.
+
+    ``chars_per_min`` of 0 leaves characters unlimited. A 429 response pauses
+    every caller until its ``Retry-After`` has passed.
+    """
+
+    def __init__(self, requests_per_s: float = 2.0, chars_per_min: int = 0, mp_context=None):
+        mp_context = mp_context or multiprocessing.get_context()
+        self.requests_per_s = max(0.01, float(requests_per_s))
+        self.chars_per_min = max(0, int(chars_per_min))
+        self.burst = max(1.0, self.requests_per_s)
+        state = [0.0] * _FIELDS
+        state[_REQ] = self.burst
+        state[_CHARS] = float(self.chars_per_min)
+        state[_REFILL] = time.time()
+        self._state = mp_context.Array("d", state)
+
+    def _refill(self, now: float) -> None:
+        s = self._state
+        elapsed = max(0.0, now - s[_REFILL])
+        s[_REFILL] = now
+        s[_REQ] = min(self.burst, s[_REQ] + elapsed * self.requests_per_s)
+        if self.chars_per_min:
+            s[_CHARS] = min(self.chars_per_min, s[_CHARS] + elapsed * self.chars_per_min / 60)
+
+    def acquire(self, chars: int = 0) -> float:
+        """Block until one request of *chars* characters may be sent.
+
+        Returns the seconds spent waiting.
+        """
+        s = self._state
+        # a request larger than the whole budget waits for a full bucket
+        need = min(chars, self.chars_per_min) if self.chars_per_min else 0
+        start = time.time()
+        with s.get_lock():
+            s[_QUEUE] += 1
+            s[_MAX_QUEUE] = max(s[_MAX_QUEUE], s[_QUEUE])
+        while True:
+            with s.get_lock():
+                now = time.time()
+                self._refill(now)
+                wait = s[_BLOCKED] - now
+                if wait <= 0:
+                    wait = max(
+                        (1 - s[_REQ]) / self.requests_per_s,
+                        (need - s[_CHARS]) * 60 / self.chars_per_min if need else 0.0,
+                    )
+                    if wait <= 0:
+                        s[_REQ] -= 1
+                        s[_CHARS] -= need
+                        s[_QUEUE] -= 1
+                        s[_REQUESTS] += 1
+                        s[_USED_CHARS] += chars
+                        waited = now - start
+                        s[_WAITED] += waited
+                        return waited
+            time.sleep(min(wait, 1.0))
+
+    def pause(self, seconds: float) -> None:
+        """Hold back every caller for *seconds* (a 429 with ``Retry-After``)."""
+        with self._state.get_lock():
+            self._state[_BLOCKED] = max(self._state[_BLOCKED], time.time() + seconds)
+            self._state[_THROTTLED] += 1
+
+    def record_retry(self) -> None:
+        with self._state.get_lock():
+            self._state[_RETRIES] += 1
+
+    def stats(self) -> dict:
+        """Return usage, quota and queue-depth counters."""
+        s = self._state
+        with s.get_lock():
+            self._refill(time.time())
+            return {
+                "requests": int(s[_REQUESTS]),
+                "chars": int(s[_USED_CHARS]),
+                "wait_s": round(s[_WAITED], 3),
+                "throttled": int(s[_THROTTLED]),
+                "retries": int(s[_RETRIES]),
+                "queue_depth": int(s[_QUEUE]),
+                "max_queue_depth": int(s[_MAX_QUEUE]),
+                "requests_per_s": self.requests_per_s,
+                "chars_per_min": self.chars_per_min or None,
+                "chars_available": int(s[_CHARS]) if self.chars_per_min else None,
+            }
+
+
+def backoff_delay(attempt: int, base: float = 1.0, cap: float = 30.0) -> float:
+    """Exponential backoff with full jitter for retry *attempt* (0-based)."""
+    return random.uniform(0, min(cap, base * 2**attempt))
+
+
+def parse_retry_after(value: str | None) -> float | None:
+    """Return the delay of a ``Retry-After`` header (seconds or HTTP date)."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+_bucket: TokenBucket | None = None
+
+
+def install(bucket: TokenBucket | None) -> None:
+    """Use *bucket* in this process (the batch pool initializer)."""
+    global _bucket
+    _bucket = bucket
+
+
+def configure(requests_per_s: float, chars_per_min: int) -> TokenBucket:
+    """Return the installed bucket, creating a process-local one if needed."""
+    global _bucket
+    if _bucket is None:
+        _bucket = TokenBucket(requests_per_s, chars_per_min)
+    return _bucket
+
+
+def bucket() -> TokenBucket | None:
+    return _bucket
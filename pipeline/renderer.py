@@ -1,12 +1,98 @@
 from __future__ import annotations
 
+import json
 import random
 import subprocess
+from dataclasses import dataclass
 from pathlib import Path
 from typing import Optional
 import shutil
 
 from .logger import setup_logger
+from .cache import StageCache, cache_key, file_digest, path_inputs
+from .executor import run_process
+from .resources import slot
+
+
+@dataclass
+class PreparedBackground:
+    """Background clip chosen and probed ahead of the render."""
+
+    clip: Path
+    path: Path
+    duration: float | None = None
+    width: int | None = None
+    height: int | None = None
+    prescaled: bool = False
+
+
+def concat_clips(
+    clips: list[Path],
+    output_path: Path,
+    ffmpeg_path: str = "ffmpeg",
+    timeout: float | None = None,
+) -> None:
+    """Join *clips* into *output_path* with ffmpeg's concat demuxer (no re-encode).
+
+    ffmpeg is killed after *timeout* seconds.
+    """
+    listing = output_path.with_name("concat.txt")
+    with open(listing, "w") as f:
+        for clip in clips:
+            f.write(f"file '{clip.as_posix()}'\n")
+    cmd = [
+        ffmpeg_path,
+        "-y",
+        "-f",
+        "concat",
+        "-safe",
+        "0",
+        "-i",
+        listing.as_posix(),
+        "-c",
+        "copy",
+        output_path.as_posix(),
+    ]
+    try:
+        with slot("ffmpeg"):
+            run_process(cmd, timeout)
+    finally:
+        listing.unlink(missing_ok=True)
+
+
+def prepare_watermark(
+    watermark: Path,
+    opacity: float,
+    work_dir: Path,
+    ffmpeg_path: str = "ffmpeg",
+    cache: StageCache | None = None,
+    timeout: float | None = None,
+) -> Path:
+    """Return *watermark* with *opacity* baked into a PNG in *work_dir*.
+
+    Opaque watermarks are returned unchanged. The converted image is cached
+    by content and opacity. ffmpeg is killed after *timeout* seconds.
+    """
+    if opacity >= 1.0:
+        return watermark
+    out = work_dir / "_watermark.png"
+    key = cache_key("watermark", image=file_digest(watermark), opacity=round(opacity, 3))
+    if cache is not None and cache.fetch("watermark", key, out):
+        return out
+    cmd = [
+        ffmpeg_path,
+        "-y",
+        "-i",
+        watermark.as_posix(),
+        "-vf",
+        f"format=rgba,colorchannelmixer=aa={max(opacity, 0.0):.3f}",
+        out.as_posix(),
+    ]
+    with slot("ffmpeg"):
+        run_process(cmd, timeout, capture_output=True, text=True)
+    if cache is not None:
+        cache.store("watermark", key, out)
+    return out
 
 
 class VideoRenderer:
@@ -27,6 +113,8 @@ class VideoRenderer:
         self.opacity = opacity
         self.resolution = resolution
         self.ffmpeg = ffmpeg_path
+        ff = Path(ffmpeg_path)
+        self.ffprobe = str(ff.with_name(ff.name.replace("ffmpeg", "ffprobe")))
         if not shutil.which(self.ffmpeg):
             self.logger.warning(f"ffmpeg executable '{self.ffmpeg}' not found")
 
@@ -89,55 +177,119 @@ class VideoRenderer:
         self.logger.info(f"Selected background video {choice}")
         return choice
 
-    def render(
-        self,
-        audio_path: Path,
-        subtitles: Path | None,
-        output_path: Path,
-        intro: Path | None = None,
-        outro: Path | None = None,
-        crop_safe: bool = False,
-        overlay_text: str | None = None,
-    ):
-        """Render the final video using *audio_path* and optional *subtitles*.
+    def probe(self, video: Path, timeout: float | None = None) -> dict:
+        """Return duration and size of *video* using ffprobe, if available.
 
-        Automatically switches to ``-filter_complex`` when a watermark and
-        subtitles are both present. All paths are converted to POSIX style to
-        avoid Windows escaping issues.
+        ffprobe is killed after *timeout* seconds and the clip treated as
+        unprobed.
         """
-        self.logger.info("Starting FFmpeg render")
-
-        output_path.parent.mkdir(parents=True, exist_ok=True)
-        if not audio_path.exists():
-            raise FileNotFoundError(f"Audio file not found: {audio_path}")
-        if subtitles and not subtitles.exists():
-            self.logger.warning(f"Subtitle file not found: {subtitles}")
-            subtitles = None
-        if intro and not intro.exists():
-            raise FileNotFoundError(f"Intro clip not found: {intro}")
-        if outro and not outro.exists():
-            raise FileNotFoundError(f"Outro clip not found: {outro}")
-
-        if output_path.suffix.lower() != ".mp4":
-            raise ValueError("Output path must end with .mp4")
-
-        bg_video = self.pick_background()
-
-        # simple wav validation
+        if not shutil.which(self.ffprobe):
+            return {}
         try:
-            import wave
+            result = run_process(
+                [
+                    self.ffprobe,
+                    "-v",
+                    "error",
+                    "-select_streams",
+                    "v:0",
+                    "-show_entries",
+                    "stream=width,height:format=duration",
+                    "-of",
+                    "json",
+                    str(video),
+                ],
+                timeout,
+                capture_output=True,
+                text=True,
+            )
+            data = json.loads(result.stdout)
+        except (subprocess.SubprocessError, OSError, ValueError) as e:  # TimeoutError included
+            self.logger.warning(f"ffprobe failed for {video}: {e}")
+            return {}
+        stream = (data.get("streams") or [{}])[0]
+        info = {"width": stream.get("width"), "height": stream.get("height")}
+        if data.get("format", {}).get("duration"):
+            info["duration"] = float(data["format"]["duration"])
+        return info
 
-            with wave.open(str(audio_path), "rb") as _:
-                pass
-        except Exception as e:
-            self.logger.error(f"Invalid audio file {audio_path}: {e}")
-            raise
+    def prepare_background(
+        self,
+        work_dir: Path | None = None,
+        prescale: bool = False,
+        cache: StageCache | None = None,
+        timeout: float | None = None,
+    ) -> PreparedBackground:
+        """Pick and probe the background clip independently of the audio.
 
-        self.logger.info(f"Using background video {bg_video}")
+        With *prescale*, a clip whose size differs from the target resolution
+        is scaled once into *work_dir* (served from *cache* when possible) so
+        the final render only has to composite. The probe and a scale taking
+        longer than *timeout* seconds are killed and the original clip used.
+        """
+        clip = self.pick_background()
+        info = self.probe(clip, timeout)
+        prepared = PreparedBackground(
+            clip=clip,
+            path=clip,
+            duration=info.get("duration"),
+            width=info.get("width"),
+            height=info.get("height"),
+        )
+        width, height = (int(v) for v in self.resolution.split("x"))
+        if (
+            not prescale
+            or work_dir is None
+            or not prepared.width
+            or (prepared.width, prepared.height) == (width, height)
+        ):
+            return prepared
 
+        scaled = work_dir / "_background.mp4"
+        key = cache_key("background", clip=path_inputs([clip]), resolution=self.resolution)
+        if cache is None or not cache.fetch("background", key, scaled):
+            cmd = [
+                self.ffmpeg,
+                "-y",
+                "-i",
+                clip.as_posix(),
+                "-vf",
+                f"scale={width}:{height}",
+                "-an",
+                "-c:v",
+                "libx264",
+                "-preset",
+                "veryfast",
+                scaled.as_posix(),
+            ]
+            self.logger.info(f"Pre-scaling background {clip.name} to {self.resolution}")
+            try:
+                with slot("ffmpeg"):
+                    run_process(cmd, timeout, capture_output=True, text=True)
+            except (subprocess.CalledProcessError, OSError) as e:  # TimeoutError included
+                self.logger.warning(f"Background pre-scale failed; using original clip: {e}")
+                scaled.unlink(missing_ok=True)
+                return prepared
+            if cache is not None:
+                cache.store("background", key, scaled)
+        prepared.path = scaled
+        prepared.prescaled = True
+        prepared.width, prepared.height = width, height
+        return prepared
+
+    def build_command(
+        self,
+        bg_video: Path,
+        audio_path: Path,
+        subtitles: Path | None,
+        output_path: Path,
+        crop_safe: bool = False,
+        overlay_text: str | None = None,
+    ) -> list[str]:
+        """Return the ffmpeg argument list rendering *output_path*."""
         bg = bg_video.as_posix()
         audio = audio_path.as_posix()
-        subs = subtitles.as_posix() if subtitles and subtitles.exists() else None
+        subs = subtitles.as_posix() if subtitles else None
         wm = self.watermark.as_posix() if self.watermark else None
 
         base_cmd = [self.ffmpeg, "-y", "-i", bg, "-i", audio]
@@ -188,51 +340,127 @@ class VideoRenderer:
             vf = ";".join(vf_parts) if wm and not subs else ",".join(vf_parts)
             cmd = base_cmd + ["-vf", vf]
 
-        main_output = output_path
-        if intro or outro:
-            main_output = output_path.with_name("_main.mp4")
+        cmd += ["-s", self.resolution, output_path.as_posix()]
+        return cmd
 
-        cmd += ["-s", self.resolution, main_output.as_posix()]
+    def render_key(
+        self,
+        cmd: list[str],
+        bg_video: Path,
+        audio_path: Path,
+        subtitles: Path | None,
+        output_path: Path,
+        source: Path | None = None,
+    ) -> str:
+        """Return the cache key for *cmd* independent of the run folder.
 
-        self.logger.debug("FFmpeg command: " + " ".join(cmd))
+        Files written into the run folder (audio, subtitles, the converted
+        watermark, a pre-scaled background) are replaced by tokens and keyed
+        by content instead. *source* is the library clip *bg_video* was
+        scaled from, if any.
+        """
+        replacements = {
+            audio_path.as_posix(): "<audio>",
+            output_path.as_posix(): "<output>",
+            bg_video.as_posix(): "<background>",
+        }
+        if subtitles:
+            replacements[subtitles.as_posix()] = "<subtitles>"
+        if self.watermark:
+            replacements[self.watermark.as_posix()] = "<watermark>"
+        args = []
+        for arg in cmd[1:]:
+            for path, token in replacements.items():
+                arg = arg.replace(path, token)
+            args.append(arg)
+        return cache_key(
+            "render",
+            args=args,
+            audio=file_digest(audio_path),
+            subtitles=file_digest(subtitles) if subtitles and subtitles.exists() else None,
+            watermark=file_digest(self.watermark) if self.watermark else None,
+            background=path_inputs([source or bg_video]),
+        )
+
+    def render(
+        self,
+        audio_path: Path,
+        subtitles: Path | None,
+        output_path: Path,
+        crop_safe: bool = False,
+        overlay_text: str | None = None,
+        cache: StageCache | None = None,
+        background: PreparedBackground | None = None,
+        timeout: float | None = None,
+    ):
+        """Render the final video using *audio_path* and optional *subtitles*.
+
+        Automatically switches to ``-filter_complex`` when a watermark and
+        subtitles are both present. All paths are converted to POSIX style to
+        avoid Windows escaping issues. When *cache* is given, an identical
+        ffmpeg invocation on identical inputs is served from the cache.
+        *background* is a clip from :meth:`prepare_background`; without it a
+        clip is picked here. ffmpeg is killed after *timeout* seconds.
+        """
+        self.logger.info("Starting FFmpeg render")
+
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        if not audio_path.exists():
+            raise FileNotFoundError(f"Audio file not found: {audio_path}")
+        if subtitles and not subtitles.exists():
+            self.logger.warning(f"Subtitle file not found: {subtitles}")
+            subtitles = None
+
+        if output_path.suffix.lower() != ".mp4":
+            raise ValueError("Output path must end with .mp4")
 
+        bg_video = background.path if background else self.pick_background()
+
+        # simple wav validation
         try:
-            result = subprocess.run(cmd, check=True, capture_output=True, text=True)
-            if result.stdout:
-                self.logger.debug(result.stdout)
-            if result.stderr:
-                self.logger.debug(result.stderr)
-        except subprocess.CalledProcessError as e:
-            self.logger.error(f"ffmpeg failed: {e.stderr}")
+            import wave
+
+            with wave.open(str(audio_path), "rb") as _:
+                pass
+        except Exception as e:
+            self.logger.error(f"Invalid audio file {audio_path}: {e}")
             raise
 
-        if not main_output.exists() or main_output.stat().st_size == 0:
-            raise RuntimeError("Render produced no output")
-
-        if intro or outro:
-            concat = output_path.with_name("concat.txt")
-            with open(concat, "w") as f:
-                if intro:
-                    f.write(f"file '{intro.as_posix()}'\n")
-                f.write(f"file '{main_output.as_posix()}'\n")
-                if outro:
-                    f.write(f"file '{outro.as_posix()}'\n")
-            cmd2 = [
-                self.ffmpeg,
-                "-y",
-                "-f",
-                "concat",
-                "-safe",
-                "0",
-                "-i",
-                concat.as_posix(),
-                "-c",
-                "copy",
-                output_path.as_posix(),
-            ]
-            subprocess.run(cmd2, check=True)
-            main_output.unlink(missing_ok=True)
-            concat.unlink(missing_ok=True)
+        self.logger.info(f"Using background video {bg_video}")
+
+        cmd = self.build_command(
+            bg_video,
+            audio_path,
+            subtitles,
+            output_path,
+            crop_safe=crop_safe,
+            overlay_text=overlay_text,
+        )
+
+        self.logger.debug("FFmpeg command: " + " ".join(cmd))
+
+        key = None
+        if cache is not None and cache.enabled:
+            source = background.clip if background and background.prescaled else None
+            key = self.render_key(cmd, bg_video, audio_path, subtitles, output_path, source)
+        if key and cache.fetch("render", key, output_path):
+            self.logger.info("Reusing cached render")
+        else:
+            try:
+                with slot("ffmpeg"):
+                    result = run_process(cmd, timeout, capture_output=True, text=True)
+                if result.stdout:
+                    self.logger.debug(result.stdout)
+                if result.stderr:
+                    self.logger.debug(result.stderr)
+            except subprocess.CalledProcessError as e:
+                self.logger.error(f"ffmpeg failed: {e.stderr}")
+                raise
+
+            if not output_path.exists() or output_path.stat().st_size == 0:
+                raise RuntimeError("Render produced no output")
+            if key:
+                cache.store("render", key, output_path)
 
         self.logger.info(f"Render complete: {output_path}")
 
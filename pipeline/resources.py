@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+"""Per-resource concurrency limits shared by batch worker processes.
+
+Stages wrap their expensive section in ``slot(<resource>)``. Outside a
+parallel batch no limits are installed and ``slot`` is a no-op.
+"""
+
+from contextlib import contextmanager
+from typing import Iterator
+import multiprocessing
+import os
+import sys
+import time
+
+RESOURCES = ("elevenlabs", "inference", "ffmpeg")
+DEFAULT_LIMITS = {"elevenlabs": 4, "inference": 2, "ffmpeg": 2}
+
+_POLL_S = 0.05
+
+_limits: dict = {}
+
+
+def _alive(pid: int) -> bool:
+    if sys.platform == "win32":  # os.kill(pid, 0) would terminate it
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+class SlotPool:
+    """Process-shared semaphore whose units are freed when their holder dies.
+
+    Every unit records the pid holding it in shared memory, so a unit held
+    by a process that was killed (a stage worker on timeout, a batch worker)
+    is taken over by the next caller instead of leaking.
+    """
+
+    def __init__(self, size: int, mp_context=None):
+        mp_context = mp_context or multiprocessing.get_context()
+        self._holders = mp_context.Array("i", max(1, int(size)))
+
+    def acquire(self, block: bool = True) -> bool:
+        pid = os.getpid()
+        while True:
+            with self._holders.get_lock():
+                for i, holder in enumerate(self._holders):
+                    if not holder or not _alive(holder):
+                        self._holders[i] = pid
+                        return True
+            if not block:
+                return False
+            time.sleep(_POLL_S)
+
+    def release(self) -> None:
+        pid = os.getpid()
+        with self._holders.get_lock():
+            for i, holder in enumerate(self._holders):
+                if holder == pid:
+                    self._holders[i] = 0
+                    return
+        raise ValueError("slot released more times than acquired")
+
+    def __enter__(self) -> "SlotPool":
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.release()
+
+
+def create_limits(limits: dict[str, int] | None = None, mp_context=None) -> dict:
+    """Return a process-shared :class:`SlotPool` per resource in *limits* merged over the defaults."""
+    merged = {**DEFAULT_LIMITS, **(limits or {})}
+    return {name: SlotPool(n, mp_context) for name, n in merged.items()}
+
+
+def install(limits: dict) -> None:
+    """Use *limits* in this process (the batch pool initializer)."""
+    global _limits
+    _limits = limits
+
+
+@contextmanager
+def slot(resource: str) -> Iterator[None]:
+    """Hold one unit of *resource* for the duration of the block."""
+    sem = _limits.get(resource)
+    if sem is None:
+        yield
+        return
+    with sem:
+        yield
@@ -4,8 +4,12 @@ from pathlib import Path
 from typing import List, Optional
 import subprocess
 import json
+import time
 from .logger import setup_logger
 from .helpers import create_dummy_subtitles
+from .metrics import audio_duration
+from .models import whisper_models
+from .resources import slot
 
 
 class SubtitleGenerator:
@@ -25,12 +29,33 @@ class SubtitleGenerator:
         except Exception as e:
             self.logger.error(f"Whisper not available: {e}")
             return []
-        model = whisper.load_model(self.model_name)
-        result = model.transcribe(str(audio_path), word_timestamps=True)
+        model = whisper_models.get(self.model_name, lambda: whisper.load_model(self.model_name))
+        with slot("inference"):
+            start = time.perf_counter()
+            result = model.transcribe(str(audio_path), word_timestamps=True)
+            elapsed = time.perf_counter() - start
         words = result.get("segments", [])
-        self.logger.info(f"Transcription complete: {len(words)} segments")
+        duration = audio_duration(audio_path)
+        rtf = f", realtime factor {elapsed / duration:.2f}" if duration else ""
+        self.logger.info(
+            f"Transcription complete: {len(words)} segments in {elapsed:.1f}s{rtf}"
+        )
         return words
 
+    def warmup(self) -> bool:
+        """Load the Whisper model into the process-wide registry."""
+        try:
+            import whisper
+        except Exception as e:
+            self.logger.warning(f"Whisper not available: {e}")
+            return False
+        try:
+            whisper_models.get(self.model_name, lambda: whisper.load_model(self.model_name))
+        except Exception as e:
+            self.logger.warning(f"Whisper warmup failed: {e}")
+            return False
+        return True
+
     def generate_ass(self, words: List[dict], output_path: Path):
         self.logger.info(f"Generating {self.style} subtitles")
         if not words:
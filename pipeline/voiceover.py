@@ -1,22 +1,55 @@
 from __future__ import annotations
 
 import os
-try:
-    import requests
-except Exception:  # pragma: no cover - missing dependency in tests
-    requests = None
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, ThreadPoolExecutor, wait
 from pathlib import Path
 from typing import Optional
+import copy
+import json
+import multiprocessing
+import shutil
+import sys
+import threading
+import time
+import wave
 try:
     from dotenv import load_dotenv
 except Exception:  # pragma: no cover - missing dependency in tests
     def load_dotenv():
         pass
 from .logger import setup_logger
+from .cache import StageCache, cache_key
+from .chunking import Chunk, normalize_text, split_script, stitch_wavs, write_chunk_map
+from .elevenlabs import (
+    PCM_RATE as ELEVENLABS_PCM_RATE,
+    ElevenLabsError,
+    SynthesisCancelled,
+    get_client,
+)
+from .models import coqui_models
+from . import breaker, ratelimit
+from .align import words_from_characters
+from .ratelimit import backoff_delay
+from .resources import slot
+from .voices import VoiceCatalog
 
 load_dotenv()
 
 
+def _init_coqui_worker() -> None:
+    # one inference thread per worker process; the pool provides the parallelism
+    torch = sys.modules.get("torch")
+    if torch is not None:
+        torch.set_num_threads(1)
+
+
+def _coqui_chunk(model_name: str, text: str, path: str) -> bool:
+    """Synthesize one chunk in a Coqui pool worker."""
+    return VoiceOverGenerator("coqui", coqui_model_name=model_name)._generate_coqui(
+        text, Path(path)
+    )
+
+
 class VoiceOverGenerator:
     def __init__(
         self,
@@ -26,7 +59,35 @@ class VoiceOverGenerator:
         force_coqui: bool = False,
         debug: bool = False,
         log_file: Optional[Path] = None,
+        chunk_chars: int = 0,
+        coqui_workers: int = 1,
+        elevenlabs_concurrency: int = 1,
+        chunk_silence_ms: int = 250,
+        paragraph_silence_ms: int = 600,
+        chunks_path: Optional[Path] = None,
+        tts_cache: Optional[StageCache] = None,
+        tts_cache_sentences: bool = False,
+        elevenlabs_retries: int = 4,
+        hedge_after_s: float = 0.0,
+        hedge_grace_s: float = 0.5,
+        voice_catalog: Optional[VoiceCatalog] = None,
+        timings: bool = False,
     ):
+        """*chunk_chars* > 0 splits scripts into sentence chunks synthesized
+        by up to *coqui_workers* processes or *elevenlabs_concurrency*
+        concurrent requests; chunk boundaries are written to *chunks_path*.
+        With a *tts_cache*, only chunks missing from the cache are synthesized;
+        *tts_cache_sentences* makes every sentence its own chunk, so edits
+        re-synthesize less at the cost of one request per sentence and of
+        the context TTS uses for prosody across sentences. ElevenLabs calls draw from the installed
+        :mod:`pipeline.ratelimit` bucket and are retried *elevenlabs_retries*
+        times on 429 and 5xx responses, unless the installed
+        :mod:`pipeline.breaker` is open. With *hedge_after_s* > 0, Coqui is
+        started when ElevenLabs has not finished after that many seconds and
+        the first valid result wins (ElevenLabs if it finishes within
+        *hedge_grace_s* of Coqui). With *timings*, ElevenLabs word timings
+        are kept in ``word_timings`` (seconds into the generated audio).
+        """
         self.engine = engine
         self.voice_id = voice_id
         self.coqui_model_name = coqui_model_name or "tts_models/en/ljspeech/tacotron2-DDC"
@@ -34,6 +95,25 @@ class VoiceOverGenerator:
         self.logger = setup_logger("voiceover", log_file, debug)
         self.api_key = os.getenv("ELEVENLABS_API_KEY")
         self.voice_id = voice_id or os.getenv("ELEVENLABS_VOICE_ID")
+        self.used_engine: str | None = None
+        self.chunk_chars = chunk_chars
+        self.coqui_workers = max(1, coqui_workers)
+        self.elevenlabs_concurrency = max(1, elevenlabs_concurrency)
+        self.chunk_silence_ms = chunk_silence_ms
+        self.paragraph_silence_ms = paragraph_silence_ms
+        self.tts_cache = tts_cache
+        self.tts_cache_sentences = tts_cache_sentences
+        self.tts_stats: dict[str, int] = {}
+        self.elevenlabs_retries = max(0, elevenlabs_retries)
+        self.chunks_path = chunks_path
+        self.hedge_after_s = hedge_after_s
+        self.hedge_grace_s = hedge_grace_s
+        self.cancel = threading.Event()  # set to abandon an in-flight synthesis
+        self.voice_catalog = voice_catalog
+        self.timings = timings
+        self.word_timings: list[dict] | None = None
+        # word timings per written file, filled by ElevenLabs requests
+        self._file_timings: dict[Path, list[dict] | None] = {}
 
     def generate(self, text: str, output_path: Path) -> bool:
         """Generate speech for *text* and save it to *output_path*."""
@@ -41,6 +121,7 @@ class VoiceOverGenerator:
             self.logger.error("No script text provided for voiceover")
             return False
         output_path.parent.mkdir(parents=True, exist_ok=True)
+        self.word_timings = None
 
         engine = self.engine
         if self.force_coqui:
@@ -50,71 +131,323 @@ class VoiceOverGenerator:
         if engine == "elevenlabs":
             if not self.api_key or not self.voice_id:
                 self.logger.error("ElevenLabs voice ID not found. Falling back to Coqui TTS.")
-                return self._generate_coqui(text, output_path)
-            if self._generate_elevenlabs(text, output_path):
+                return self._coqui(text, output_path)
+            if self.hedge_after_s > 0:
+                return self._hedged(text, output_path)
+            if self._synthesize("elevenlabs", text, output_path):
                 ok = output_path.exists() and output_path.stat().st_size > 0
                 if ok:
+                    self.used_engine = "elevenlabs"
                     self.logger.info(f"Voiceover saved to {output_path}")
                 return ok
             self.logger.error("ElevenLabs generation failed. Falling back to Coqui TTS.")
-            return self._generate_coqui(text, output_path)
+            return self._coqui(text, output_path)
+
+        return self._coqui(text, output_path)
+
+    def _racer_paths(self, engine: str, output_path: Path) -> tuple[Path, Path | None]:
+        """Return the temporary audio and chunk map paths of the *engine* racer."""
+        chunks = self.chunks_path
+        return (
+            output_path.with_name(f".{output_path.stem}_{engine}{output_path.suffix}"),
+            chunks.with_name(f".{engine}_{chunks.name}") if chunks else None,
+        )
+
+    def _racer(self, engine: str, output_path: Path) -> tuple["VoiceOverGenerator", Path]:
+        """Return a copy of this generator writing to its own temporary files."""
+        racer = copy.copy(self)
+        racer.cancel = threading.Event()
+        out, racer.chunks_path = self._racer_paths(engine, output_path)
+        return racer, out
+
+    def discard_racers(self, output_path: Path) -> None:
+        """Remove files left by hedged racers that were killed mid-synthesis."""
+        for engine in ("elevenlabs", "coqui"):
+            _discard(*self._racer_paths(engine, output_path))
+
+    def _hedged(self, text: str, output_path: Path) -> bool:
+        racers = {engine: self._racer(engine, output_path) for engine in ("elevenlabs", "coqui")}
+
+        def race(engine: str) -> bool:
+            racer, out = racers[engine]
+            return racer._synthesize(engine, text, out) and out.exists() and out.stat().st_size > 0
+
+        def valid(future: Future) -> bool:
+            return future.done() and future.exception() is None and future.result()
+
+        pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="hedge")
+        eleven = pool.submit(race, "elevenlabs")
+        futures = {eleven: "elevenlabs"}
+        wait([eleven], timeout=self.hedge_after_s)
+        if not valid(eleven):
+            if eleven.done():
+                self.logger.error("ElevenLabs generation failed. Falling back to Coqui TTS.")
+            else:
+                self.logger.info(
+                    f"ElevenLabs not done after {self.hedge_after_s:.1f}s; starting Coqui in parallel"
+                )
+            futures[pool.submit(race, "coqui")] = "coqui"
+        winner = None
+        pending = set(futures)
+        while pending and winner is None:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            finished = {futures[f] for f in done if valid(f)}
+            if "elevenlabs" in finished:
+                winner = "elevenlabs"
+            elif "coqui" in finished:
+                winner = "coqui"
+                if not eleven.done():
+                    wait([eleven], timeout=self.hedge_grace_s)
+                    if valid(eleven):
+                        winner = "elevenlabs"
+
+        for future, engine in futures.items():
+            if engine == winner:
+                continue
+            racer, out = racers[engine]
+            racer.cancel.set()
+            # runs now if the loser already finished, otherwise when it stops
+            future.add_done_callback(lambda _, r=racer, o=out: _discard(o, r.chunks_path))
+        pool.shutdown(wait=False, cancel_futures=True)
+        if winner is None:
+            return False
+        racer, out = racers[winner]
+        os.replace(out, output_path)
+        if racer.chunks_path and racer.chunks_path.exists():
+            os.replace(racer.chunks_path, self.chunks_path)
+        self.used_engine = winner
+        self.tts_stats = racer.tts_stats
+        self.word_timings = racer.word_timings
+        self.logger.info(f"Hedged voiceover won by {winner}; saved to {output_path}")
+        return True
+
+    def _coqui(self, text: str, output_path: Path) -> bool:
+        ok = self._synthesize("coqui", text, output_path)
+        if ok:
+            self.used_engine = "coqui"
+        return ok
+
+    def _synthesize(self, engine: str, text: str, output_path: Path) -> bool:
+        """Generate *text* with *engine*, chunked when ``chunk_chars`` is set."""
+        if not self.chunk_chars:
+            single = self._generate_elevenlabs if engine == "elevenlabs" else self._generate_coqui
+            ok = single(text, output_path)
+            self.word_timings = self._file_timings.pop(output_path, None) if ok else None
+            return ok
+        per_sentence = self.tts_cache is not None and self.tts_cache_sentences
+        chunks = split_script(text, self.chunk_chars, per_sentence=per_sentence)
+        if not chunks:
+            return False
+        return self._generate_chunks(engine, chunks, output_path)
+
+    def _tts_key(self, engine: str, text: str) -> str:
+        model = (
+            self.coqui_model_name if engine == "coqui" else f"default:pcm_{ELEVENLABS_PCM_RATE}"
+        )
+        return cache_key(
+            "tts", engine=engine, voice_id=self.voice_id, model=model, text=normalize_text(text)
+        )
+
+    def _generate_chunks(self, engine: str, chunks: list[Chunk], output_path: Path) -> bool:
+        work = output_path.parent / f".{output_path.stem}_chunks"
+        work.mkdir(parents=True, exist_ok=True)
+        paths = [work / f"chunk_{c.index:03d}.wav" for c in chunks]
+        start = time.perf_counter()
+        cache = self.tts_cache
+        keys = [self._tts_key(engine, c.text) for c in chunks] if cache else []
+        todo = [
+            i for i in range(len(chunks)) if not (cache and cache.fetch("tts", keys[i], paths[i]))
+        ]
+        texts = [chunks[i].text for i in todo]
+        todo_paths = [paths[i] for i in todo]
+        timings = self.timings and engine == "elevenlabs"
+        timing_paths = [p.with_suffix(".json") for p in paths]
+        try:
+            if not todo:
+                results = []
+            elif engine == "elevenlabs":
+                workers = min(self.elevenlabs_concurrency, len(todo))
+                with ThreadPoolExecutor(max_workers=workers) as pool:
+                    results = list(pool.map(self._generate_elevenlabs, texts, todo_paths))
+            else:
+                results = self._coqui_chunks(texts, todo_paths)
+            failed = [chunks[i].index for i, ok in zip(todo, results) if not ok]
+            for i, ok in zip(todo, results):
+                words = self._file_timings.pop(paths[i], None)
+                if ok and timings and words is not None:
+                    timing_paths[i].write_text(json.dumps(words))
+            if cache:
+                for i, ok in zip(todo, results):
+                    if ok:
+                        cache.store("tts", keys[i], paths[i], evict=False)
+                        cache.store("tts_timings", keys[i], timing_paths[i], evict=False)
+                cache.evict()
+            if failed:
+                self.logger.error(f"{engine} failed on chunks {failed}")
+                return False
+            boundaries = stitch_wavs(
+                chunks, paths, output_path, self.chunk_silence_ms, self.paragraph_silence_ms
+            )
+            if timings:
+                self.word_timings = self._stitch_timings(keys, timing_paths, boundaries)
+        except (OSError, EOFError, wave.Error, ValueError) as e:
+            self.logger.error(f"Stitching voiceover chunks failed: {e}")
+            return False
+        finally:
+            shutil.rmtree(work, ignore_errors=True)
+        if self.chunks_path:
+            write_chunk_map(self.chunks_path, boundaries)
+        synthesized = sum(len(t) for t in texts)
+        total = sum(len(c.text) for c in chunks)
+        self.tts_stats = {
+            "hits": len(chunks) - len(todo),
+            "misses": len(todo),
+            "chars_synthesized": synthesized,
+            "chars_reused": total - synthesized,
+        }
+        self.logger.info(
+            f"Synthesized {len(todo)}/{len(chunks)} chunks with {engine} in "
+            f"{time.perf_counter() - start:.1f}s ({total - synthesized} chars from the TTS cache)"
+        )
+        return True
+
+    def _stitch_timings(
+        self, keys: list[str], paths: list[Path], boundaries: list[dict]
+    ) -> list[dict] | None:
+        """Offset per-chunk word timings by the chunk starts; ``None`` if any are missing."""
+        words = []
+        for i, (path, boundary) in enumerate(zip(paths, boundaries)):
+            if not path.exists() and not (
+                self.tts_cache and self.tts_cache.fetch("tts_timings", keys[i], path)
+            ):
+                return None
+            offset = boundary["start"]
+            words.extend(
+                {**w, "start": round(w["start"] + offset, 3), "end": round(w["end"] + offset, 3)}
+                for w in json.loads(path.read_text())
+            )
+        return words
 
-        return self._generate_coqui(text, output_path)
+    def _coqui_chunks(self, texts: list[str], paths: list[Path]) -> list[bool]:
+        workers = min(self.coqui_workers, len(texts))
+        if workers <= 1 or "fork" not in multiprocessing.get_all_start_methods():
+            return [self._generate_coqui(t, p) for t, p in zip(texts, paths)]
+        # load before forking so every worker inherits the resident model
+        if not self.warmup():
+            return [False] * len(texts)
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("fork"),
+            initializer=_init_coqui_worker,
+        ) as pool:
+            futures = [
+                pool.submit(_coqui_chunk, self.coqui_model_name, t, str(p))
+                for t, p in zip(texts, paths)
+            ]
+            pending = set(futures)
+            while pending:
+                _, pending = wait(pending, timeout=0.2)
+                if pending and self.cancel.is_set():
+                    # chunks already running finish; the rest never start
+                    for future in pending:
+                        future.cancel()
+                    break
+            return [f.done() and not f.cancelled() and f.result() for f in futures]
 
     def _generate_elevenlabs(self, text: str, output_path: Path) -> bool:
-        if requests is None:
-            self.logger.error("requests library not available")
+        try:
+            client = get_client(self.api_key)
+        except RuntimeError as e:
+            self.logger.error(str(e))
             return False
         output_path.parent.mkdir(parents=True, exist_ok=True)
-        url = f"https://api.elevenlabs.io/v1/text-to-speech/{self.voice_id}"
-        headers = {"xi-api-key": self.api_key}
-        payload = {"text": text}
-        for attempt in range(3):
+        bucket = ratelimit.bucket()
+        circuit = breaker.breaker()
+        for attempt in range(self.elevenlabs_retries + 1):
+            last = attempt == self.elevenlabs_retries
+            if self.cancel.is_set():
+                return False
+            if circuit and not circuit.allow():
+                self.logger.info("ElevenLabs circuit is open; skipping the request")
+                return False
+            if bucket:
+                waited = bucket.acquire(len(text))
+                if waited > 1:
+                    self.logger.info(f"Waited {waited:.1f}s for the ElevenLabs rate limit")
             try:
-                response = requests.post(url, json=payload, headers=headers, timeout=30)
-                if response.status_code == 200:
-                    output_path.write_bytes(response.content)
-                    self.logger.info("ElevenLabs voiceover generated successfully")
-                    return True
-                self.logger.error(
-                    f"ElevenLabs API error {response.status_code}: {response.text}"
-                )
-                if response.status_code == 404:
+                with slot("elevenlabs"):
+                    result = client.synthesize(
+                        self.voice_id,
+                        text,
+                        output_path,
+                        cancel=self.cancel,
+                        with_timestamps=self.timings,
+                    )
+                if self.timings:
+                    self._file_timings[output_path] = words_from_characters(
+                        (result or {}).get("alignment")
+                    )
+                if circuit:
+                    circuit.success()
+                self.logger.info("ElevenLabs voiceover generated successfully")
+                return True
+            except SynthesisCancelled:
+                return False
+            except ElevenLabsError as e:
+                self.logger.error(f"ElevenLabs API error {e.status}: {e}")
+                # only server errors say the service is down
+                if circuit and e.status >= 500:
+                    circuit.failure()
+                elif circuit:
+                    circuit.success()
+                if e.status == 404:
                     self.logger.error("ElevenLabs voice ID not found")
                     self._list_voices()
-                if response.status_code >= 500:
-                    continue
-                return False
+                if not e.retryable or last:
+                    return False
+                delay = e.retry_after if e.retry_after is not None else backoff_delay(attempt)
+                if e.status == 429 and bucket:
+                    # every worker backs off, not just this one
+                    bucket.pause(delay)
+                else:
+                    time.sleep(delay)
             except Exception as e:
                 self.logger.error(f"ElevenLabs request failed: {e}")
-                if attempt == 2:
+                if circuit:
+                    circuit.failure()
+                if last:
                     return False
+                time.sleep(backoff_delay(attempt))
+            if bucket:
+                bucket.record_retry()
+            self.logger.info(f"Retrying ElevenLabs request ({attempt + 1}/{self.elevenlabs_retries})")
         return False
 
     def _generate_coqui(self, text: str, output_path: Path) -> bool:
+        if self.cancel.is_set():
+            return False
         self.logger.info("Using Coqui TTS")
         output_path.parent.mkdir(parents=True, exist_ok=True)
         try:
             from TTS.api import TTS
-            from TTS.utils.manage import ModelManager
         except Exception as e:  # fallback import error or runtime
             self.logger.error(f"Coqui TTS not available: {e}")
             return False
 
         try:
-            tts = TTS(model_name=self.coqui_model_name)
-        except Exception:
-            self.logger.info("Downloading Coqui TTS model...")
-            manager = ModelManager()
-            try:
-                manager.download_model(self.coqui_model_name)
-                tts = TTS(model_name=self.coqui_model_name)
-            except Exception as e:
-                self.logger.error(f"Coqui TTS download failed: {e}")
-                return False
+            tts = coqui_models.get(
+                self.coqui_model_name, lambda: TTS(model_name=self.coqui_model_name)
+            )
+        except Exception as e:
+            self.logger.error(
+                f"Could not load Coqui model {self.coqui_model_name}: {e}. "
+                "Download it first with `python cli.py models fetch`."
+            )
+            return False
 
         try:
-            tts.tts_to_file(text=text, file_path=str(output_path))
+            with coqui_models.use_lock(self.coqui_model_name), slot("inference"):
+                tts.tts_to_file(text=text, file_path=str(output_path))
             if output_path.exists() and output_path.stat().st_size > 0:
                 self.logger.info(f"Coqui voiceover generated successfully at {output_path}")
                 return True
@@ -123,16 +456,34 @@ class VoiceOverGenerator:
             self.logger.error(f"Coqui TTS generation failed: {e}")
             return False
 
-    def _list_voices(self) -> None:
-        """Fetch and log available ElevenLabs voices."""
-        if requests is None or not self.api_key:
-            return
+    def warmup(self) -> bool:
+        """Load the Coqui model into the process-wide registry."""
+        try:
+            from TTS.api import TTS
+        except Exception as e:
+            self.logger.warning(f"Coqui TTS not available: {e}")
+            return False
         try:
-            resp = requests.get("https://api.elevenlabs.io/v1/voices", headers={"xi-api-key": self.api_key}, timeout=30)
-            if resp.status_code == 200:
-                voices = [v.get("voice_id", "") for v in resp.json().get("voices", [])]
-                if voices:
-                    self.logger.error("Available voices: " + ", ".join(voices))
+            coqui_models.get(self.coqui_model_name, lambda: TTS(model_name=self.coqui_model_name))
         except Exception as e:
-            self.logger.error(f"Failed to fetch voice list: {e}")
+            self.logger.warning(f"Coqui warmup failed: {e}")
+            return False
+        return True
+
+    def _list_voices(self) -> None:
+        """Log available ElevenLabs voices from the catalog cache."""
+        if not self.api_key:
+            return
+        catalog = self.voice_catalog or VoiceCatalog(api_key=self.api_key)
+        voices = catalog.voices(block=True)
+        if voices:
+            self.logger.error(
+                "Available voices: " + ", ".join(f"{v['name']} ({v['voice_id']})" for v in voices)
+            )
+
+
+def _discard(*paths: Optional[Path]) -> None:
+    for path in paths:
+        if path:
+            path.unlink(missing_ok=True)
 
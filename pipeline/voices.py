@@ -0,0 +1,107 @@
+from __future__ import annotations
+
+"""Local cache of the ElevenLabs voice catalog."""
+
+from pathlib import Path
+import json
+import os
+import threading
+import time
+
+from .logger import setup_logger
+
+
+class VoiceCatalog:
+    """Voices of an ElevenLabs account, cached on disk for *ttl_s* seconds.
+
+    Reads never wait for the network unless nothing is cached and the caller
+    asks to block; a stale catalog is returned as-is while a background
+    thread refreshes it.
+    """
+
+    def __init__(
+        self,
+        path: Path = Path("cache/voices.json"),
+        ttl_s: float = 86400,
+        api_key: str | None = None,
+    ):
+        self.path = Path(path)
+        self.ttl_s = ttl_s
+        self.api_key = api_key or os.getenv("ELEVENLABS_API_KEY")
+        self.logger = setup_logger("voices")
+        self._refreshing: threading.Thread | None = None
+        self._lock = threading.Lock()
+
+    def _read(self) -> dict | None:
+        try:
+            data = json.loads(self.path.read_text())
+        except (OSError, ValueError):
+            return None
+        return data if isinstance(data.get("voices"), list) else None
+
+    def age(self) -> float | None:
+        data = self._read()
+        return None if data is None else time.time() - data.get("fetched_at", 0)
+
+    def refresh(self) -> list[dict]:
+        """Fetch the catalog from the API and write it to disk."""
+        from .elevenlabs import get_client
+
+        if not self.api_key:
+            raise RuntimeError("ELEVENLABS_API_KEY is not set")
+        voices = [
+            {"voice_id": v.get("voice_id", ""), "name": v.get("name", ""), "category": v.get("category")}
+            for v in get_client(self.api_key).voices()
+        ]
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(f".{self.path.name}.{os.getpid()}.{threading.get_ident()}")
+        tmp.write_text(json.dumps({"fetched_at": time.time(), "voices": voices}, indent=2))
+        tmp.replace(self.path)
+        self.logger.info(f"Voice catalog refreshed: {len(voices)} voices")
+        return voices
+
+    def refresh_async(self) -> threading.Thread | None:
+        """Refresh in a daemon thread unless one is already running."""
+        if not self.api_key:
+            return None
+        with self._lock:
+            if self._refreshing is not None and self._refreshing.is_alive():
+                return self._refreshing
+
+            def run() -> None:
+                try:
+                    self.refresh()
+                except Exception as e:
+                    self.logger.warning(f"Voice catalog refresh failed: {e}")
+
+            self._refreshing = threading.Thread(target=run, name="voice-catalog", daemon=True)
+            self._refreshing.start()
+            return self._refreshing
+
+    def voices(self, block: bool = False) -> list[dict] | None:
+        """Return the cached voices, or ``None`` when no catalog is available.
+
+        A missing or expired catalog is refreshed in the background; with
+        *block*, a missing one is fetched before returning.
+        """
+        data = self._read()
+        if data is None and block and self.api_key:
+            try:
+                return self.refresh()
+            except Exception as e:
+                self.logger.warning(f"Voice catalog unavailable: {e}")
+                return None
+        if data is None or time.time() - data.get("fetched_at", 0) > self.ttl_s:
+            self.refresh_async()
+        return None if data is None else data["voices"]
+
+    def unknown(self, voice_ids, block: bool = False) -> list[str]:
+        """Return the ids in *voice_ids* missing from the catalog.
+
+        Without a catalog nothing can be checked and the result is empty.
+        """
+        voices = self.voices(block=block)
+        if voices is None:
+            return []
+        known = {v["voice_id"] for v in voices}
+        return sorted({v for v in voice_ids if v and v not in known})
@@ -0,0 +1,134 @@
+from __future__ import annotations
+
+"""Long-lived pipeline worker serving JSON-lines jobs with warm models."""
+
+from pathlib import Path
+from typing import IO, Iterator
+import copy
+import json
+import os
+import socketserver
+import threading
+import time
+
+from .config import Config
+from .helpers import iso_timestamp, log_trace
+from .logger import setup_logger
+from .pipeline import VideoPipeline
+from .subtitles import SubtitleGenerator
+from .voiceover import VoiceOverGenerator
+
+
+class PipelineWorker:
+    """Run pipeline jobs in one process so TTS and Whisper stay loaded.
+
+    A job is a JSON object shaped like the entries of ``requests.jsonl``:
+    ``request_id`` names the job, ``title`` becomes the script name and
+    ``body`` is the script text. Optional keys mirror the CLI flags:
+    ``background``, ``preset``, ``output``, ``force_coqui``,
+    ``whisper_disable`` and ``no_subtitles``.
+    """
+
+    def __init__(self, config: Config, debug: bool = False, log_file: Path | None = None):
+        self.config = config
+        self.debug = debug
+        self.log_file = log_file
+        self.logger = setup_logger("worker", log_file, debug)
+        # jobs share the warm models, so they run one at a time
+        self._lock = threading.Lock()
+
+    def warmup(self) -> None:
+        """Load the configured Coqui and Whisper models once."""
+        start = time.perf_counter()
+        VoiceOverGenerator(
+            "coqui", coqui_model_name=self.config.coqui_model_name, log_file=self.log_file
+        ).warmup()
+        if self.config.whisper_model:
+            SubtitleGenerator(
+                self.config.subtitle_style, model=self.config.whisper_model, log_file=self.log_file
+            ).warmup()
+        self.logger.info(f"Worker warmup finished in {time.perf_counter() - start:.1f}s")
+
+    def handle(self, job: dict) -> Iterator[dict]:
+        """Run *job* and yield its status updates."""
+        job_id = job.get("request_id") or job.get("title") or "job"
+        yield {"request_id": job_id, "status": "started", "time": iso_timestamp()}
+        text = job.get("body") or job.get("script_text") or ""
+        if not text.strip():
+            yield {"request_id": job_id, "status": "failed", "error": "empty job body"}
+            return
+        config = copy.deepcopy(self.config)
+        background = job.get("background")
+        no_subtitles = bool(job.get("no_subtitles", False))
+        start = time.perf_counter()
+        try:
+            if job.get("preset"):
+                p_bg, p_subs = config.apply_preset(job["preset"])
+                background = background or p_bg
+                no_subtitles = no_subtitles or not p_subs
+            with self._lock:
+                ctx = VideoPipeline(config, debug=self.debug, log_file=self.log_file).run(
+                    text,
+                    job.get("title") or str(job_id),
+                    background=background,
+                    output=Path(job["output"]) if job.get("output") else None,
+                    force_coqui=bool(job.get("force_coqui", False)),
+                    whisper_disable=bool(job.get("whisper_disable", False)),
+                    no_subtitles=no_subtitles,
+                )
+        except Exception as e:
+            log_trace(e)
+            yield {"request_id": job_id, "status": "failed", "error": str(e)}
+            return
+        yield {
+            "request_id": job_id,
+            "status": "success",
+            "output": str(ctx.final_video_path),
+            "output_dir": str(ctx.output_dir),
+            "duration_s": round(time.perf_counter() - start, 2),
+        }
+
+    def handle_line(self, line: str) -> Iterator[dict]:
+        line = line.strip()
+        if not line:
+            return
+        try:
+            job = json.loads(line)
+            if not isinstance(job, dict):
+                raise ValueError("job must be a JSON object")
+        except ValueError as e:
+            yield {"status": "invalid", "error": str(e)}
+            return
+        yield from self.handle(job)
+
+    def serve_stream(self, inp: IO[str], out: IO[str]) -> None:
+        """Read jobs from *inp* and write status lines to *out* until EOF."""
+        for line in inp:
+            for status in self.handle_line(line):
+                out.write(json.dumps(status) + "\n")
+                out.flush()
+
+    def serve_socket(self, path: Path) -> None:
+        """Accept jobs on the Unix socket at *path* until interrupted."""
+        worker = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self) -> None:
+                for raw in self.rfile:
+                    for status in worker.handle_line(raw.decode("utf-8")):
+                        self.wfile.write((json.dumps(status) + "\n").encode("utf-8"))
+                        self.wfile.flush()
+
+        path = Path(path)
+        if path.exists():
+            path.unlink()
+        server = socketserver.ThreadingUnixStreamServer(str(path), Handler)
+        self.logger.info(f"Worker listening on {path}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+            if path.exists():
+                os.unlink(path)
@@ -1,5 +1,32 @@
+import array
 import sys
+import wave
 from pathlib import Path
 
+import pytest
+
 sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
 
+
+@pytest.fixture
+def write_wav():
+    """Return ``write(path, samples=None, seconds=0.5, rate=8000)``.
+
+    Writes float *samples* in [-1, 1] as a 16-bit mono WAV, or *seconds* of
+    silence when no samples are given.
+    """
+
+    def write(path, samples=None, seconds=0.5, rate=8000):
+        if samples is None:
+            samples = [0.0] * int(rate * seconds)
+        frames = array.array("h", (int(s * 32767) for s in samples))
+        if sys.byteorder == "big":
+            frames.byteswap()
+        with wave.open(str(path), "wb") as wf:
+            wf.setnchannels(1)
+            wf.setsampwidth(2)
+            wf.setframerate(rate)
+            wf.writeframes(frames.tobytes())
+        return path
+
+    return write
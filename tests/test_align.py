@@ -0,0 +1,98 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from pipeline.align import (
+    align,
+    align_chunks,
+    compare,
+    reference_words,
+    speech_regions,
+    syllables,
+    words_from_characters,
+)
+
+RATE = 8000
+
+
+def _speak(text, syllable_s=0.18, word_gap_s=0.04, pause_s=0.4):
+    """Return tone bursts standing in for *text* and the true word timings."""
+    parts, truth, t = [np.zeros(int(0.3 * RATE))], [], 0.3
+    for word in text.split():
+        length = syllables(word) * syllable_s
+        n = int(length * RATE)
+        parts.append(0.3 * np.sin(2 * np.pi * 300 * np.arange(n) / RATE))
+        truth.append({"start": round(t, 3), "end": round(t + length, 3), "text": word})
+        gap = pause_s if word[-1] in ".,!?" else word_gap_s
+        parts.append(np.zeros(int(gap * RATE)))
+        t += n / RATE + int(gap * RATE) / RATE
+    return np.concatenate(parts), truth
+
+
+def test_syllables():
+    assert syllables("cat") == 1
+    assert syllables("table") == 2
+    assert syllables("banana,") == 3
+    assert syllables("made") == 1
+    assert syllables("1999") == 4
+
+
+def test_alignment_follows_pauses(tmp_path, write_wav):
+    text = (
+        "The old lighthouse stood alone. Nobody had climbed its stairs in years, "
+        "until one stormy night a light appeared at the very top!"
+    )
+    samples, truth = _speak(text)
+    write_wav(tmp_path / "voice.wav", samples, rate=RATE)
+    regions = speech_regions(tmp_path / "voice.wav")
+    assert len(regions) == 3  # split at the pauses after "alone." and "years,"
+    words = align(text, tmp_path / "voice.wav")
+    assert [w["text"] for w in words] == text.split()
+    report = compare(words, truth)
+    assert report["matched"] == len(truth)
+    assert report["median_ms"] < 60
+    assert report["within_250ms"] == 1.0
+
+
+def test_compare_matches_words_in_order():
+    reference = reference_words(
+        [{"words": [{"word": " Hello", "start": 0.0, "end": 0.4}, {"word": " world.", "start": 0.5, "end": 1.0}]}]
+    )
+    aligned = [
+        {"start": 0.1, "end": 0.4, "text": "Hello"},
+        {"start": 0.45, "end": 0.6, "text": "big"},
+        {"start": 0.7, "end": 1.0, "text": "world."},
+    ]
+    report = compare(aligned, reference)
+    assert report["matched"] == 2
+    assert report["mean_ms"] == pytest.approx(150)
+
+
+def test_no_speech_gives_no_words(tmp_path, write_wav):
+    path = write_wav(tmp_path / "voice.wav", seconds=1.0, rate=RATE)
+    assert align("hello there", path) == []
+
+
+def test_words_from_characters():
+    alignment = {
+        "characters": list("Hi, you"),
+        "start": [0.0, 0.1, 0.2, 0.3, 0.4, 0.5, 0.6],
+        "end": [0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7],
+    }
+    assert words_from_characters(alignment) == [
+        {"start": 0.0, "end": 0.3, "text": "Hi,"},
+        {"start": 0.4, "end": 0.7, "text": "you"},
+    ]
+    assert words_from_characters(None) is None
+
+
+def test_align_chunks_keeps_words_inside_their_chunk():
+    chunks = [
+        {"text": "One two.", "start": 0.0, "end": 1.0},
+        {"text": "Three.", "start": 1.5, "end": 2.0},
+    ]
+    # the second chunk has no detected speech and falls back to its bounds
+    words = align_chunks(chunks, [(0.1, 0.9)])
+    assert [w["text"] for w in words] == ["One", "two.", "Three."]
+    assert words[0]["start"] == 0.1 and words[1]["end"] == 0.9
+    assert (words[2]["start"], words[2]["end"]) == (1.5, 2.0)
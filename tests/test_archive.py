@@ -0,0 +1,19 @@
+import zipfile
+
+from pipeline.archive import build_archive
+
+
+def test_store_media_and_exclude(tmp_path):
+    run = tmp_path / "run"
+    run.mkdir()
+    (run / "final_video.mp4").write_bytes(b"\0" * 1000)
+    (run / "metadata.json").write_text("{}" * 200)
+    (run / "voice.wav").write_bytes(b"\0" * 1000)
+    zip_path = build_archive(run, run, exclude=["voice.wav"])
+    assert zip_path == tmp_path / "run.zip"
+    with zipfile.ZipFile(zip_path) as zf:
+        infos = {i.filename: i for i in zf.infolist()}
+    assert set(infos) == {"final_video.mp4", "metadata.json"}
+    assert infos["final_video.mp4"].compress_type == zipfile.ZIP_STORED
+    assert infos["metadata.json"].compress_type == zipfile.ZIP_DEFLATED
+    assert not list(tmp_path.glob(".*.tmp"))
@@ -0,0 +1,78 @@
+import wave
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from pipeline.audio import Conditioning, condition_wav, time_stretch
+
+
+def _tone(segments, rate=8000):
+    """Return (seconds, amplitude) segments of a 440 Hz tone as samples."""
+    parts = []
+    for seconds, amplitude in segments:
+        t = np.arange(int(rate * seconds)) / rate
+        parts.append(amplitude * np.sin(2 * np.pi * 440 * t))
+    return np.concatenate(parts)
+
+
+def _duration(path):
+    with wave.open(str(path), "rb") as wf:
+        return wf.getnframes() / wf.getframerate()
+
+
+def test_trims_edges_and_long_pauses(tmp_path, write_wav):
+    path = tmp_path / "voice.wav"
+    write_wav(path, _tone([(1.0, 0), (0.5, 0.3), (2.0, 0), (0.5, 0.3), (1.0, 0)]))
+    report = condition_wav(path, max_pause_ms=400, target_dbfs=None, pad_ms=0)
+    assert _duration(path) == pytest.approx(1.4, abs=0.02)
+    assert report.removed[0] == (0, 8000)
+    assert report.shift(1.2) == pytest.approx(0.2)
+    # a time in the second tone moves back by the lead-in and the cut pause
+    assert report.shift(3.7) == pytest.approx(1.1, abs=0.01)
+
+
+def test_normalizes_loudness_without_clipping(tmp_path, write_wav):
+    path = tmp_path / "voice.wav"
+    write_wav(path, _tone([(0.5, 0.05)]))
+    report = condition_wav(path, target_dbfs=-16.0)
+    assert report.removed == []
+    assert report.gain_db > 10
+    with wave.open(str(path), "rb") as wf:
+        samples = np.frombuffer(wf.readframes(wf.getnframes()), dtype="<i2")
+    rms_db = 20 * np.log10(np.sqrt(np.mean((samples / 32768.0) ** 2)))
+    assert rms_db == pytest.approx(-16.0, abs=0.5)
+
+
+def test_silent_audio_is_left_alone(tmp_path, write_wav):
+    path = tmp_path / "voice.wav"
+    write_wav(path, _tone([(0.5, 0)]))
+    before = path.read_bytes()
+    assert condition_wav(path).removed == []
+    assert path.read_bytes() == before
+
+
+def test_shift_records():
+    report = Conditioning(sample_rate=10, original_samples=100, removed=[(0, 10), (50, 70)])
+    shifted = report.shift_records([{"text": "a", "start": 2.0, "end": 6.0}])
+    assert shifted == [{"text": "a", "start": 1.0, "end": 4.0}]
+
+
+@pytest.mark.parametrize("rate", [0.8, 1.25])
+def test_time_stretch_keeps_pitch(tmp_path, rate, write_wav):
+    path = tmp_path / "voice.wav"
+    write_wav(path, _tone([(2.0, 0.3)]))
+    time_stretch(path, rate)
+    assert _duration(path) == pytest.approx(2.0 / rate, abs=0.01)
+    with wave.open(str(path), "rb") as wf:
+        samples = np.frombuffer(wf.readframes(wf.getnframes()), dtype="<i2") / 32768.0
+    spectrum = np.abs(np.fft.rfft(samples * np.hanning(len(samples))))
+    assert np.argmax(spectrum) * 8000 / len(samples) == pytest.approx(440, abs=5)
+
+
+def test_shift_applies_speech_rate(tmp_path):
+    report = Conditioning(sample_rate=10, original_samples=100, removed=[(0, 10)], speech_rate=1.5)
+    assert report.samples == 60
+    assert report.shift(4.0) == pytest.approx(2.0)
+    report.save(tmp_path / "conditioning.json")
+    assert Conditioning.load(tmp_path / "conditioning.json") == report
@@ -0,0 +1,64 @@
+from pathlib import Path
+import pytest
+
+from pipeline import resources
+from pipeline.executor import isolation_available
+from pipeline.batch import run_batch
+from pipeline.config import Config
+
+
+def fake_run(self, text, name, **kwargs):
+    if "bad" in text:
+        raise RuntimeError("render crashed")
+
+    class Ctx:
+        final_video_path = Path(kwargs["background"]) / f"{name}.mp4"
+    return Ctx()
+
+
+def test_parallel_batch_keeps_input_order(monkeypatch, tmp_path):
+    monkeypatch.setattr("pipeline.pipeline.VideoPipeline.run", fake_run)
+    items = [
+        {"text": "good", "name": "a", "background": str(tmp_path)},
+        {"text": "bad", "name": "b", "background": str(tmp_path)},
+        {"text": "good", "name": "c", "background": str(tmp_path), "voice_id": "v2"},
+    ]
+    results = run_batch(Config(), items, jobs=2)
+    assert results == [
+        (True, str(tmp_path / "a.mp4")),
+        (False, "render crashed"),
+        (True, str(tmp_path / "c.mp4")),
+    ]
+    assert run_batch(Config(), items, jobs=1) == results
+
+
+def test_slot_limits():
+    limits = resources.create_limits({"ffmpeg": 1})
+    resources.install(limits)
+    try:
+        with resources.slot("ffmpeg"):
+            assert limits["ffmpeg"].acquire(block=False) is False
+        assert limits["ffmpeg"].acquire(block=False) is True
+        limits["ffmpeg"].release()
+    finally:
+        resources.install({})
+    with resources.slot("ffmpeg"):
+        pass
+
+
+@pytest.mark.skipif(not isolation_available(), reason="fork not available")
+def test_slot_held_by_dead_process_is_reclaimed():
+    import multiprocessing
+    import os
+
+    pool = resources.SlotPool(1)
+
+    def hold():
+        pool.acquire()
+        os._exit(0)  # killed without releasing
+
+    proc = multiprocessing.get_context("fork").Process(target=hold)
+    proc.start()
+    proc.join()
+    assert pool.acquire(block=False) is True
+    pool.release()
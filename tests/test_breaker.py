@@ -0,0 +1,36 @@
+import time
+
+from pipeline.breaker import CircuitBreaker
+
+
+def test_opens_after_consecutive_failures():
+    circuit = CircuitBreaker("test", threshold=2, cooldown_s=60)
+    circuit.failure()
+    circuit.success()
+    circuit.failure()
+    assert circuit.state == "closed"
+    circuit.failure()
+    assert circuit.state == "open"
+    assert circuit.allow() is False
+    assert circuit.stats() == {
+        "state": "open",
+        "consecutive_failures": 2,
+        "opens": 1,
+        "short_circuits": 1,
+    }
+
+
+def test_single_probe_after_cooldown():
+    circuit = CircuitBreaker("test", threshold=1, cooldown_s=0.1)
+    circuit.failure()
+    time.sleep(0.15)
+    assert circuit.allow() is True
+    assert circuit.state == "half_open"
+    assert circuit.allow() is False  # only one probe at a time
+    circuit.failure()
+    assert circuit.state == "open"
+    time.sleep(0.15)
+    assert circuit.allow() is True
+    circuit.success()
+    assert circuit.state == "closed"
+    assert circuit.allow() is True
@@ -0,0 +1,67 @@
+import os
+from pathlib import Path
+from pipeline.cache import StageCache, cache_key
+
+
+def test_store_and_fetch(tmp_path):
+    cache = StageCache(tmp_path / "cache")
+    src = tmp_path / "voice.wav"
+    src.write_text("audio")
+    key = cache_key("voiceover", text="hi", engine="coqui")
+    out = tmp_path / "run" / "voice.wav"
+    assert cache.fetch("voiceover", key, out) is False
+    cache.store("voiceover", key, src)
+    assert cache.fetch("voiceover", key, out) is True
+    assert out.read_text() == "audio"
+    assert cache.stats["voiceover"] == {"hits": 1, "misses": 1}
+
+
+def test_fetched_artifact_is_a_copy(tmp_path):
+    cache = StageCache(tmp_path / "cache")
+    src = tmp_path / "voice.wav"
+    src.write_text("audio")
+    key = cache_key("voiceover", text="hi")
+    cache.store("voiceover", key, src)
+    out = tmp_path / "run" / "voice.wav"
+    assert cache.fetch("voiceover", key, out) is True
+    # stages such as trim_silence rewrite their inputs in place
+    with open(out, "w") as f:
+        f.write("trimmed")
+    assert cache.lookup("voiceover", key, ".wav").read_text() == "audio"
+
+
+def test_key_depends_on_inputs():
+    assert cache_key("voiceover", text="a") != cache_key("voiceover", text="b")
+    assert cache_key("voiceover", text="a") == cache_key("voiceover", text="a")
+
+
+def test_lru_eviction(tmp_path):
+    cache = StageCache(tmp_path / "cache", max_bytes=10)
+    src = tmp_path / "a.wav"
+    src.write_text("123456")
+    cache.store("voiceover", "aa" * 32, src)
+    old = cache._entry("aa" * 32)
+    os.utime(old, (1, 1))
+    cache.store("voiceover", "bb" * 32, src)
+    assert not old.exists()
+    assert cache.contains("voiceover", "bb" * 32, ".wav")
+
+
+def test_disabled_cache(tmp_path):
+    cache = StageCache(tmp_path / "cache", enabled=False)
+    src = tmp_path / "a.wav"
+    src.write_text("x")
+    cache.store("voiceover", "cc" * 32, src)
+    assert cache.fetch("voiceover", "cc" * 32, tmp_path / "b.wav") is False
+    assert not (tmp_path / "cache").exists()
+
+
+def test_usage_ignores_nested_caches(tmp_path):
+    cache = StageCache(tmp_path / "cache")
+    src = tmp_path / "a.wav"
+    src.write_text("1234")
+    cache.store("voiceover", "aa" * 32, src)
+    StageCache(tmp_path / "cache" / "tts").store("tts", "bb" * 32, src)
+    usage = cache.usage()
+    assert usage["entries"] == 1
+    assert usage["stages"] == {"voiceover": {"entries": 1, "bytes": 4}}
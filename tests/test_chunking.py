@@ -0,0 +1,36 @@
+import wave
+
+from pipeline.chunking import Chunk, split_script, stitch_wavs
+
+
+def test_split_script_packs_sentences_within_paragraphs():
+    text = "One. Two is here! Three?\n\nNew paragraph starts. And ends."
+    chunks = split_script(text, max_chars=21)
+    assert [c.text for c in chunks] == [
+        "One. Two is here!",
+        "Three?",
+        "New paragraph starts.",
+        "And ends.",
+    ]
+    assert [c.paragraph_start for c in chunks] == [True, False, True, False]
+    assert [c.index for c in chunks] == [0, 1, 2, 3]
+
+
+def test_split_script_breaks_overlong_sentence():
+    sentence = "word " * 30
+    chunks = split_script(sentence.strip() + ".", max_chars=40)
+    assert len(chunks) > 1
+    assert all(len(c.text) <= 40 for c in chunks)
+    assert " ".join(c.text for c in chunks) == sentence.strip() + "."
+
+
+def test_stitch_wavs_inserts_silence_and_reports_boundaries(tmp_path, write_wav):
+    paths = [tmp_path / f"{i}.wav" for i in range(3)]
+    for path in paths:
+        write_wav(path, seconds=1.0)
+    chunks = [Chunk(0, "a", True), Chunk(1, "b"), Chunk(2, "c", True)]
+    out = tmp_path / "out.wav"
+    bounds = stitch_wavs(chunks, paths, out, silence_ms=250, paragraph_silence_ms=500)
+    assert [(b["start"], b["end"]) for b in bounds] == [(0.0, 1.0), (1.25, 2.25), (2.75, 3.75)]
+    with wave.open(str(out), "rb") as wf:
+        assert wf.getnframes() == int(8000 * 3.75)
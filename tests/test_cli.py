@@ -17,3 +17,46 @@ def test_cli_preset_flags():
     args = CLI.parse(["--batch", "folder", "--randomize"])
     assert args.batch == "folder"
     assert args.randomize is True
+
+def test_cli_resume_flag():
+    args = CLI.parse(["--resume", "output/story_20250101_000000"])
+    assert args.resume == "output/story_20250101_000000"
+
+def test_cli_worker_command():
+    args = CLI.parse(["worker", "--socket", "/tmp/autocontent.sock"])
+    assert args.command == "worker"
+    assert args.socket == "/tmp/autocontent.sock"
+    assert CLI.parse(["--script-text", "hi"]).command is None
+
+def test_cli_jobs_flag():
+    args = CLI.parse(["--batch", "folder", "--jobs", "4"])
+    assert args.jobs == 4
+    assert CLI.parse(["--batch", "folder"]).jobs == 1
+
+def test_cli_archive_flag():
+    assert CLI.parse(["--script-text", "hi", "--archive", "off"]).archive == "off"
+    assert CLI.parse(["--script-text", "hi"]).archive is None
+
+def test_cli_show_graph(capsys):
+    from cli import main
+
+    main(["--show-graph"])
+    out = capsys.readouterr().out
+    assert '"background_prep" -> "render";' in out
+    assert '"render" -> "concat";' in out
+
+def test_cli_models_fetch_command():
+    args = CLI.parse(["models", "fetch", "--model", "tts_models/en/vctk/vits"])
+    assert args.command == "models"
+    assert args.models_command == "fetch"
+    assert args.model == "tts_models/en/vctk/vits"
+
+def test_cli_cache_commands():
+    args = CLI.parse(["cache", "prune", "--max-mb", "0"])
+    assert args.command == "cache"
+    assert args.cache_command == "prune"
+    assert args.max_mb == 0
+    assert CLI.parse(["cache", "stats"]).cache_command == "stats"
+
+def test_cli_prewarm_previews_flag():
+    assert CLI.parse(["--prewarm-previews"]).prewarm_previews is True
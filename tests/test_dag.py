@@ -0,0 +1,93 @@
+import threading
+
+import pytest
+
+from pipeline.dag import Graph, Node
+
+
+def test_graph_runs_independent_nodes_concurrently():
+    barrier = threading.Barrier(2, timeout=5)
+    order = []
+
+    def prep(name):
+        def func():
+            barrier.wait()  # deadlocks unless both run at once
+            order.append(name)
+        return func
+
+    graph = Graph(
+        [
+            Node("a", prep("a"), outputs=("x",)),
+            Node("b", prep("b"), outputs=("y",)),
+            Node("c", lambda: order.append("c"), inputs=("x", "y")),
+        ]
+    )
+    status = graph.run()
+    assert status == {"a": "done", "b": "done", "c": "done"}
+    assert order[-1] == "c"
+
+
+def test_graph_skips_cached_nodes_and_records_status():
+    ran = []
+    graph = Graph(
+        [
+            Node("a", lambda: ran.append("a"), outputs=("x",), cached=lambda: True),
+            Node("b", lambda: "skipped", inputs=("x",), outputs=("y",)),
+            Node("c", lambda: ran.append("c"), inputs=("y",)),
+        ]
+    )
+    seen = []
+    status = graph.run(on_status=lambda name, value: seen.append((name, value)))
+    assert ran == ["c"]
+    assert status == {"a": "cached", "b": "skipped", "c": "done"}
+    assert ("b", "running") in seen
+
+
+def test_graph_failure_stops_downstream():
+    ran = []
+
+    def boom():
+        raise RuntimeError("boom")
+
+    graph = Graph(
+        [
+            Node("a", boom, outputs=("x",)),
+            Node("b", lambda: ran.append("b"), inputs=("x",)),
+        ]
+    )
+    statuses = {}
+    with pytest.raises(RuntimeError):
+        graph.run(on_status=statuses.__setitem__)
+    assert ran == []
+    assert statuses == {"a": "failed"}
+
+
+def test_graph_reusable_respects_upstream_and_prunes_prep():
+    graph = Graph(
+        [
+            Node("voice", lambda: None, outputs=("audio",)),
+            Node("prep", lambda: None, outputs=("bg",), persistent=False),
+            Node("subs", lambda: None, inputs=("audio",), outputs=("ass",)),
+            Node("render", lambda: None, inputs=("ass", "bg"), outputs=("video",)),
+        ]
+    )
+    assert graph.reusable({"voice", "subs", "render"}) == {"voice", "subs", "render", "prep"}
+    assert graph.reusable({"subs", "render"}) == set()
+    assert graph.reusable({"voice", "subs"}) == {"voice", "subs"}
+
+
+def test_graph_rejects_cycles_and_exports_dot():
+    graph = Graph(
+        [
+            Node("a", lambda: None, inputs=("y",), outputs=("x",)),
+            Node("b", lambda: None, inputs=("x",), outputs=("y",)),
+        ]
+    )
+    with pytest.raises(ValueError):
+        graph.order()
+
+    graph = Graph([Node("a", lambda: None, outputs=("x",)), Node("b", lambda: None, inputs=("x",))])
+    dot = graph.to_dot()
+    assert dot.startswith("digraph")
+    assert '"a" -> "b";' in dot
+    assert graph.to_dict()["b"]["depends_on"] == ["a"]
@@ -0,0 +1,129 @@
+import types
+import wave
+
+import pytest
+
+from pipeline import elevenlabs
+
+
+class FakeResponse:
+    def __init__(self, status_code=200, chunks=(), text="", headers=None, lines=()):
+        self.status_code = status_code
+        self.chunks = chunks
+        self.lines = lines
+        self.text = text
+        self.headers = headers or {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def iter_content(self, chunk_size):
+        yield from self.chunks
+
+    def iter_lines(self):
+        yield from self.lines
+
+
+class FakeSession:
+    def __init__(self):
+        self.headers = {}
+        self.calls = []
+        self.response = FakeResponse()
+
+    def mount(self, prefix, adapter):
+        pass
+
+    def post(self, url, **kwargs):
+        self.calls.append((url, kwargs))
+        return self.response
+
+
+@pytest.fixture
+def fake_requests(monkeypatch):
+    sessions = []
+
+    def make_session():
+        sessions.append(FakeSession())
+        return sessions[-1]
+
+    monkeypatch.setattr(elevenlabs, "requests", types.SimpleNamespace(Session=make_session))
+    monkeypatch.setattr(elevenlabs, "HTTPAdapter", lambda **kw: None, raising=False)
+    monkeypatch.setattr(elevenlabs, "_clients", {})
+    return sessions
+
+
+def test_client_is_shared_per_key(fake_requests):
+    assert elevenlabs.get_client("key") is elevenlabs.get_client("key")
+    assert elevenlabs.get_client("other") is not elevenlabs.get_client("key")
+    assert len(fake_requests) == 2
+
+
+def test_synthesize_streams_pcm_to_wav(fake_requests, tmp_path):
+    client = elevenlabs.get_client("key")
+    session = fake_requests[0]
+    # an odd-sized chunk splits a sample across chunks
+    session.response = FakeResponse(chunks=[b"\x01\x00\x02", b"\x00\x03\x00"])
+    out = tmp_path / "voice.wav"
+    stats = client.synthesize("voice", "hi", out)
+    url, kwargs = session.calls[0]
+    assert url.endswith("/text-to-speech/voice/stream")
+    assert kwargs["stream"] is True
+    assert stats["bytes"] == 6
+    with wave.open(str(out), "rb") as wf:
+        assert wf.getframerate() == elevenlabs.PCM_RATE
+        assert wf.readframes(wf.getnframes()) == b"\x01\x00\x02\x00\x03\x00"
+
+
+def test_synthesize_error_leaves_no_file(fake_requests, tmp_path):
+    client = elevenlabs.get_client("key")
+    fake_requests[0].response = FakeResponse(status_code=401, text="bad key")
+    out = tmp_path / "voice.wav"
+    with pytest.raises(elevenlabs.ElevenLabsError) as err:
+        client.synthesize("voice", "hi", out)
+    assert err.value.status == 401
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_synthesize_stops_when_cancelled(fake_requests, tmp_path):
+    import threading
+
+    client = elevenlabs.get_client("key")
+    fake_requests[0].response = FakeResponse(chunks=[b"\x00\x00"] * 3)
+    cancel = threading.Event()
+    cancel.set()
+    with pytest.raises(elevenlabs.SynthesisCancelled):
+        client.synthesize("voice", "hi", tmp_path / "voice.wav", cancel=cancel)
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_synthesize_with_timestamps_collects_alignment(fake_requests, tmp_path):
+    import base64
+    import json
+
+    def line(audio, chars, starts):
+        return json.dumps(
+            {
+                "audio_base64": base64.b64encode(audio).decode(),
+                "alignment": {
+                    "characters": chars,
+                    "character_start_times_seconds": starts,
+                    "character_end_times_seconds": [t + 0.1 for t in starts],
+                },
+            }
+        ).encode()
+
+    client = elevenlabs.get_client("key")
+    session = fake_requests[0]
+    session.response = FakeResponse(
+        lines=[line(b"\x01\x00", ["H", "i"], [0.0, 0.1]), b"", line(b"\x02\x00", ["!"], [0.2])]
+    )
+    out = tmp_path / "voice.wav"
+    result = client.synthesize("voice", "Hi!", out, with_timestamps=True)
+    assert session.calls[0][0].endswith("/stream/with-timestamps")
+    assert result["alignment"]["characters"] == ["H", "i", "!"]
+    assert result["alignment"]["start"] == [0.0, 0.1, 0.2]
+    with wave.open(str(out), "rb") as wf:
+        assert wf.readframes(wf.getnframes()) == b"\x01\x00\x02\x00"
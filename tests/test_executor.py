@@ -0,0 +1,65 @@
+import os
+import sys
+import time
+import pytest
+
+from pipeline.executor import isolation_available, run_isolated, run_process
+
+pytestmark = pytest.mark.skipif(not isolation_available(), reason="fork not available")
+
+
+def test_run_isolated_returns_value():
+    assert run_isolated(lambda a, b: a + b, 5, 2, 3) == 5
+
+
+def test_run_isolated_propagates_errors():
+    def boom():
+        raise ValueError("bad")
+
+    with pytest.raises(ValueError):
+        run_isolated(boom, 5)
+
+
+def test_run_isolated_kills_process_group(tmp_path):
+    pid_file = tmp_path / "pid"
+
+    def stage():
+        import subprocess
+
+        child = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(30)"])
+        pid_file.write_text(str(child.pid))
+        child.wait()
+
+    start = time.time()
+    with pytest.raises(TimeoutError):
+        run_isolated(stage, 1)
+    assert time.time() - start < 10
+    pid = int(pid_file.read_text())
+    for _ in range(50):
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            break
+        time.sleep(0.1)
+    else:
+        pytest.fail("grandchild still running")
+
+
+def test_run_process_timeout():
+    with pytest.raises(TimeoutError):
+        run_process([sys.executable, "-c", "import time; time.sleep(30)"], timeout=0.5)
+    result = run_process([sys.executable, "-c", "print('hi')"], capture_output=True, text=True)
+    assert result.stdout.strip() == "hi"
+
+
+def test_run_isolated_does_not_wait_for_leftover_threads():
+    def stage():
+        import threading
+
+        # e.g. the losing engine of a hedged voiceover
+        threading.Thread(target=time.sleep, args=(30,)).start()
+        return "won"
+
+    start = time.time()
+    assert run_isolated(stage, 60) == "won"
+    assert time.time() - start < 10
@@ -0,0 +1,50 @@
+import time
+import pytest
+from pipeline.metrics import MetricsRecorder, _rss_mb, audio_duration
+from pipeline.helpers import create_silence
+
+
+def test_stage_records_io_and_time(tmp_path):
+    out = tmp_path / "out.bin"
+    metrics = MetricsRecorder()
+    with metrics.stage("voiceover", [11], [out]):
+        out.write_bytes(b"x" * 100)
+    record = metrics.stages["voiceover"]
+    assert record["status"] == "done"
+    assert record["input_bytes"] == 11
+    assert record["output_bytes"] == 100
+    assert record["wall_s"] >= 0
+    for key in ("cpu_s", "child_cpu_s", "peak_rss_mb", "rss_delta_mb", "children_max_rss_mb"):
+        assert key in record
+
+
+@pytest.mark.skipif(_rss_mb() is None, reason="/proc not available")
+def test_peak_rss_is_per_stage():
+    metrics = MetricsRecorder()
+    with metrics.stage("big"):
+        block = bytearray(64 * 1024**2)
+        block[:: 4096] = b"x" * len(block[:: 4096])
+        time.sleep(0.2)
+        del block
+    with metrics.stage("small"):
+        time.sleep(0.1)
+    assert metrics.stages["big"]["rss_delta_mb"] >= 32
+    assert metrics.stages["small"]["rss_delta_mb"] < 32
+
+
+def test_failed_stage_and_realtime_factor(tmp_path):
+    metrics = MetricsRecorder()
+    with pytest.raises(RuntimeError):
+        with metrics.stage("render"):
+            raise RuntimeError("boom")
+    assert metrics.stages["render"]["status"] == "failed"
+    metrics.stages["render"]["wall_s"] = 4.0
+    report = metrics.report(2.0)
+    assert report["stages"]["render"]["realtime_factor"] == 2.0
+
+
+def test_audio_duration(tmp_path):
+    wav = tmp_path / "v.wav"
+    create_silence(wav, duration=1.5)
+    assert audio_duration(wav) == pytest.approx(1.5)
+    assert audio_duration(tmp_path / "missing.wav") is None
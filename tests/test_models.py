@@ -0,0 +1,89 @@
+import sys
+import types
+
+from pipeline.models import ModelRegistry, fetch_coqui_model
+
+
+def test_registry_evicts_least_recently_used_over_budget():
+    sizes = {"a": 400, "b": 400, "c": 400}
+    registry = ModelRegistry("test", sizer=lambda model: sizes[model])
+    registry.max_bytes = 1000
+
+    registry.get("a", lambda: "a")
+    registry.get("b", lambda: "b")
+    registry.get("a", lambda: "a")  # a is now the most recently used
+    registry.get("c", lambda: "c")
+    assert registry.loaded() == ["a", "c"]
+
+    stats = registry.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 3
+    assert stats["evictions"] == 1
+    assert stats["hit_rate"] == 0.25
+    assert set(stats["models"]) == {"a", "c"}
+
+
+def test_registry_keeps_single_model_larger_than_budget():
+    registry = ModelRegistry("test", sizer=lambda model: 10_000)
+    registry.set_budget(0)
+    registry.get("big", lambda: "big")
+    registry.max_bytes = 10
+    registry.get("huge", lambda: "huge")
+    assert registry.loaded() == ["huge"]
+
+
+def test_registry_does_not_cache_failed_loads():
+    registry = ModelRegistry("test")
+    calls = []
+
+    def broken():
+        calls.append(1)
+        raise RuntimeError("missing weights")
+
+    for _ in range(2):
+        try:
+            registry.get("m", broken)
+        except RuntimeError:
+            pass
+    assert len(calls) == 2
+    assert registry.loaded() == []
+
+
+def test_fetch_coqui_model(monkeypatch):
+    downloads = []
+
+    class FakeManager:
+        def download_model(self, name):
+            downloads.append(name)
+            return ("/models/" + name, "/models/config.json", {})
+
+    manage_mod = types.ModuleType("TTS.utils.manage")
+    manage_mod.ModelManager = FakeManager
+    monkeypatch.setitem(sys.modules, "TTS", types.ModuleType("TTS"))
+    monkeypatch.setitem(sys.modules, "TTS.utils", types.ModuleType("TTS.utils"))
+    monkeypatch.setitem(sys.modules, "TTS.utils.manage", manage_mod)
+
+    assert fetch_coqui_model("tts_models/en/x") == "/models/tts_models/en/x"
+    assert downloads == ["tts_models/en/x"]
+
+
+def test_memory_pressure_unloads_least_recently_used_across_registries(monkeypatch):
+    import pipeline.models as models
+
+    coqui = ModelRegistry("coqui")
+    whisper = ModelRegistry("whisper")
+    monkeypatch.setattr(models, "_registries", [coqui, whisper])
+    # every resident model takes 80 MB of the 300 MB available
+    resident = lambda: len(coqui.loaded()) + len(whisper.loaded())
+    monkeypatch.setattr(models, "_available_bytes", lambda: (300 - 80 * resident()) * 1024**2)
+    models.set_min_free(100)
+    try:
+        coqui.get("tts", lambda: "tts")
+        whisper.get("base", lambda: "base")
+        coqui.get("tts", lambda: "tts")  # base is now the least recently used
+        whisper.get("small", lambda: "small")
+    finally:
+        models.set_min_free(0)
+    assert coqui.loaded() == ["tts"]
+    assert whisper.loaded() == ["small"]
+    assert whisper.stats()["evictions"] == 1
@@ -0,0 +1,70 @@
+import wave
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from pipeline.cache import StageCache, cache_key, file_digest
+from pipeline.music import decode_track, duck_envelope, mix_music, pick_track
+
+
+def _read(path):
+    with wave.open(str(path), "rb") as wf:
+        return np.frombuffer(wf.readframes(wf.getnframes()), dtype="<i2") / 32768.0
+
+
+def test_duck_envelope_ramps_around_speech():
+    rate = 8000
+    voice = np.zeros((rate * 3, 1), dtype="<i2")
+    voice[rate : 2 * rate] = 10000  # speech from 1s to 2s
+    win, gain_db = duck_envelope(voice, rate, duck_db=-12, attack_ms=200, release_ms=400)
+    at = lambda s: gain_db[int(s * rate / win)]
+    assert at(0.5) == 0.0
+    assert at(1.5) == -12.0
+    assert -12.0 < at(0.9) < 0.0
+    assert -12.0 < at(2.2) < 0.0
+    assert at(2.6) == 0.0
+
+
+def test_mix_ducks_and_loops_music(tmp_path, write_wav):
+    rate = 8000
+    t = np.arange(rate * 4) / rate
+    voice = np.where((t >= 2) & (t < 3), 0.3 * np.sin(2 * np.pi * 220 * t), 0.0)
+    write_wav(tmp_path / "voice.wav", voice)
+    write_wav(tmp_path / "music.wav", 0.5 * np.sin(2 * np.pi * 440 * t[:rate]))  # 1s, looped
+    mix_music(
+        tmp_path / "voice.wav", tmp_path / "music.wav", tmp_path / "mix.wav", volume_db=-6, fade_ms=10
+    )
+    mixed = _read(tmp_path / "mix.wav")
+    assert len(mixed) == len(voice)
+    music_only = mixed - voice
+    rms = lambda a, b: np.sqrt(np.mean(music_only[int(a * rate) : int(b * rate)] ** 2))
+    assert rms(0.2, 0.8) == pytest.approx(0.5 * 10 ** (-6 / 20) / np.sqrt(2), rel=0.05)
+    assert rms(2.2, 2.8) == pytest.approx(rms(0.2, 0.8) * 10 ** (-12 / 20), rel=0.05)
+
+
+def test_decoded_tracks_are_reused_from_cache(tmp_path, monkeypatch, write_wav):
+    track = tmp_path / "song.mp3"
+    track.write_bytes(b"mp3")
+    cache = StageCache(tmp_path / "cache")
+    decoded = tmp_path / "decoded.wav"
+    write_wav(decoded, np.zeros(10))
+    key = cache_key("music", track=file_digest(track), rate=8000, channels=1)
+    cache.store("music", key, decoded)
+
+    def no_ffmpeg(*args, **kwargs):
+        raise AssertionError("track decoded again")
+
+    monkeypatch.setattr("pipeline.music.run_process", no_ffmpeg)
+    path = decode_track(track, 8000, 1, tmp_path, cache=cache)
+    assert path.read_bytes() == decoded.read_bytes()
+    assert cache.stats["music"] == {"hits": 1, "misses": 0}
+
+
+def test_pick_track(tmp_path):
+    assert pick_track(tmp_path / "missing") is None
+    (tmp_path / "notes.txt").write_text("x")
+    assert pick_track(tmp_path) is None
+    (tmp_path / "a.mp3").write_bytes(b"1")
+    assert pick_track(tmp_path) == tmp_path / "a.mp3"
+    assert pick_track(tmp_path / "a.mp3") == tmp_path / "a.mp3"
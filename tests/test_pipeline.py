@@ -2,6 +2,7 @@ import json
 from pathlib import Path
 from pipeline.pipeline import VideoPipeline
 from pipeline.config import Config
+from pipeline.renderer import VideoRenderer
 
 
 def test_pipeline_success(monkeypatch, tmp_path):
@@ -12,6 +13,7 @@ def test_pipeline_success(monkeypatch, tmp_path):
     (rain / "vid.mp4").write_text("v")
     cfg.background_videos_path = str(rain)
     cfg.watermark_path = None
+    cfg.cache_dir = str(tmp_path / "cache")
     cfg.validate()
 
     def fake_generate(self, text, out):
@@ -35,8 +37,13 @@ def test_pipeline_success(monkeypatch, tmp_path):
     vp = VideoPipeline(cfg, debug=True)
     ctx = vp.run("hello", "test", background="Rain")
     assert ctx.final_video_path.exists()
+    ctx.archive_future.result()
     summary = json.loads((ctx.output_dir / "run_summary.json").read_text())
     assert summary["success"] is True
+    for stage in ("voiceover", "transcribe", "generate_ass", "render", "archive"):
+        assert "wall_s" in summary["stages"][stage]
+    assert summary["stages"]["trim_silence"]["status"] == "skipped"
+    assert summary["stages"]["concat"]["status"] == "skipped"
 
 
 def test_pipeline_whisper_disabled(monkeypatch, tmp_path):
@@ -47,6 +54,7 @@ def test_pipeline_whisper_disabled(monkeypatch, tmp_path):
     (rain / "vid.mp4").write_text("v")
     cfg.background_videos_path = str(rain)
     cfg.watermark_path = None
+    cfg.cache_dir = str(tmp_path / "cache")
     cfg.validate()
 
     def fake_generate(self, text, out):
@@ -83,6 +91,7 @@ def test_pipeline_no_subtitles(monkeypatch, tmp_path):
     (rain / "vid.mp4").write_text("v")
     cfg.background_videos_path = str(rain)
     cfg.watermark_path = None
+    cfg.cache_dir = str(tmp_path / "cache")
     cfg.validate()
 
     def fake_generate(self, text, out):
@@ -99,3 +108,327 @@ def test_pipeline_no_subtitles(monkeypatch, tmp_path):
     ctx = vp.run("hello", "test", background="Rain", no_subtitles=True)
     assert ctx.final_video_path.exists()
     assert ctx.subtitles_path.exists()
+
+
+def test_pipeline_stage_cache(monkeypatch, tmp_path):
+    cfg = Config()
+    rain = tmp_path / "rain"
+    rain.mkdir()
+    (rain / "vid.mp4").write_text("v")
+    cfg.background_styles = {"Rain": str(rain)}
+    cfg.background_videos_path = str(rain)
+    cfg.watermark_path = None
+    cfg.cache_dir = str(tmp_path / "cache")
+    cfg.stage_isolation = "thread"  # count calls in this process
+    cfg.validate()
+
+    calls = {"voice": 0, "whisper": 0}
+
+    def fake_generate(self, text, out):
+        calls["voice"] += 1
+        out.write_text("voice")
+        return True
+
+    def fake_transcribe(self, path):
+        calls["whisper"] += 1
+        return [{"start": 0.0, "end": 1.0, "text": "hi"}]
+
+    def fake_render(self, audio, subs, output, intro=None, outro=None, **kwargs):
+        output.write_text("video")
+
+    monkeypatch.setattr("pipeline.voiceover.VoiceOverGenerator.generate", fake_generate)
+    monkeypatch.setattr("pipeline.subtitles.SubtitleGenerator.transcribe", fake_transcribe)
+    monkeypatch.setattr("pipeline.renderer.VideoRenderer.render", fake_render)
+
+    vp = VideoPipeline(cfg)
+    vp.run("cached story", "first", background="Rain", output=tmp_path / "a" / "out.mp4")
+    ctx = vp.run("cached story", "second", background="Rain", output=tmp_path / "b" / "out.mp4")
+    assert calls == {"voice": 1, "whisper": 1}
+    assert ctx.voiceover_path.read_text() == "voice"
+    summary = json.loads((ctx.output_dir / "run_summary.json").read_text())
+    assert summary["cache"]["voiceover"]["hits"] == 1
+    assert summary["cache"]["transcribe"]["hits"] == 1
+
+
+def test_pipeline_resume_after_render_failure(monkeypatch, tmp_path):
+    from pipeline.helpers import create_silence
+
+    cfg = Config()
+    rain = tmp_path / "rain"
+    rain.mkdir()
+    (rain / "vid.mp4").write_text("v")
+    cfg.background_styles = {"Rain": str(rain)}
+    cfg.background_videos_path = str(rain)
+    cfg.watermark_path = None
+    cfg.cache_enabled = False
+    cfg.stage_isolation = "thread"  # count calls in this process
+    cfg.validate()
+
+    calls = {"voice": 0, "whisper": 0, "render": 0}
+
+    def fake_generate(self, text, out):
+        calls["voice"] += 1
+        create_silence(out)
+        return True
+
+    def fake_transcribe(self, path):
+        calls["whisper"] += 1
+        return [{"start": 0.0, "end": 1.0, "text": "hi"}]
+
+    def fake_render(self, audio, subs, output, intro=None, outro=None, **kwargs):
+        calls["render"] += 1
+        if calls["render"] == 1:
+            raise RuntimeError("ffmpeg crashed")
+        output.write_text("video")
+
+    monkeypatch.setattr("pipeline.voiceover.VoiceOverGenerator.generate", fake_generate)
+    monkeypatch.setattr("pipeline.subtitles.SubtitleGenerator.transcribe", fake_transcribe)
+    monkeypatch.setattr("pipeline.renderer.VideoRenderer.render", fake_render)
+
+    out = tmp_path / "run" / "final_video.mp4"
+    vp = VideoPipeline(cfg)
+    try:
+        vp.run("resume me", "story", background="Rain", output=out)
+    except RuntimeError:
+        pass
+    meta = json.loads((out.parent / "metadata.json").read_text())
+    assert meta["stages"]["voiceover"] == "done"
+    assert meta["stages"]["render"] == "failed"
+
+    ctx = VideoPipeline(cfg).resume(out.parent)
+    assert ctx.final_video_path.exists()
+    assert calls == {"voice": 1, "whisper": 1, "render": 2}
+    meta = json.loads((out.parent / "metadata.json").read_text())
+    assert meta["status"] == "success"
+    assert meta["stages"]["render"] == "done"
+
+
+def test_pipeline_prepares_background_concurrently(monkeypatch, tmp_path):
+    import threading
+
+    cfg = Config()
+    rain = tmp_path / "rain"
+    rain.mkdir()
+    (rain / "vid.mp4").write_text("v")
+    cfg.background_styles = {"Rain": str(rain)}
+    cfg.background_videos_path = str(rain)
+    cfg.watermark_path = None
+    cfg.cache_enabled = False
+    cfg.stage_isolation = "thread"  # count calls in this process
+    cfg.validate()
+
+    seen = {}
+    original = VideoRenderer.prepare_background
+
+    def fake_prepare(self, *args, **kwargs):
+        seen["thread"] = threading.current_thread().name
+        return original(self, *args, **kwargs)
+
+    def fake_generate(self, text, out):
+        out.write_text("voice")
+        return True
+
+    def fake_render(self, audio, subs, output, intro=None, outro=None, **kwargs):
+        seen["background"] = kwargs["background"].clip
+        output.write_text("video")
+
+    monkeypatch.setattr(VideoRenderer, "prepare_background", fake_prepare)
+    monkeypatch.setattr("pipeline.voiceover.VoiceOverGenerator.generate", fake_generate)
+    monkeypatch.setattr("pipeline.renderer.VideoRenderer.render", fake_render)
+
+    vp = VideoPipeline(cfg)
+    vp.run("hello", "bg", background="Rain", whisper_disable=True, output=tmp_path / "o" / "v.mp4")
+    assert seen["thread"].startswith("stage")
+    assert seen["background"] == rain / "vid.mp4"
+
+
+def test_pipeline_resume_reuses_render_after_concat_failure(monkeypatch, tmp_path):
+    from pipeline.helpers import create_silence
+
+    cfg = Config()
+    rain = tmp_path / "rain"
+    rain.mkdir()
+    (rain / "vid.mp4").write_text("v")
+    cfg.background_styles = {"Rain": str(rain)}
+    cfg.background_videos_path = str(rain)
+    cfg.watermark_path = None
+    cfg.cache_enabled = False
+    cfg.stage_isolation = "thread"  # count calls in this process
+    cfg.validate()
+
+    intro = tmp_path / "intro.mp4"
+    intro.write_text("intro")
+    calls = {"render": 0, "concat": 0}
+
+    def fake_generate(self, text, out):
+        create_silence(out)
+        return True
+
+    def fake_render(self, audio, subs, output, intro=None, outro=None, **kwargs):
+        calls["render"] += 1
+        output.write_text("video")
+
+    def fake_concat(clips, output, ffmpeg="ffmpeg", timeout=None):
+        calls["concat"] += 1
+        if calls["concat"] == 1:
+            raise RuntimeError("concat failed")
+        output.write_text("".join(c.read_text() for c in clips))
+
+    monkeypatch.setattr("pipeline.voiceover.VoiceOverGenerator.generate", fake_generate)
+    monkeypatch.setattr("pipeline.renderer.VideoRenderer.render", fake_render)
+    monkeypatch.setattr("pipeline.pipeline.concat_clips", fake_concat)
+
+    out = tmp_path / "run" / "final_video.mp4"
+    try:
+        VideoPipeline(cfg).run(
+            "resume me", "story", whisper_disable=True, intro=intro, output=out
+        )
+    except RuntimeError:
+        pass
+    assert (out.parent / "_main.mp4").exists()
+
+    ctx = VideoPipeline(cfg).resume(out.parent)
+    assert ctx.final_video_path.read_text() == "introvideo"
+    assert calls == {"render": 1, "concat": 2}
+    meta = json.loads((out.parent / "metadata.json").read_text())
+    assert meta["stages"]["render"] == "reused"
+    assert meta["stages"]["background_prep"] == "reused"
+    assert meta["stages"]["concat"] == "done"
+    assert not (out.parent / "_main.mp4").exists()
+
+
+def test_pipeline_speech_rate_maps_raw_transcript(monkeypatch, tmp_path, write_wav):
+    import wave
+
+    import pytest
+
+    pytest.importorskip("numpy")
+    cfg = Config()
+    cfg.background_styles = {"Rain": str(tmp_path / "rain")}
+    rain = tmp_path / "rain"
+    rain.mkdir()
+    (rain / "vid.mp4").write_text("v")
+    cfg.background_videos_path = str(rain)
+    cfg.watermark_path = None
+    cfg.cache_enabled = False
+    cfg.speech_rate = 2.0
+    cfg.stage_isolation = "thread"  # the fakes record into this process
+    cfg.validate()
+    seen = {}
+
+    def fake_generate(self, text, out):
+        write_wav(out, [0.0005] * 16000)
+        return True
+
+    def fake_transcribe(self, path):
+        seen["transcribed"] = Path(path).name
+        return [{"start": 1.0, "end": 2.0, "text": "hi"}]
+
+    def fake_generate_ass(self, words, path):
+        seen["words"] = words
+        path.write_text("sub")
+
+    def fake_render(self, audio, subs, output, intro=None, outro=None, **kwargs):
+        output.write_text("video")
+
+    monkeypatch.setattr("pipeline.voiceover.VoiceOverGenerator.generate", fake_generate)
+    monkeypatch.setattr("pipeline.subtitles.SubtitleGenerator.transcribe", fake_transcribe)
+    monkeypatch.setattr("pipeline.subtitles.SubtitleGenerator.generate_ass", fake_generate_ass)
+    monkeypatch.setattr("pipeline.renderer.VideoRenderer.render", fake_render)
+
+    vp = VideoPipeline(cfg, debug=True)
+    ctx = vp.run("hello", "test", background="Rain")
+    ctx.archive_future.result()
+    assert seen["transcribed"] == "voice_raw.wav"
+    assert seen["words"] == [{"start": 0.5, "end": 1.0, "text": "hi"}]
+    with wave.open(str(ctx.voiceover_path), "rb") as wf:
+        assert wf.getnframes() == 8000
+
+
+def test_pipeline_uses_engine_timings_instead_of_whisper(monkeypatch, tmp_path):
+    cfg = Config()
+    cfg.background_styles = {"Rain": str(tmp_path / "rain")}
+    rain = tmp_path / "rain"
+    rain.mkdir()
+    (rain / "vid.mp4").write_text("v")
+    cfg.background_videos_path = str(rain)
+    cfg.watermark_path = None
+    cfg.cache_enabled = False
+    cfg.stage_isolation = "thread"  # the fakes record into this process
+    cfg.validate()
+    timings = [{"start": 0.0, "end": 0.4, "text": "hello"}]
+    seen = {}
+
+    def fake_generate(self, text, out):
+        out.write_text("voice")
+        self.word_timings = timings
+        return True
+
+    def fake_transcribe(self, path):
+        raise AssertionError("Whisper should be skipped")
+
+    def fake_generate_ass(self, words, path):
+        seen["words"] = words
+        path.write_text("sub")
+
+    def fake_render(self, audio, subs, output, intro=None, outro=None, **kwargs):
+        output.write_text("video")
+
+    monkeypatch.setattr("pipeline.voiceover.VoiceOverGenerator.generate", fake_generate)
+    monkeypatch.setattr("pipeline.subtitles.SubtitleGenerator.transcribe", fake_transcribe)
+    monkeypatch.setattr("pipeline.subtitles.SubtitleGenerator.generate_ass", fake_generate_ass)
+    monkeypatch.setattr("pipeline.renderer.VideoRenderer.render", fake_render)
+
+    vp = VideoPipeline(cfg, debug=True)
+    ctx = vp.run("hello", "test", background="Rain")
+    ctx.archive_future.result()
+    assert json.loads(ctx.transcript_path.read_text()) == timings
+    assert seen["words"] == timings
+
+
+def test_chunk_map_timings_are_opt_in(tmp_path):
+    from pipeline.helpers import PipelineContext
+
+    cfg = Config()
+    cfg.cache_enabled = False
+    ctx = PipelineContext("hello", "test", tmp_path, "simple", "coqui")
+    ctx.chunks_path.write_text(json.dumps([{"start": 0.0, "end": 1.0, "text": "hello"}]))
+    assert VideoPipeline(cfg)._has_engine_timings(ctx) is False
+    cfg.chunk_timings = True
+    assert VideoPipeline(cfg)._has_engine_timings(ctx) is True
+
+
+def test_pipeline_closes_session_log(monkeypatch, tmp_path):
+    import logging
+
+    cfg = Config()
+    rain = tmp_path / "rain"
+    rain.mkdir()
+    (rain / "vid.mp4").write_text("v")
+    cfg.background_styles = {"Rain": str(rain)}
+    cfg.background_videos_path = str(rain)
+    cfg.watermark_path = None
+    cfg.cache_enabled = False
+    cfg.validate()
+
+    def fake_generate(self, text, out):
+        out.write_text("voice")
+        return True
+
+    def fake_render(self, audio, subs, output, intro=None, outro=None, **kwargs):
+        output.write_text("video")
+
+    monkeypatch.setattr("pipeline.voiceover.VoiceOverGenerator.generate", fake_generate)
+    monkeypatch.setattr("pipeline.renderer.VideoRenderer.render", fake_render)
+
+    vp = VideoPipeline(cfg)
+    for name in ("a", "b"):
+        vp.run("hello", name, background="Rain", whisper_disable=True, output=tmp_path / name / "out.mp4")
+    open_logs = [
+        h.baseFilename
+        for logger in logging.Logger.manager.loggerDict.values()
+        if isinstance(logger, logging.Logger)
+        for h in logger.handlers
+        if isinstance(h, logging.FileHandler) and h.baseFilename.startswith(str(tmp_path))
+    ]
+    assert open_logs == []
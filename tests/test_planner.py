@@ -0,0 +1,89 @@
+import json
+
+from pipeline.cache import StageCache
+from pipeline.config import Config
+from pipeline.helpers import create_silence
+from pipeline.pipeline import VideoPipeline
+from pipeline.planner import DRIVERS, History, Planner, estimate_batch
+
+
+def _config(tmp_path):
+    cfg = Config()
+    rain = tmp_path / "rain"
+    rain.mkdir()
+    (rain / "vid.mp4").write_text("v")
+    cfg.background_styles = {"Rain": str(rain)}
+    cfg.background_videos_path = str(rain)
+    cfg.watermark_path = None
+    cfg.voice_engine = "coqui"
+    cfg.cache_dir = str(tmp_path / "cache")
+    return cfg
+
+
+def test_history_predicts_from_past_runs(tmp_path):
+    run = tmp_path / "story_1"
+    run.mkdir()
+    summary = {
+        "success": True,
+        "script_chars": 100,
+        "audio_duration_s": 10.0,
+        "stages": {
+            "voiceover": {"status": "done", "wall_s": 5.0},
+            "render": {"status": "done", "wall_s": 20.0},
+            "transcribe": {"status": "cached", "wall_s": 0.01},
+        },
+    }
+    (run / "run_summary.json").write_text(json.dumps(summary))
+    history = History.load(tmp_path)
+    assert len(history) == 1
+    assert history.seconds_per_char() == 0.1
+    assert history.predict("voiceover", 200, 20.0) == 10.0
+    assert history.predict("render", 200, 20.0) == 40.0
+    assert history.predict("transcribe", 200, 20.0) is None
+
+
+def test_every_stage_has_a_driver():
+    from pipeline.pipeline import STAGES
+
+    assert set(DRIVERS) == set(STAGES)
+
+
+def test_planner_reports_cache_hits_and_command(tmp_path):
+    cfg = _config(tmp_path)
+    text = "planned story"
+    pipeline = VideoPipeline(cfg)
+    voice = tmp_path / "voice.wav"
+    create_silence(voice, duration=2.0)
+    cache = StageCache(cfg.cache_dir)
+    cache.store("voiceover", pipeline.voiceover_key(text, None, "coqui"), voice)
+
+    plan = Planner(cfg, History([])).plan(
+        text, "story", background="Rain", output=tmp_path / "out" / "v.mp4"
+    )
+    actions = {s.name: s.action for s in plan.stages}
+    assert actions["voiceover"] == "cached"
+    assert actions["transcribe"] == "run"
+    assert actions["concat"] == "skip"
+    assert plan.audio_s == 2.0 and not plan.audio_estimated
+    assert plan.background_clip == tmp_path / "rain" / "vid.mp4"
+    assert plan.ffmpeg_command[-1] == (tmp_path / "out" / "v.mp4").as_posix()
+    assert not (tmp_path / "out").exists()
+
+
+def test_estimate_batch_respects_resource_limits(tmp_path):
+    cfg = _config(tmp_path)
+    history = History(
+        [
+            {
+                "success": True,
+                "script_chars": 10,
+                "audio_duration_s": 1.0,
+                "stages": {"render": {"status": "done", "wall_s": 10.0}},
+            }
+        ]
+    )
+    plan = Planner(cfg, history).plan("x" * 10, "s", background="Rain")
+    assert plan.predicted_s == 10.0
+    assert estimate_batch([plan] * 8) == 80.0
+    # render needs ffmpeg, limited to 2 slots no matter how many jobs
+    assert estimate_batch([plan] * 8, jobs=8, limits={"ffmpeg": 2}) == 40.0
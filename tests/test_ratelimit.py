@@ -0,0 +1,45 @@
+import time
+
+from pipeline import ratelimit
+from pipeline.ratelimit import TokenBucket, backoff_delay, parse_retry_after
+
+
+def test_bucket_limits_request_rate():
+    bucket = TokenBucket(requests_per_s=20)
+    start = time.time()
+    for _ in range(25):  # 20 burst + 5 refilled at 20/s
+        bucket.acquire()
+    assert time.time() - start >= 0.2
+    stats = bucket.stats()
+    assert stats["requests"] == 25
+    assert stats["queue_depth"] == 0
+
+
+def test_bucket_budgets_characters():
+    bucket = TokenBucket(requests_per_s=100, chars_per_min=600)  # 10 chars/s
+    assert bucket.acquire(600) < 0.1
+    assert bucket.acquire(3) >= 0.25
+    assert bucket.stats()["chars"] == 603
+
+
+def test_pause_blocks_every_caller():
+    bucket = TokenBucket(requests_per_s=100)
+    bucket.pause(0.3)
+    assert bucket.acquire() >= 0.25
+    assert bucket.stats()["throttled"] == 1
+
+
+def test_retry_after_and_backoff():
+    assert parse_retry_after("3") == 3.0
+    assert parse_retry_after(None) is None
+    assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0.0
+    assert all(0 <= backoff_delay(n, cap=4) <= 4 for n in range(10))
+
+
+def test_configure_keeps_installed_bucket():
+    shared = TokenBucket()
+    ratelimit.install(shared)
+    try:
+        assert ratelimit.configure(5, 100) is shared
+    finally:
+        ratelimit.install(None)
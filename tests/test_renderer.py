@@ -1,5 +1,5 @@
 import logging
-import subprocess
+import sys
 from pathlib import Path
 import pytest
 
@@ -78,7 +78,7 @@ def test_filter_complex_switch(tmp_path, monkeypatch):
 
     captured = {}
 
-    def fake_run(cmd, check, capture_output, text):
+    def fake_run(cmd, timeout=None, check=True, **kwargs):
         captured["cmd"] = cmd
         (tmp_path / "out.mp4").write_text("video")
         class R:
@@ -86,8 +86,137 @@ def test_filter_complex_switch(tmp_path, monkeypatch):
             stderr = ""
         return R()
 
-    monkeypatch.setattr(subprocess, "run", fake_run)
+    monkeypatch.setattr("pipeline.renderer.run_process", fake_run)
 
     renderer.render(audio, subs, tmp_path / "out.mp4")
     assert "-filter_complex" in captured["cmd"]
     assert all("\\" not in part for part in captured["cmd"])
+
+
+def test_render_cache_hit(tmp_path, monkeypatch):
+    from pipeline.cache import StageCache
+
+    bg = tmp_path / "bg"
+    bg.mkdir(parents=True)
+    (bg / "vid.mp4").write_text("v")
+    renderer = VideoRenderer(bg)
+    audio = tmp_path / "voice.wav"
+    create_silence(audio)
+    cache = StageCache(tmp_path / "cache")
+    calls = []
+
+    def fake_run(cmd, timeout=None, check=True, **kwargs):
+        calls.append(cmd)
+        Path(cmd[-1]).write_text("video")
+        class R:
+            stdout = ""
+            stderr = ""
+        return R()
+
+    monkeypatch.setattr("pipeline.renderer.run_process", fake_run)
+
+    renderer.render(audio, None, tmp_path / "a" / "out.mp4", cache=cache)
+    renderer.render(audio, None, tmp_path / "b" / "final.mp4", cache=cache)
+    assert len(calls) == 1
+    assert (tmp_path / "b" / "final.mp4").read_text() == "video"
+    assert cache.stats["render"] == {"hits": 1, "misses": 1}
+
+
+def test_prepare_background_used_by_render(tmp_path, monkeypatch):
+    bg = tmp_path / "bg"
+    bg.mkdir(parents=True)
+    (bg / "a.mp4").write_text("v")
+    (bg / "b.mp4").write_text("v")
+    renderer = VideoRenderer(bg)
+    prepared = renderer.prepare_background(tmp_path, prescale=True)
+    assert prepared.path == prepared.clip
+    assert prepared.prescaled is False
+
+    audio = tmp_path / "voice.wav"
+    create_silence(audio)
+    captured = {}
+
+    def fake_run(cmd, timeout=None, check=True, **kwargs):
+        captured["cmd"] = cmd
+        Path(cmd[-1]).write_text("video")
+        class R:
+            stdout = ""
+            stderr = ""
+        return R()
+
+    monkeypatch.setattr("pipeline.renderer.run_process", fake_run)
+    monkeypatch.setattr(renderer, "pick_background", lambda: pytest.fail("picked again"))
+    renderer.render(audio, None, tmp_path / "out.mp4", background=prepared)
+    assert captured["cmd"][3] == prepared.clip.as_posix()
+
+
+def test_render_cache_ignores_run_folder_copies(tmp_path, monkeypatch):
+    import os
+    from pipeline.cache import StageCache
+    from pipeline.renderer import PreparedBackground
+
+    bg = tmp_path / "bg"
+    bg.mkdir(parents=True)
+    clip = bg / "vid.mp4"
+    clip.write_text("v")
+    renderer = VideoRenderer(bg)
+    cache = StageCache(tmp_path / "cache")
+    audio = tmp_path / "voice.wav"
+    create_silence(audio)
+    calls = []
+
+    def fake_run(cmd, timeout=None, check=True, **kwargs):
+        calls.append(cmd)
+        Path(cmd[-1]).write_text("video")
+        class R:
+            stdout = ""
+            stderr = ""
+        return R()
+
+    monkeypatch.setattr("pipeline.renderer.run_process", fake_run)
+    for n, run in enumerate(("a", "b")):
+        run_dir = tmp_path / run
+        run_dir.mkdir()
+        # per-run copies of the converted watermark and pre-scaled clip
+        renderer.watermark = run_dir / "_watermark.png"
+        renderer.watermark.write_text("img")
+        scaled = run_dir / "_background.mp4"
+        scaled.write_text("scaled")
+        os.utime(scaled, (1000 + n, 1000 + n))
+        prepared = PreparedBackground(clip=clip, path=scaled, prescaled=True)
+        renderer.render(audio, None, run_dir / "out.mp4", cache=cache, background=prepared)
+    assert len(calls) == 1
+    assert cache.stats["render"] == {"hits": 1, "misses": 1}
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="needs a shell script")
+def test_prepare_watermark_times_out(tmp_path):
+    import os
+    import time
+    from pipeline.renderer import prepare_watermark
+
+    slow = tmp_path / "ffmpeg"
+    slow.write_text("#!/bin/sh\nsleep 30\n")
+    os.chmod(slow, 0o755)
+    wm = tmp_path / "wm.png"
+    wm.write_text("img")
+    start = time.time()
+    with pytest.raises(TimeoutError):
+        prepare_watermark(wm, 0.5, tmp_path, str(slow), timeout=0.5)
+    assert time.time() - start < 10
+
+
+def test_probe_times_out(tmp_path):
+    import os
+    import time
+
+    bg = tmp_path / "bg"
+    bg.mkdir()
+    (bg / "vid.mp4").write_text("v")
+    slow = tmp_path / "ffprobe"
+    slow.write_text("#!/bin/sh\nsleep 30\n")
+    os.chmod(slow, 0o755)
+    renderer = VideoRenderer(bg, ffmpeg_path=str(tmp_path / "ffmpeg"))
+    start = time.time()
+    assert renderer.probe(bg / "vid.mp4", timeout=0.5) == {}
+    assert time.time() - start < 10
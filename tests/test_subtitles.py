@@ -19,3 +19,46 @@ def test_generate_ass(tmp_path):
     content = out.read_text()
     assert "Dialogue: 0,0:00:00.00,0:00:01.00,Default,Hello" in content
 
+
+def test_whisper_model_is_loaded_once_per_process(tmp_path, monkeypatch, write_wav):
+    import sys
+    import types
+
+    from pipeline.models import whisper_models
+
+    loads = []
+
+    class FakeModel:
+        def transcribe(self, path, word_timestamps=False):
+            return {"segments": [{"start": 0.0, "end": 0.5, "text": "hi"}]}
+
+    def load_model(name):
+        loads.append(name)
+        return FakeModel()
+
+    monkeypatch.setitem(sys.modules, "whisper", types.SimpleNamespace(load_model=load_model))
+    audio = write_wav(tmp_path / "voice.wav", seconds=1.0)
+    whisper_models.clear()
+    try:
+        assert SubtitleGenerator("simple", model="base").warmup()
+        for _ in range(2):  # a new generator per run, as the pipeline does
+            assert SubtitleGenerator("simple", model="base").transcribe(audio)[0]["text"] == "hi"
+        assert loads == ["base"]
+        assert whisper_models.stats()["hits"] == 2
+    finally:
+        whisper_models.clear()
+
+
+def test_warmup_reports_load_failure(monkeypatch):
+    import sys
+    import types
+
+    from pipeline.models import whisper_models
+
+    def load_model(name):
+        raise RuntimeError(f"unknown model {name}")
+
+    monkeypatch.setitem(sys.modules, "whisper", types.SimpleNamespace(load_model=load_model))
+    whisper_models.clear()
+    assert SubtitleGenerator("simple", model="nope").warmup() is False
+    assert whisper_models.loaded() == []
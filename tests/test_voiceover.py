@@ -79,13 +79,15 @@ def test_invalid_voice_id_fallback(monkeypatch, tmp_path):
     assert out.exists()
 
 
-def test_coqui_download(monkeypatch, tmp_path):
-    events = {"download": False}
+def test_coqui_load_failure_does_not_download(monkeypatch, tmp_path):
+    from pipeline.models import coqui_models
+
+    events = {"download": False, "loads": 0}
 
     class FakeTTS:
         def __init__(self, *args, **kwargs):
-            if not events.get("tried"):
-                events["tried"] = True
+            events["loads"] += 1
+            if events["loads"] == 1:
                 raise RuntimeError("model missing")
 
         def tts_to_file(self, text: str, file_path: str):
@@ -109,6 +111,7 @@ def test_coqui_download(monkeypatch, tmp_path):
     monkeypatch.setitem(sys.modules, "TTS.api", api_mod)
     monkeypatch.setitem(sys.modules, "TTS.utils", utils_mod)
     monkeypatch.setitem(sys.modules, "TTS.utils.manage", manage_mod)
+    coqui_models.clear()
 
     gen = VoiceOverGenerator(
         "elevenlabs",
@@ -116,11 +119,14 @@ def test_coqui_download(monkeypatch, tmp_path):
     )
 
     out = tmp_path / "out.wav"
-    result = gen.generate("hi", out)
-
-    assert result is True
-    assert events["download"] is True
-    assert out.exists()
+    assert gen.generate("hi", out) is False
+    assert events["download"] is False
+    # once the model is present the next call loads it and keeps it resident
+    assert gen.generate("hi", out) is True
+    assert gen.generate("hi again", out) is True
+    assert events["loads"] == 2
+    assert coqui_models.stats()["hits"] == 1
+    coqui_models.clear()
 
 
 def test_force_coqui(monkeypatch, tmp_path):
@@ -139,3 +145,352 @@ def test_force_coqui(monkeypatch, tmp_path):
     assert gen.generate("hi", out) is True
     assert called["coqui"] is True
 
+
+def test_chunked_elevenlabs_runs_requests_concurrently(monkeypatch, tmp_path, write_wav):
+    import json
+    import threading
+
+    monkeypatch.setenv("ELEVENLABS_API_KEY", "key")
+    monkeypatch.setenv("ELEVENLABS_VOICE_ID", "voice")
+    gen = VoiceOverGenerator(
+        "elevenlabs",
+        chunk_chars=20,
+        elevenlabs_concurrency=3,
+        chunk_silence_ms=0,
+        chunks_path=tmp_path / "chunks.json",
+    )
+    barrier = threading.Barrier(3, timeout=5)
+
+    def fake_eleven(text, path):
+        barrier.wait()  # only passes if three requests are in flight at once
+        write_wav(path)
+        return True
+
+    monkeypatch.setattr(gen, "_generate_elevenlabs", fake_eleven)
+    out = tmp_path / "voice.wav"
+    assert gen.generate("First sentence. Second sentence. Third sentence.", out) is True
+    assert gen.used_engine == "elevenlabs"
+    chunks = json.loads((tmp_path / "chunks.json").read_text())
+    assert [c["text"] for c in chunks] == ["First sentence.", "Second sentence.", "Third sentence."]
+    assert chunks[-1]["end"] == 1.5
+    assert not (tmp_path / ".voice_chunks").exists()
+
+
+def test_chunked_coqui_uses_process_pool(monkeypatch, tmp_path, write_wav):
+    import json
+    import multiprocessing
+    import os
+    import types
+
+    import pytest
+
+    if "fork" not in multiprocessing.get_all_start_methods():
+        pytest.skip("fork not available")
+    from pipeline.models import coqui_models
+
+    class FakeTTS:
+        def __init__(self, *args, **kwargs):
+            pass
+
+        def tts_to_file(self, text: str, file_path: str):
+            write_wav(Path(file_path))
+            Path(file_path + ".pid").write_text(str(os.getpid()))
+
+    api_mod = types.ModuleType("TTS.api")
+    api_mod.TTS = FakeTTS
+    monkeypatch.setitem(sys.modules, "TTS", types.ModuleType("TTS"))
+    monkeypatch.setitem(sys.modules, "TTS.api", api_mod)
+    coqui_models.clear()
+
+    gen = VoiceOverGenerator(
+        "coqui",
+        coqui_model_name="model",
+        chunk_chars=12,
+        coqui_workers=2,
+        chunks_path=tmp_path / "chunks.json",
+    )
+    pids = []
+    original = __import__("shutil").rmtree
+
+    def keep_pids(path, ignore_errors=False):
+        pids.extend(p.read_text() for p in Path(path).glob("*.pid"))
+        original(path, ignore_errors=ignore_errors)
+
+    monkeypatch.setattr("pipeline.voiceover.shutil.rmtree", keep_pids)
+    out = tmp_path / "voice.wav"
+    assert gen.generate("One two. Three four.\n\nFive six.", out) is True
+    assert len(json.loads((tmp_path / "chunks.json").read_text())) == 3
+    assert str(os.getpid()) not in pids
+    coqui_models.clear()
+
+
+def test_tts_cache_synthesizes_only_changed_sentences(monkeypatch, tmp_path, write_wav):
+    from pipeline.cache import StageCache
+
+    monkeypatch.setenv("ELEVENLABS_API_KEY", "key")
+    monkeypatch.setenv("ELEVENLABS_VOICE_ID", "voice")
+    gen = VoiceOverGenerator(
+        "elevenlabs",
+        chunk_chars=400,
+        tts_cache=StageCache(tmp_path / "tts"),
+        tts_cache_sentences=True,
+    )
+    synthesized = []
+
+    def fake_eleven(text, path):
+        synthesized.append(text)
+        write_wav(path)
+        return True
+
+    monkeypatch.setattr(gen, "_generate_elevenlabs", fake_eleven)
+    assert gen.generate("First sentence. Second sentence.", tmp_path / "a.wav") is True
+    assert synthesized == ["First sentence.", "Second sentence."]
+    synthesized.clear()
+    assert gen.generate("First  sentence. Changed sentence.", tmp_path / "b.wav") is True
+    assert synthesized == ["Changed sentence."]
+    assert gen.tts_stats["hits"] == 1
+    assert gen.tts_stats["chars_reused"] == len("First sentence.")
+
+
+def test_tts_cache_keeps_sentences_grouped_by_default(monkeypatch, tmp_path, write_wav):
+    from pipeline.cache import StageCache
+
+    monkeypatch.setenv("ELEVENLABS_API_KEY", "key")
+    monkeypatch.setenv("ELEVENLABS_VOICE_ID", "voice")
+    gen = VoiceOverGenerator(
+        "elevenlabs", chunk_chars=400, tts_cache=StageCache(tmp_path / "tts")
+    )
+    synthesized = []
+
+    def fake_eleven(text, path):
+        synthesized.append(text)
+        write_wav(path)
+        return True
+
+    monkeypatch.setattr(gen, "_generate_elevenlabs", fake_eleven)
+    assert gen.generate("First sentence. Second sentence.", tmp_path / "a.wav") is True
+    assert synthesized == ["First sentence. Second sentence."]
+    synthesized.clear()
+    assert gen.generate("First sentence. Second sentence.", tmp_path / "b.wav") is True
+    assert synthesized == []
+
+
+def test_elevenlabs_429_honors_retry_after(monkeypatch, tmp_path):
+    from pipeline import ratelimit, voiceover
+    from pipeline.elevenlabs import ElevenLabsError
+
+    class Client:
+        calls = 0
+
+        def synthesize(self, voice_id, text, dest, cancel=None, with_timestamps=False):
+            Client.calls += 1
+            if Client.calls == 1:
+                raise ElevenLabsError(429, "too_many_concurrent_requests", retry_after=0.2)
+            dest.write_text("audio")
+
+    bucket = ratelimit.TokenBucket(requests_per_s=100)
+    monkeypatch.setattr(ratelimit, "_bucket", bucket)
+    monkeypatch.setattr("pipeline.breaker._breaker", None)
+    monkeypatch.setattr(voiceover, "get_client", lambda key: Client())
+    monkeypatch.setenv("ELEVENLABS_API_KEY", "key")
+    monkeypatch.setenv("ELEVENLABS_VOICE_ID", "voice")
+    gen = VoiceOverGenerator("elevenlabs")
+    monkeypatch.setattr(gen, "_generate_coqui", lambda *a: False)
+    assert gen.generate("hi", tmp_path / "out.wav") is True
+    stats = bucket.stats()
+    assert (stats["requests"], stats["throttled"], stats["retries"]) == (2, 1, 1)
+    assert stats["wait_s"] >= 0.15
+
+
+def test_open_circuit_goes_straight_to_coqui(monkeypatch, tmp_path):
+    from pipeline import breaker, voiceover
+    from pipeline.breaker import CircuitBreaker
+
+    class Client:
+        calls = 0
+
+        def synthesize(self, voice_id, text, dest, cancel=None, with_timestamps=False):
+            Client.calls += 1
+            raise ConnectionError("down")
+
+    monkeypatch.setattr(breaker, "_breaker", CircuitBreaker("elevenlabs", threshold=2))
+    monkeypatch.setattr("pipeline.ratelimit._bucket", None)
+    monkeypatch.setattr(voiceover, "get_client", lambda key: Client())
+    monkeypatch.setattr(voiceover, "backoff_delay", lambda attempt: 0)
+    monkeypatch.setenv("ELEVENLABS_API_KEY", "key")
+    monkeypatch.setenv("ELEVENLABS_VOICE_ID", "voice")
+    gen = VoiceOverGenerator("elevenlabs")
+
+    def fake_coqui(text, path):
+        path.write_text("audio")
+        return True
+
+    monkeypatch.setattr(gen, "_generate_coqui", fake_coqui)
+    assert gen.generate("hi", tmp_path / "a.wav") is True
+    assert Client.calls == 2  # the breaker opened before the remaining retries
+    assert gen.generate("hi", tmp_path / "b.wav") is True
+    assert Client.calls == 2
+    assert gen.used_engine == "coqui"
+    assert breaker.breaker().stats()["short_circuits"] == 2
+
+
+def _racing_generator(monkeypatch, eleven_s, coqui_s, grace_s=0.5):
+    import threading
+
+    monkeypatch.setenv("ELEVENLABS_API_KEY", "key")
+    monkeypatch.setenv("ELEVENLABS_VOICE_ID", "voice")
+    gen = VoiceOverGenerator("elevenlabs", hedge_after_s=0.05, hedge_grace_s=grace_s)
+    cancelled = []
+
+    def engine(name, seconds):
+        def synth(self, text, path):
+            if self.cancel.wait(seconds):
+                cancelled.append(name)
+                return False
+            path.write_text(name)
+            return True
+
+        return synth
+
+    monkeypatch.setattr(VoiceOverGenerator, "_generate_elevenlabs", engine("elevenlabs", eleven_s))
+    monkeypatch.setattr(VoiceOverGenerator, "_generate_coqui", engine("coqui", coqui_s))
+    return gen, cancelled
+
+
+def test_hedged_coqui_wins_and_elevenlabs_is_cancelled(monkeypatch, tmp_path):
+    import time
+
+    gen, cancelled = _racing_generator(monkeypatch, eleven_s=5, coqui_s=0.1, grace_s=0.1)
+    out = tmp_path / "voice.wav"
+    start = time.time()
+    assert gen.generate("hi", out) is True
+    assert time.time() - start < 2
+    assert gen.used_engine == "coqui"
+    assert out.read_text() == "coqui"
+    time.sleep(0.1)
+    assert cancelled == ["elevenlabs"]
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["voice.wav"]
+
+
+def test_hedged_prefers_elevenlabs_within_grace(monkeypatch, tmp_path):
+    gen, cancelled = _racing_generator(monkeypatch, eleven_s=0.2, coqui_s=0.1, grace_s=1.0)
+    out = tmp_path / "voice.wav"
+    assert gen.generate("hi", out) is True
+    assert gen.used_engine == "elevenlabs"
+    assert out.read_text() == "elevenlabs"
+
+
+def test_discard_racers_removes_leftovers(tmp_path):
+    gen = VoiceOverGenerator("elevenlabs", chunks_path=tmp_path / "chunks.json")
+    out = tmp_path / "voice.wav"
+    out.write_text("won")
+    # files of a racer killed along with its stage worker
+    (tmp_path / ".voice_coqui.wav").write_text("partial")
+    (tmp_path / ".coqui_chunks.json").write_text("[]")
+    gen.discard_racers(out)
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["voice.wav"]
+
+
+def test_previews_are_cached_per_voice(monkeypatch, tmp_path):
+    from pipeline.config import Config
+    from pipeline.helpers import prewarm_previews, render_preview
+
+    synthesized = []
+
+    def fake_generate(self, text, path):
+        synthesized.append(self.voice_id)
+        path.write_text(text)
+        self.used_engine = self.engine
+        return True
+
+    monkeypatch.setattr(VoiceOverGenerator, "generate", fake_generate)
+    config = Config(
+        voices={"A": "voice_a", "B": "voice_b"}, preview_cache_dir=str(tmp_path / "previews")
+    )
+    results = prewarm_previews(config)
+    assert sorted(synthesized) == ["voice_a", "voice_b"]
+    assert results["A"] != results["B"]
+    assert results["A"].read_text() == "This is a sample of voice_a"
+    again = render_preview("elevenlabs", "voice_a", config.coqui_model_name, tmp_path / "previews")
+    assert again == results["A"]
+    assert len(synthesized) == 2
+    assert sorted(p.name for p in (tmp_path / "previews").iterdir()) == sorted(
+        p.name for p in results.values()
+    )
+
+
+def test_elevenlabs_word_timings_survive_chunking_and_cache(monkeypatch, tmp_path, write_wav):
+    from pipeline import voiceover
+    from pipeline.cache import StageCache
+
+    class Client:
+        calls = 0
+
+        def synthesize(self, voice_id, text, dest, cancel=None, with_timestamps=False):
+            Client.calls += 1
+            write_wav(dest)
+            n = len(text)
+            return {
+                "alignment": {
+                    "characters": list(text),
+                    "start": [i * 0.02 for i in range(n)],
+                    "end": [(i + 1) * 0.02 for i in range(n)],
+                }
+            }
+
+    monkeypatch.setattr("pipeline.ratelimit._bucket", None)
+    monkeypatch.setattr("pipeline.breaker._breaker", None)
+    monkeypatch.setattr(voiceover, "get_client", lambda key: Client())
+    monkeypatch.setenv("ELEVENLABS_API_KEY", "key")
+    monkeypatch.setenv("ELEVENLABS_VOICE_ID", "voice")
+    gen = VoiceOverGenerator(
+        "elevenlabs",
+        chunk_chars=400,
+        chunk_silence_ms=250,
+        tts_cache=StageCache(tmp_path / "tts"),
+        tts_cache_sentences=True,
+        timings=True,
+    )
+    expected = [
+        {"start": 0.0, "end": 0.04, "text": "Hi"},
+        {"start": 0.06, "end": 0.18, "text": "there."},
+        {"start": 0.75, "end": 0.81, "text": "Bye"},
+        {"start": 0.83, "end": 0.91, "text": "now."},
+    ]
+    assert gen.generate("Hi there. Bye now.", tmp_path / "a.wav") is True
+    assert gen.word_timings == expected
+    assert gen.generate("Hi there. Bye now.", tmp_path / "b.wav") is True
+    assert Client.calls == 2  # the second run came from the TTS cache
+    assert gen.word_timings == expected
+
+
+def test_coqui_inference_is_serialized_across_threads(monkeypatch, tmp_path, write_wav):
+    import time
+    import types
+    from concurrent.futures import ThreadPoolExecutor
+    from pipeline.models import coqui_models
+
+    active, overlaps = [], []
+
+    class FakeTTS:
+        def __init__(self, *args, **kwargs):
+            pass
+
+        def tts_to_file(self, text: str, file_path: str):
+            active.append(1)
+            overlaps.append(len(active))
+            time.sleep(0.05)
+            write_wav(Path(file_path))
+            active.pop()
+
+    api_mod = types.ModuleType("TTS.api")
+    api_mod.TTS = FakeTTS
+    monkeypatch.setitem(sys.modules, "TTS", types.ModuleType("TTS"))
+    monkeypatch.setitem(sys.modules, "TTS.api", api_mod)
+    coqui_models.clear()
+    gen = VoiceOverGenerator("coqui", coqui_model_name="model")
+    with ThreadPoolExecutor(max_workers=3) as pool:
+        results = list(pool.map(lambda i: gen._generate_coqui("hi", tmp_path / f"{i}.wav"), range(3)))
+    assert results == [True, True, True]
+    assert max(overlaps) == 1
+    coqui_models.clear()
@@ -0,0 +1,55 @@
+import json
+import logging
+import time
+
+from pipeline.config import Config
+from pipeline.voices import VoiceCatalog
+
+
+def _write(path, voices, age=0):
+    path.write_text(json.dumps({"fetched_at": time.time() - age, "voices": voices}))
+
+
+def test_unknown_ids_use_cached_catalog(tmp_path):
+    path = tmp_path / "voices.json"
+    _write(path, [{"voice_id": "abc", "name": "Rachel"}])
+    catalog = VoiceCatalog(path, api_key="key")
+    assert catalog.unknown(["abc", "typo", None]) == ["typo"]
+    assert VoiceCatalog(tmp_path / "missing.json", api_key=None).unknown(["typo"]) == []
+
+
+def test_stale_catalog_refreshes_in_background(monkeypatch, tmp_path):
+    path = tmp_path / "voices.json"
+    _write(path, [{"voice_id": "old", "name": "Old"}], age=7200)
+    catalog = VoiceCatalog(path, ttl_s=3600, api_key="key")
+    fetched = []
+
+    def fake_refresh():
+        fetched.append(True)
+        _write(path, [{"voice_id": "new", "name": "New"}])
+
+    monkeypatch.setattr(catalog, "refresh", fake_refresh)
+    assert [v["voice_id"] for v in catalog.voices()] == ["old"]  # served stale
+    catalog._refreshing.join(5)
+    assert fetched == [True]
+    assert [v["voice_id"] for v in catalog.voices()] == ["new"]
+
+
+def test_validate_reports_unknown_voice(monkeypatch, tmp_path, caplog):
+    path = tmp_path / "voices.json"
+    _write(path, [{"voice_id": "abc", "name": "Rachel"}])
+    monkeypatch.setenv("ELEVENLABS_API_KEY", "key")
+    config = Config(default_voice_id="abd", voice_catalog_path=str(path))
+    with caplog.at_level(logging.ERROR):
+        config.validate(logging.getLogger("test"))
+    assert "abd" in caplog.text
+
+
+def test_unknown_voice_ids_checks_pool_only_when_randomizing(tmp_path):
+    path = tmp_path / "voices.json"
+    _write(path, [{"voice_id": "abc", "name": "Rachel"}])
+    config = Config(
+        default_voice_id="abc", voices={"Old": "gone"}, voice_catalog_path=str(path)
+    )
+    assert config.unknown_voice_ids() == []
+    assert config.unknown_voice_ids(randomize=True) == ["gone"]
@@ -0,0 +1,50 @@
+import io
+import json
+from pathlib import Path
+
+from pipeline.config import Config
+from pipeline.models import ModelRegistry
+from pipeline.worker import PipelineWorker
+
+
+def test_registry_loads_once():
+    registry = ModelRegistry("test")
+    calls = []
+
+    def loader():
+        calls.append(1)
+        return object()
+
+    first = registry.get("base", loader)
+    assert registry.get("base", loader) is first
+    assert len(calls) == 1
+    assert registry.loaded() == ["base"]
+
+
+def test_serve_stream_reports_status(monkeypatch, tmp_path):
+    def fake_run(self, text, name, **kwargs):
+        if "fail" in text:
+            raise RuntimeError("render crashed")
+
+        class Ctx:
+            final_video_path = tmp_path / name / "final_video.mp4"
+            output_dir = tmp_path / name
+        return Ctx()
+
+    monkeypatch.setattr("pipeline.pipeline.VideoPipeline.run", fake_run)
+    jobs = [
+        {"request_id": "job-1", "title": "First", "body": "once upon a time"},
+        {"request_id": "job-2", "title": "Second", "body": "this will fail"},
+    ]
+    inp = io.StringIO("\n".join(json.dumps(j) for j in jobs) + "\nnot json\n")
+    out = io.StringIO()
+    PipelineWorker(Config()).serve_stream(inp, out)
+    lines = [json.loads(line) for line in out.getvalue().splitlines()]
+    assert [(l.get("request_id"), l["status"]) for l in lines] == [
+        ("job-1", "started"),
+        ("job-1", "success"),
+        ("job-2", "started"),
+        ("job-2", "failed"),
+        (None, "invalid"),
+    ]
+    assert lines[1]["output"].endswith("final_video.mp4")